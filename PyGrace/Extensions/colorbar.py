@@ -1,6 +1,11 @@
 import sys
 import math
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from PyGrace.graph import Graph
 from PyGrace.dataset import DataSet
 from PyGrace.drawing_objects import DrawBox
@@ -313,8 +318,7 @@ class ColorBar(Graph):
         dataset = self.add_dataset([(self.world.xmin,self.world.ymin),
                                     (self.world.xmax,self.world.ymax)])
         Graph.autoscalex(self,pad=pad)
-        self.datasets.pop()
-        self._datasetIndex -= 1
+        self.remove_dataset(dataset)
     
     def autoscaley(self, pad=0, only_visible=True):
         """Over ride autoscale behavior of Graph.
@@ -322,29 +326,40 @@ class ColorBar(Graph):
         dataset = self.add_dataset([(self.world.xmin,self.world.ymin),
                                     (self.world.xmax,self.world.ymax)])
         Graph.autoscaley(self,pad=pad)
-        self.datasets.pop()
-        self._datasetIndex -= 1
+        self.remove_dataset(dataset)
+
+    def _colors_key(self):
+        """What the rectangles of the colors depend on: the domain, the
+        scale and the colors."""
+        (xmin,ymin,xmax,ymax) = self.get_world()
+        return (ymin, ymax, self.yaxis.scale, list(self.color_range))
 
     def add_colors(self):
         """add colors
-        first two colors are white and black, skip them
+        first two colors are white and black, skip them.  The rectangles
+        of the colors that were added before are replaced, and neighboring
+        colors that are the same share one rectangle.
         """
-        (xmin,ymin,xmax,ymax) = self.get_world()
-        for i in range(len(self.color_range)):
-            if self.yaxis.scale==LINEAR_SCALE:
-                y0 = ymin + (ymax - ymin)*float(i)/float(len(self.color_range))
-                y1 = ymin + (ymax - ymin)*float(i+1)/float(len(self.color_range))
-            elif self.yaxis.scale==LOGARITHMIC_SCALE:
-                y0 = ymin * math.pow(ymax/ymin,float(i)/float(len(self.color_range)))
-                y1 = ymin * math.pow(ymax/ymin,float(i+1)/float(len(self.color_range)))
-            else:
-                message = "'%s' is an unknown axis type"%self.xaxis.scale
-                raise TypeError,message
+        old = self.__dict__.get('_colorSets', ())
+        present = set(map(id, self.datasets))
+        self.remove_datasets([dataset for dataset in old
+                              if id(dataset) in present])
+
+        edges = self._edges()
+        n = len(self.color_range)
+        colorSets = []
+        start = 0
+        for i in range(n):
+            if i + 1 < n and self.color_range[i + 1] == self.color_range[i]:
+                continue
             # add a three-point dataset to show-up as a solid rectangle
-            the_dataset = self.add_dataset([(0, y0), (1, y1)],
-                                           SolidRectangle,
-                                           self.color_range[i])
-            self.move_dataset_to_back(the_dataset)
+            colorSets.append(self.insert_dataset(0, [(0, edges[start]),
+                                                     (1, edges[i + 1])],
+                                                 SolidRectangle,
+                                                 self.color_range[i]))
+            start = i + 1
+        self.__dict__['_colorSets'] = colorSets
+        self.__dict__['_colorsKey'] = self._colors_key()
 
     def set_label(self,label):
         """Set the axis label. 
@@ -353,12 +368,9 @@ class ColorBar(Graph):
         # this also rotates the axis label properly
         self.yaxis.label.text = r"\t{-1 0 0 -1}" + label + r"\t{}"
 
-    def z2color(self,z):
-        """Get the color that is associated with a particular value,
-        z.
-        """
-
-        # fudge the bounds of the world coordinates for rounding problems
+    def _bounds(self):
+        """Return the smallest and largest values that get a color, fudged
+        for rounding problems (see _epsilon)."""
         (xmin,ymin,xmax,ymax) = self.get_world()
         if self.yaxis.scale==LINEAR_SCALE:
             ymin -= self._epsilon()
@@ -366,17 +378,71 @@ class ColorBar(Graph):
         else:
             ymin /= 1.0 + self._epsilon()
             ymax *= 1.0 + self._epsilon()
+        return ymin,ymax
+
+    def z2color(self,z):
+        """Get the color that is associated with a particular value,
+        z.
+        """
+
+        # fudge the bounds of the world coordinates for rounding problems
+        (ymin,ymax) = self._bounds()
 
-        # find color
+        # find color (a value right at the top gets the last color)
         n = len(self.color_range)
         if z<ymin or z>ymax:
             return None
         elif self.yaxis.scale==LINEAR_SCALE:
             i = int(float(n)*(z - ymin)/(ymax-ymin))
-            return self.color_range[i]
         else:
             i = int(float(n)*math.log(z/ymin)/math.log(ymax/ymin))
-            return self.color_range[i]
+        return self.color_range[min(i, n - 1)]
+
+    def z2color_array(self,zs):
+        """Get the colors that are associated with a whole array of values,
+        zs, at once (see z2color).  The result is a masked array in which
+        the values outside of the domain (and nan) are masked.  Without
+        numpy, this is a list with None for those values.  A single value
+        gets a single color, or None, as with z2color.
+        """
+        if numpy is None:
+            if not hasattr(zs, '__iter__'):
+                return self.z2color(zs)
+            return [self.z2color(z) for z in zs]
+
+        (ymin,ymax) = self._bounds()
+        n = len(self.color_range)
+        zs = numpy.asarray(zs, dtype=float)
+        scalar = zs.ndim == 0
+        zs = numpy.atleast_1d(zs)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            outside = ~((zs >= ymin) & (zs <= ymax))
+            if self.yaxis.scale==LINEAR_SCALE:
+                bins = float(n)*(zs - ymin)/(ymax-ymin)
+            else:
+                bins = float(n)*numpy.log(zs/ymin)/math.log(ymax/ymin)
+        bins[outside] = 0
+        bins = numpy.minimum(bins.astype(int), n - 1)
+        if scalar:
+            return None if outside[0] else self.color_range[bins[0]]
+        colors = numpy.asarray(self.color_range)[bins]
+        return numpy.ma.masked_array(colors, mask=outside)
+
+    def _edges(self):
+        """Return the values at the edges of the colors of color_range,
+        from the bottom of the domain to the top.
+        """
+        (xmin,ymin,xmax,ymax) = self.get_world()
+        n = len(self.color_range)
+        if self.yaxis.scale==LINEAR_SCALE:
+            return [ymin + (ymax - ymin)*float(i)/float(n)
+                    for i in range(n + 1)]
+        elif self.yaxis.scale==LOGARITHMIC_SCALE:
+            return [ymin * math.pow(ymax/ymin,float(i)/float(n))
+                    for i in range(n + 1)]
+        else:
+            message = "'%s' is an unknown axis type"%self.yaxis.scale
+            raise TypeError,message
 
     def color2zs(self,color):
         """Get the range of values (zs) associated with a particular color,
@@ -384,20 +450,21 @@ class ColorBar(Graph):
         """
 
         i = self.color_range.index(color)
-        n = len(self.color_range)
-        (xmin,ymin,xmax,ymax) = self.get_world()
-        if self.yaxis.scale==LINEAR_SCALE:
-            zmin = float(i)/float(n)*(ymax - ymin) + ymin
-            zmax = float(i+1)/float(n)*(ymax - ymin) + ymin
-        else:
-            zmin = ymin*math.power(zmax/zmin,float(i)/float(n))
-            zmax = ymin*math.power(zmax/zmin,float(i+1)/float(n))
+        edges = self._edges()
+        return edges[i],edges[i+1]
 
-        return zmin,zmax
+    def colors2zs(self):
+        """Get the range of values (zmin,zmax) associated with each color
+        of color_range at once, in the order of color_range.
+        """
+        edges = self._edges()
+        return zip(edges[:-1],edges[1:])
 
     def __str__(self):
         """Override the __str__ functionality to draw the colorbar at
-        draw time.
+        draw time.  The colors are only added again if the domain, the
+        scale or the colors changed since they were last added.
         """
-        self.add_colors()
+        if self.__dict__.get('_colorsKey') != self._colors_key():
+            self.add_colors()
         return Graph.__str__(self)
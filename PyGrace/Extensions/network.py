@@ -473,11 +473,10 @@ class Network(Graph):
         label2), and the corresponding nodes need to exist in the
         network already.
         """
-        linkSet = self.add_dataset(node_pairs,
-                                   LinkSet,
-                                   size=size, color=color,
-                                   *args, **kwargs)
-        self.move_dataset_to_back(linkSet)
+        linkSet = self.insert_dataset(0, node_pairs,
+                                      LinkSet,
+                                      size=size, color=color,
+                                      *args, **kwargs)
         return linkSet
 
     def add_directed_link_set(self, node_pairs, size=1, color=1,
@@ -489,11 +488,10 @@ class Network(Graph):
         -node_pairs needs to be a pair of nodes (label1, label2), and
         the corresponding nodes need to exist in the network already.
         """
-        dirlinkSet = self.add_dataset(node_pairs,
-                                   DirectedLinkSet,
-                                   size=size, color=color,
-                                   *args, **kwargs)
-        self.move_dataset_to_back(dirlinkSet)
+        dirlinkSet = self.insert_dataset(0, node_pairs,
+                                         DirectedLinkSet,
+                                         size=size, color=color,
+                                         *args, **kwargs)
         return dirlinkSet
 
     def add_link(self, node_pair, size=1, color=1, *args, **kwargs):
@@ -504,11 +502,10 @@ class Network(Graph):
         -node_pair needs to be a pair of nodes (label1, label2), and
         the corresponding nodes need to exist in the network already.
         """
-        linkSet = self.add_dataset([node_pair],
-                                   LinkSet,
-                                   size=size, color=color,
-                                   *args, **kwargs)
-        self.move_dataset_to_back(linkSet)
+        linkSet = self.insert_dataset(0, [node_pair],
+                                      LinkSet,
+                                      size=size, color=color,
+                                      *args, **kwargs)
         return linkSet
 
     def add_directed_link(self, node_pair, *args, **kwargs):
@@ -519,9 +516,8 @@ class Network(Graph):
         -node_pair needs to be a pair of nodes (label1, label2), and
         the corresponding nodes need to exist in the network already.
         """
-        dirlinkSet = self.add_dataset([node_pair],
-                                   DirectedLinkSet,
-                                   *args, **kwargs)
-        self.move_dataset_to_back(dirlinkSet)
+        dirlinkSet = self.insert_dataset(0, [node_pair],
+                                         DirectedLinkSet,
+                                         *args, **kwargs)
         return dirlinkSet
 
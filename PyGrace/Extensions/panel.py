@@ -16,6 +16,10 @@ class PanelLabel(DrawText):
          'ilr' (inside lowr right), etc.
     """
 
+    # the label is placed from the view of its graph each time it is
+    # written, so its string is never stored
+    _cacheable = False
+
     def __init__(self,parent,index=None,dx=0.05,dy=0.05,
                  placement="iur",label_scheme=None,
                  *args,**kwargs):
@@ -0,0 +1,150 @@
+from collections import deque
+from itertools import islice
+from operator import lt, gt
+
+from PyGrace.dataset import DataSet, DATA_CHUNK_SIZE, _expressions
+from PyGrace.formatting import get_formatter
+
+class _RunningExtreme(object):
+    """The smallest (better=lt) or largest (better=gt) of the values that
+    were added, or of the last capacity values if capacity is given.  A
+    value of None is counted, but never the extreme.  Adding a value takes
+    O(1) time on average: for a window, the values that can still become
+    the extreme are kept in a monotonic deque."""
+    def __init__(self, better, capacity=None):
+        self.better = better
+        self.capacity = capacity
+        self.count = 0
+        self.value = None
+        self.window = deque()
+
+    def add(self, value):
+        count = self.count
+        self.count += 1
+        if self.capacity is None:
+            if value is not None and \
+                    (self.value is None or self.better(value, self.value)):
+                self.value = value
+            return
+
+        # values in the window that are not better than the new value can
+        # never be the extreme again, and the oldest value may leave
+        window = self.window
+        if value is not None:
+            while window and not self.better(window[-1][1], value):
+                window.pop()
+            window.append((count, value))
+        while window and window[0][0] <= count - self.capacity:
+            window.popleft()
+        self.value = window[0][1] if window else None
+
+def _smallest_positive(values):
+    positive = [value for value in values if value > 0]
+    if positive:
+        return min(positive)
+    return None
+
+class StreamingDataSet(DataSet):
+    """A DataSet that rows are appended to (with append and extend), which
+    keeps the limits and the smallest positive values of its data up to
+    date as the rows come in, so that limits() and smallest_positive() (and
+    with them Graph.autoscale) do not go through the data.
+
+    If capacity is given, only the last capacity rows are kept (and
+    written), as in a sliding window.  The data is then a deque instead of
+    a list.  appended counts all of the rows that were ever added.
+
+    Rows must be added with append and extend.  If the data or type is
+    replaced, the limits are found again from all of the data the next
+    time they are needed.
+    """
+    def __init__(self, parent, data=(), index=None, capacity=None,
+                 *args, **kwargs):
+        DataSet.__init__(self, parent, [], index, *args, **kwargs)
+        self.capacity = capacity
+        self.appended = 0
+        if capacity is not None:
+            self.data = deque(maxlen=capacity)
+        self._reset()
+        self.extend(data)
+
+    def _reset(self):
+        """Start the limits over for the current data and type."""
+        self._expressions = _expressions(self.type)
+        self._limitsData, self._limitsType = self.data, self.type
+        self._extremes = [_RunningExtreme(better, self.capacity)
+                          for better in (lt, lt, gt, gt, lt, lt)]
+        for row in self.data:
+            self._add_limits(row)
+
+    def _add_limits(self, row):
+        values = []
+        for expressions in self._expressions:
+            column = []
+            for expression in expressions:
+                if len(expression) == 1:
+                    column.append(row[expression[0]])
+                else:
+                    i, sign, j = expression
+                    column.append(row[i] + sign * row[j])
+            values.append(column)
+        x, y = values
+        limits = (min(x), min(y), max(x), max(y),
+                  _smallest_positive(x), _smallest_positive(y))
+        for extreme, value in zip(self._extremes, limits):
+            extreme.add(value)
+
+    def _check_limits(self):
+        if self.data is not self._limitsData or self.type != self._limitsType:
+            self._reset()
+
+    def append(self, row):
+        """Add a row at the end of the data."""
+        self._check_limits()
+        self.data.append(row)
+        self.appended += 1
+        self._add_limits(row)
+
+    def extend(self, rows):
+        """Add rows at the end of the data."""
+        self._check_limits()
+        for row in rows:
+            self.data.append(row)
+            self.appended += 1
+            self._add_limits(row)
+
+    def limits(self, only_visible=True):
+        if len(self.data):
+            if ((only_visible and self.hidden=="false")
+                or not only_visible):
+                self._check_limits()
+                return tuple(extreme.value for extreme in self._extremes[:4])
+        return None,None,None,None
+
+    def smallest_positive(self, only_visible=True):
+        if len(self.data):
+            if ((only_visible and self.hidden=="false")
+                or not only_visible):
+                self._check_limits()
+                return tuple(extreme.value for extreme in self._extremes[4:])
+        return None,None
+
+    def _iter_data(self, chunk_size=DATA_CHUNK_SIZE):
+        if isinstance(self.data, list):
+            for chunk in DataSet._iter_data(self, chunk_size):
+                yield chunk
+            return
+
+        # a deque can not be sliced, so it is written as it is iterated
+        if self.type[:2]=='xy' or self.type[:3] =='bar':
+            formatter = get_formatter(self.precision)
+            data = self.data
+            selection = self._selection()
+            if selection != (None, None):
+                data = self._select_rows(list(data), selection)
+            rows = iter(data)
+            block = list(islice(rows, chunk_size))
+            while block:
+                yield formatter.format_block(block)
+                block = list(islice(rows, chunk_size))
+        yield '&'
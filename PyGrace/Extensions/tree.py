@@ -2,11 +2,17 @@ import sys
 
 from PyGrace.grace import Grace
 from PyGrace.graph import Graph
+from PyGrace.base import is_type, is_member
 from PyGrace.dataset import DataSet
 
 class Tree(Graph):
     """A graph to display trees (such as phylogenetic trees).
     """
+    # check type of Tree specific attribute
+    _attribute_rules = (
+        ('orientation', is_type(str), is_member(('right','left','up','down'))),
+        )
+
     def __init__(self, parent, orientation='right', **kwargs):
         Graph.__init__(self, parent, **kwargs)
         
@@ -32,14 +38,6 @@ class Tree(Graph):
                             ymin = 0.075 * self.parent.max_canvas_height,
                             ymax = 0.925 * self.parent.max_canvas_height)
 
-    def __setattr__(self, key, value):
-        # check type of AxisLabel specific attribute
-        if key == 'orientation':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('right','left','up','down'))
-            
-        Graph.__setattr__(self, key, value)
-
     def add_tree(self, tree_data,
                  size=1, color=1, line_width=1, line_color=1,
                  *args, **kwargs):
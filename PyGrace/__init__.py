@@ -6,4 +6,6 @@ __all__ = [
     'fonts',
     'grace',
     'graph',
+    'live',
+    'reader',
     ]
@@ -27,6 +27,13 @@ class AxisBar(base.GraceObject):
 
 class AxisLabel(base.GraceObject):
     _staticType = 'AxisLabel'
+
+    # check type of AxisLabel specific attribute
+    _attribute_rules = (
+        ('place', base.is_type(str)),
+        ('layout', base.is_type(str)),
+        )
+
     def __init__(self, parent,
                  text='',
                  font=4,
@@ -41,16 +48,6 @@ class AxisLabel(base.GraceObject):
         base.GraceObject.__init__(self, parent, locals())
         self._formatting_template = {'place_tup': '%.20f, %.20f'}
 
-    def __setattr__(self, key, value):
-
-        # check type of AxisLabel specific attribute
-        if key == 'place':
-            self._check_type(str, key, value)
-        elif key == 'layout':
-            self._check_type(str, key, value)
-            
-        base.GraceObject.__setattr__(self, key, value)
-
     def __str__(self):
         self.orientation = self.parent.orientation
         self.alt = self.parent.alt
@@ -66,6 +63,26 @@ class AxisLabel(base.GraceObject):
             
 class Tick(base.GraceObject):
     _staticType = 'Tick'
+
+    # check type of Tick specific attribute
+    _attribute_rules = (
+        ('major', base.is_type((float, int)),
+         base.in_range(0, None, includeMin=False)),
+        ('minor_ticks', base.is_type(int), base.in_range(0, None)),
+        ('*grid', base.is_type(str), base.is_member(('on', 'off'))),
+        ('default', base.is_type(int)),
+        ('place_rounded', base.is_type(str),
+         base.is_member(('true', 'false'))),
+        ('inout', base.is_type(str), base.is_member(('in', 'out', 'both'))),
+        ('spec_ticks spec_ticktypes spec_ticklabels',
+         base.is_type((tuple, list))),
+        ('spec_labeldefault', base.is_type(str)),
+        ('spec_typedefault', base.is_type(str),
+         base.is_member(('major', 'minor'))),
+        ('spec_type', base.is_type(str),
+         base.is_member(('none', 'ticks', 'both'))),
+        )
+
     def __init__(self, parent,
                  onoff='on',
                  major=0.5,
@@ -94,42 +111,13 @@ class Tick(base.GraceObject):
                  ):
         base.GraceObject.__init__(self, parent, locals())
 
-    def __setattr__(self, key, value):
-
-        # check type of AxisLabel specific attribute
-        if key == 'major':
-            self._check_type((float, int), key, value)
-            self._check_range(key, value, 0, None, includeMin=False)
-        elif key == 'minor_ticks':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, None)
-        elif key.endswith('grid'):
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('on', 'off'))
-        elif key == 'default':
-            self._check_type(int, key, value)
-        elif key == 'place_rounded':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('true', 'false'))
-        elif key == 'inout':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('in', 'out', 'both'))
-        elif key == 'spec_ticks':
-            self._check_type((tuple, list), key, value)
-        elif key == 'spec_ticktypes':
-            self._check_type((tuple, list), key, value)
-        elif key == 'spec_ticklabels':
-            self._check_type((tuple, list), key, value)
-        elif key == 'spec_labeldefault':
-            self._check_type(str, key, value)
-        elif key == 'spec_typedefault':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('major', 'minor'))
-        elif key == 'spec_type':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('none', 'ticks', 'both'))
-
-        base.GraceObject.__setattr__(self, key, value)
+    @property
+    def _cacheable(self):
+        """Lists of special ticks can be changed in place, so the string is
+        only stored if they are all tuples."""
+        return not (isinstance(self.spec_ticks, list) or
+                    isinstance(self.spec_ticklabels, list) or
+                    isinstance(self.spec_ticktypes, list))
 
     def __str__(self):
 
@@ -214,6 +202,18 @@ Tick.set_spec_ticks expects tick_labels list to be the same size as major_ticks.
 
 class TickLabel(base.GraceObject):
     _staticType = 'TickLabel'
+
+    # check type of TickLabel specific attribute
+    _attribute_rules = (
+        ('angle', base.is_type((float, int)),
+         base.in_range(0, 360, includeMax=True)),
+        ('stagger', base.is_type(int), base.in_range(0, 9)),
+        ('start stop', base.is_type((float, int))),
+        ('start_type stop_type', base.is_type(str),
+         base.is_member(('auto', 'spec'))),
+        ('formula', base.is_type(str)),
+        )
+
     def __init__(self, parent,
                  onoff='on',
                  format='general',
@@ -239,25 +239,6 @@ class TickLabel(base.GraceObject):
         base.GraceObject.__init__(self, parent, locals())
         self._formatting_template = {'offset_tup': '%.20f, %.20f'}
 
-    def __setattr__(self, key, value):
-
-        # check type of AxisLabel specific attribute
-        if key == 'angle':
-            self._check_type((float, int), key, value)
-            self._check_range(key, value, 0, 360, includeMax=True)
-        elif key == 'stagger':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 9)
-        elif key == 'start' or key == 'stop':
-            self._check_type((float, int), key, value)
-        elif key == 'start_type' or key == 'stop_type':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('auto', 'spec'))
-        elif key == 'formula':
-            self._check_type(str, key, value)
-
-        base.GraceObject.__setattr__(self, key, value)
-
     def __str__(self):
         self.orientation = self.parent.orientation
         self.alt = self.parent.alt
@@ -283,6 +264,16 @@ class TickLabel(base.GraceObject):
 @    %(alt)s%(orientation)saxis ticklabel color %(color)s""" % self
 
 class Axis(base.GraceObject):
+
+    # check type of Axis specific attribute
+    _attribute_rules = (
+        ('orientation', base.is_type(str), base.is_member(('x', 'y'))),
+        ('scale', base.is_type(str),
+         base.is_member((LINEAR_SCALE, LOGARITHMIC_SCALE))),
+        ('alt', base.is_type(str), base.is_member(('', 'alt'))),
+        ('type_zero', base.is_type(str), base.is_member(('true', 'false'))),
+        )
+
     def __init__(self, parent,
                  orientation = 'x',
                  alt='',
@@ -303,25 +294,6 @@ class Axis(base.GraceObject):
         self.ticklabel = TickLabel(self)
         self._formatting_template = {'offset': '%.20f, %.20f'}
 
-    def __setattr__(self, key, value):
-
-        # check type of AxisLabel specific attribute
-        if key == 'orientation':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('x', 'y'))
-        elif key == 'scale':
-            self._check_type(str, key, value)
-            SCALE_TYPES = (LINEAR_SCALE, LOGARITHMIC_SCALE)
-            self._check_membership(key, value, SCALE_TYPES)
-        elif key == 'alt':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('', 'alt'))
-        elif key == 'type_zero':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('true', 'false'))
-
-        base.GraceObject.__setattr__(self, key, value)
-
     def __str__(self):
 
         # only print everything if axis is on
@@ -1,4 +1,5 @@
 import sys
+import threading
 
 NAMED_CHILD_TYPES = dict.fromkeys(
     ['Timestamp', 'Legend', 'Frame', 'xAxis', 'yAxis', 'altxAxis', 'altyAxis',
@@ -8,6 +9,153 @@ NAMED_CHILD_TYPES = dict.fromkeys(
     )
 DYNAMIC_CHILD_TYPES = ['Graph', 'DataSet', 'DrawingObject']
 
+#------------------------------------------------------------------------------
+# validation of attribute values.  each class lists the rules for the
+# attributes that it checks in _attribute_rules.  a rule is a pattern
+# followed by checks, where the pattern is a space separated list of
+# attribute names and '*suffix' for all names that end in suffix.  for an
+# attribute, the first rule of the class that matches is used, and then the
+# first rule of each of its base classes.  the checks for each class and
+# attribute name are looked up once and stored in _validators.
+#------------------------------------------------------------------------------
+def is_type(allowedTypes):
+    """Check that the value is of a type in allowedTypes."""
+    def check(obj, key, value):
+        obj._check_type(allowedTypes, key, value)
+    return check
+
+def in_range(min_, max_, includeMin=True, includeMax=True):
+    """Check that the value is in between min_ and max_."""
+    def check(obj, key, value):
+        obj._check_range(key, value, min_, max_, includeMin, includeMax)
+    return check
+
+def is_member(allowed):
+    """Check that the value is one of the allowed values."""
+    def check(obj, key, value):
+        obj._check_membership(key, value, allowed)
+    return check
+
+FORMAT_TYPES = ('general', 'decimal', 'power', 'engineering',
+                'exponential','scientific')
+_UPPER_FORMAT_TYPES = [t.upper() for t in FORMAT_TYPES]
+
+def _check_format(obj, key, value):
+    """Formats are not case sensitive."""
+    obj._check_membership(key, value.upper(), _UPPER_FORMAT_TYPES)
+
+def _matches(pattern, key):
+    for name in pattern.split():
+        if name.startswith('*'):
+            if key.endswith(name[1:]):
+                return True
+        elif key == name:
+            return True
+    return False
+
+# checks by (class, attribute name)
+_validators = {}
+
+def _resolve_validators(cls, key):
+    """Find (and store) the checks of attribute key of instances of cls."""
+    checks = []
+    for klass in cls.__mro__:
+        for rule in klass.__dict__.get('_attribute_rules', ()):
+            if _matches(rule[0], key):
+                checks.extend(rule[1:])
+                break
+    checks = tuple(checks)
+    _validators[cls, key] = checks
+    return checks
+
+#------------------------------------------------------------------------------
+# stored strings.  each object keeps the string that it was last written as
+# (in '_fragment'), which is thrown away when an attribute of the object, or
+# of one of its descendants, is set (see GraceObject.invalidate).  the
+# number of times the string of each class was reused (hits) and made again
+# (misses) is counted in _render_counts.
+#------------------------------------------------------------------------------
+_render_counts = {}
+
+# set while writing an object if it includes something that is not stored
+_rendering = threading.local()
+
+# becomes True when the first string is stored.  until then (while a tree
+# is being built) there is nothing to throw away when attributes are set.
+_anything_stored = [False]
+
+_MISSING = object()
+
+# the names of the attributes of each class that end in a suffix, by (class,
+# suffix), for set_suffix and scale_suffix
+_suffix_names = {}
+
+def render_stats():
+    """Return a dictionary with (hits, misses) of the stored strings for the
+    name of each class that was written."""
+    return dict((cls.__name__, tuple(counts))
+                for cls, counts in _render_counts.iteritems())
+
+def reset_render_stats():
+    """Set the counts of render_stats back to zero."""
+    _render_counts.clear()
+
+#------------------------------------------------------------------------------
+# copying the format of one object to others.  a class stands for an object
+# with its default values, which is made once per class (a prototype) and
+# kept in _prototypes.  the prototypes are only read from.
+#------------------------------------------------------------------------------
+_prototypes = {}
+
+def _prototype(cls):
+    """Return the object with the default values of cls.  The constructor
+    is called with as few arguments (all None) as it takes."""
+    try:
+        return _prototypes[cls]
+    except KeyError:
+        pass
+    args = []
+    while True:
+        try:
+            prototype = cls(*args)
+        except TypeError:
+            args.append(None)
+        else:
+            break
+    _prototypes[cls] = prototype
+    return prototype
+
+def _own_copy(value):
+    """Lists and dictionaries are copied, so that objects that copy a
+    format do not share them."""
+    if isinstance(value, (list, dict)):
+        return type(value)(value)
+    return value
+
+def copy_format_many(targets, source, all=True):
+    """Set the default attributes of each of targets to the values of
+    source (an object, or a class for its default values), and those of
+    their children too if all is True.  The values of source are looked
+    up once for all targets of the same class."""
+    if isinstance(source, type):
+        source = _prototype(source)
+    values = {}
+    for target in targets:
+        cls = target.__class__
+        if cls not in values:
+            values[cls] = [(attr, getattr(source, attr))
+                           for attr in target._defaultAttributes]
+        for attr, value in values[cls]:
+            setattr(target, attr, _own_copy(value))
+
+    # the children are matched by position, as with zip
+    if all:
+        sourceChildren = source.children()
+        targetChildren = [target.children() for target in targets]
+        for i, sourceChild in enumerate(sourceChildren):
+            copy_format_many([children[i] for children in targetChildren
+                              if i < len(children)], sourceChild)
+
 class GraceObject(object):
     """Since most of the classes in PyGrace are basically just dictionaries
     with special string representations and a place to specify defaults for
@@ -19,6 +167,43 @@ class GraceObject(object):
 
     In addition, the parents and children of each object are recorded, so that
     all objects in a tree can access each other."""
+
+    # this list of checks on the type and value is not complete (FIX)
+    _attribute_rules = (
+        ('*linestyle', is_type((int,)), in_range(0, 8)),
+        ('*linewidth', is_type((float, int)), in_range(0, None)),
+        ('*just', is_type((int,)), in_range(0, 15, includeMax=False)),
+        ('*size', is_type((float, int)), in_range(0, None)),
+        ('x y', is_type((float, int))),
+        ('xmin xmax ymin ymax', is_type((float, int))),
+        ('onoff', is_type((str,))),
+        ('hidden', is_type((str,))),
+        ('rot', is_type((float, int))),
+        ('length', is_type((int,)), in_range(0, 8, includeMax=True)), # legend
+        ('*pattern', is_type((int,)), in_range(0, 32, includeMax=False)),
+        ('*_tup', is_type(tuple)),
+        ('upright lowleft', is_type(tuple)),
+        ('loctype', is_type(str), is_member(('world', 'view'))),
+        ('*_loc', is_type(str), is_member(('auto', 'spec', 'para'))),
+        ('text', is_type(str)),
+        ('format', is_type(str), _check_format),
+        ('prec', is_type(int), in_range(0, 9)),
+        ('append prepend', is_type(str)),
+        ('offset', is_type(tuple)),
+        ('place', is_type(str), is_member(('normal', 'opposite', 'both'))),
+        )
+
+    # objects that are made with validate=False skip all of the checks
+    _validate = True
+
+    # False for objects whose string depends on more than their attributes
+    # and those of their named children (such as the time of the Timestamp)
+    _cacheable = True
+
+    # attributes that every descendant is written with (such as the colors
+    # of the root), so that setting one throws away all stored strings
+    _tree_attributes = ()
+
     def __init__(self, parent, attrs, *args, **kwargs):
         
         # set all key, value pairs in attrs to attributes of self
@@ -35,6 +220,15 @@ class GraceObject(object):
         """This sets all of the arguements that are given as default arguments
         as the attributes of the class."""
 
+        # objects made with validate=False, and all of their children, do
+        # not check the values of their attributes (for trusted builders)
+        validate = (attrDict.get('kwargs') or {}).pop('validate', None)
+        if validate is None:
+            parent = attrDict.get('parent')
+            validate = getattr(parent, '_validate', True)
+        if not validate:
+            object.__setattr__(self, '_validate', False)
+
         # parent gets set in a separate function (and self doesn't need it)
         for reserved in ['self', 'parent', 'kwargs']:
             if attrDict.has_key(reserved):
@@ -176,69 +370,78 @@ class GraceObject(object):
 
     def __setattr__(self, key, value):
 
-        # this list of checks on the type and value is not complete (FIX)
-        if key.endswith('linestyle'):
-            self._check_type((int,), key, value)
-            self._check_range(key, value, 0, 8)
-        elif key.endswith('linewidth'):
-            self._check_type((float, int), key, value)
-            self._check_range(key, value, 0, None)
-        elif key.endswith('just'):
-            self._check_type((int,), key, value)
-            self._check_range(key, value, 0, 15, includeMax=False)
-        elif key.endswith('size'):
-            self._check_type((float, int), key, value)
-            self._check_range(key, value, 0, None)
-        elif key == 'x' or key == 'y':
-            self._check_type((float, int), key, value)
-        elif key == 'xmin' or key == 'xmax' or key == 'ymin' or key == 'ymax':
-            self._check_type((float, int), key, value)
-        elif key == 'onoff':
-            self._check_type((str,), key, value)
-        elif key == 'hidden':
-            self._check_type((str,), key, value)
-        elif key == 'rot':
-            self._check_type((float, int), key, value)
-        elif key == 'length': # legend line length
-            self._check_type((int,), key, value)
-            self._check_range(key, value, 0, 8, includeMax=True)
-        elif key.endswith('pattern'):
-            self._check_type((int,), key, value)
-            self._check_range(key, value, 0, 32, includeMax=False)
-        elif key.endswith('_tup'):
-            self._check_type(tuple, key, value)
-        elif key == 'upright' or key == 'lowleft':
-            self._check_type(tuple, key, value)
-        elif key == 'loctype':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('world', 'view'))
-        elif key.endswith('_loc'):
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('auto', 'spec', 'para'))
-        elif key == 'onoff':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('on', 'off'))
-        elif key == 'text':
-            self._check_type(str, key, value)
-        elif key == 'format':
-            self._check_type(str, key, value)
-            FORMAT_TYPES = ('general', 'decimal', 'power', 'engineering',
-                            'exponential','scientific')
-            upperTypes = [t.upper() for t in FORMAT_TYPES]
-            self._check_membership(key, value.upper(), upperTypes)
-        elif key == 'prec':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 9)
-        elif key == 'append' or key == 'prepend':
-            self._check_type(str, key, value)
-        elif key == 'offset':
-            self._check_type(tuple, key, value)
-        elif key == 'place':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('normal', 'opposite', 'both'))
-            
-        # actually set the value of the attribute here
-        object.__setattr__(self, key, value)
+        # check the value with the rules for this attribute name, which are
+        # looked up once per class and attribute name
+        if self._validate:
+            try:
+                checks = _validators[self.__class__, key]
+            except KeyError:
+                checks = _resolve_validators(self.__class__, key)
+            for check in checks:
+                check(self, key, value)
+
+        # actually set the value of the attribute here.  the stored strings
+        # are kept if the very same value is set again (as for the index of
+        # a child that is copied from its parent while it is written).
+        if self.__dict__.get(key, _MISSING) is not value:
+            object.__setattr__(self, key, value)
+            if _anything_stored[0]:
+                self.invalidate(key in self._tree_attributes)
+
+    def invalidate(self, all=False):
+        """Throw away the stored string of this object, of its named
+        children (which may be written with attributes of their parent) and
+        of its ancestors, so that they are made again when they are next
+        written.  This is done whenever an attribute is set, but has to be
+        called after changing a list attribute in place (such as
+        Tick.spec_ticks).  If all is True, the strings of all descendants
+        are thrown away too."""
+        named = self.__dict__.get('_namedChildren') or {}
+        if all:
+            dynamic = self.__dict__.get('_dynamicChildren') or {}
+            for child in named.values() + sum(dynamic.values(), []):
+                child.invalidate(all)
+        else:
+            for child in named.itervalues():
+                child.__dict__.pop('_fragment', None)
+        node = self
+        while node is not None:
+            node.__dict__.pop('_fragment', None)
+            node = node.__dict__.get('parent')
+
+    def _fragment_string(self):
+        """Return the string that is stored by _render (all of str(self),
+        unless a subclass only stores part of it)."""
+        return self.__str__()
+
+    def _render(self):
+        """Return self._fragment_string(), reusing the string that was made
+        the last time if nothing changed since."""
+        cacheable = self._cacheable
+        try:
+            counts = _render_counts[self.__class__]
+        except KeyError:
+            counts = _render_counts[self.__class__] = [0, 0]
+        if cacheable:
+            fragment = self.__dict__.get('_fragment')
+            if fragment is not None:
+                counts[0] += 1
+                return fragment
+        counts[1] += 1
+
+        # an object that includes a child that can not be stored can not be
+        # stored either
+        outer = getattr(_rendering, 'volatile', False)
+        _rendering.volatile = False
+        try:
+            fragment = self._fragment_string()
+        finally:
+            volatile = _rendering.volatile or not cacheable
+            _rendering.volatile = outer or volatile
+        if not volatile:
+            self.__dict__['_fragment'] = fragment
+            _anything_stored[0] = True
+        return fragment
         
     def __getitem__(self, key):
         """Always returns a formatted string representation of an attribute
@@ -255,7 +458,10 @@ class GraceObject(object):
             return self._formatting_template[key] % getattr(self, key)
         # if there isn't one, just convert to a string
         except KeyError:
-            return str(getattr(self, key))
+            value = getattr(self, key)
+            if isinstance(value, GraceObject):
+                return value._render()
+            return str(value)
 
     def __eq__(self,other):
         """Two objects are the same if all of their attributes are the same.
@@ -311,33 +517,55 @@ class GraceObject(object):
         """Scale all attributes with name ending in 'suffix' to value times the
         original value.  If 'all' is True, then same is set for all children
         recursively too."""
-
-        # set all attributes ending in suffix to value
-        attrList = [(getattr(self, name), name) for name in dir(self)]
-        for attr, name in attrList:
-            if not callable(attr) and name.endswith(suffix):
-                oldValue = getattr(self, name)
-                setattr(self, name, oldValue * value)
-
-        # if the 'all' flag is true, do the same for all children
-        if all:
-            for child in self.children():
-                child.scale_suffix(value, suffix, all)
+        self._update_suffixes([(suffix, True, value)], all)
 
     def set_suffix(self, value, suffix, all=True):
         """Set all attributes with name ending in 'suffix' to value.  If 'all'
         is True, then same is set for all children recursively too."""
-
-        # set all attributes ending in suffix to value
-        attrList = [(getattr(self, name), name) for name in dir(self)]
-        for attr, name in attrList:
-            if not callable(attr) and name.endswith(suffix):
-                setattr(self, name, value)
+        self._update_suffixes([(suffix, False, value)], all)
+
+    def set_suffixes(self, updates, all=True):
+        """Set the attributes for each (value, suffix) pair of updates, in
+        one walk through the tree.  The pairs are applied in order, so this
+        is the same as calling set_suffix for each pair in turn."""
+        self._update_suffixes([(suffix, False, value)
+                               for value, suffix in updates], all)
+
+    def scale_suffixes(self, updates, all=True):
+        """Scale the attributes for each (value, suffix) pair of updates, in
+        one walk through the tree (see set_suffixes)."""
+        self._update_suffixes([(suffix, True, value)
+                               for value, suffix in updates], all)
+
+    def _update_suffixes(self, updates, all):
+        for suffix, scale, value in updates:
+            for name in self._names_with_suffix(suffix):
+                if scale:
+                    setattr(self, name, getattr(self, name) * value)
+                else:
+                    setattr(self, name, value)
 
         # if the 'all' flag is true, do the same for all children
         if all:
             for child in self.children():
-                child.set_suffix(value, suffix, all)
+                child._update_suffixes(updates, all)
+
+    def _names_with_suffix(self, suffix):
+        """Return the names of the attributes that end in suffix and are
+        not callable, in alphabetical order (as dir would list them).  The
+        names that the class has are looked up once per class and
+        suffix."""
+        cls = self.__class__
+        try:
+            classNames = _suffix_names[cls, suffix]
+        except KeyError:
+            classNames = frozenset(name for name in dir(cls)
+                                   if name.endswith(suffix))
+            _suffix_names[cls, suffix] = classNames
+        names = classNames.union([name for name in self.__dict__
+                                  if name.endswith(suffix)])
+        return [name for name in sorted(names)
+                if not callable(getattr(self, name))]
 
     def set_fonts(self, font, all=True):
         """Set all fonts to given value.  Recursive if 'all' is True."""
@@ -361,42 +589,10 @@ class GraceObject(object):
             pass
 
     def copy_format(self, other, all=True):
-
-        # other is a class, not an instance of a class
-        if isinstance(other,type):
-
-#             print 'BBB', other
-#             print dir(other)
-#             print other.__init__
-#             print dir(other.__init__)
-#             print other.__init__.im_func.func_code.co_argcount
-
-#             args = [None] * (other.__init__.im_func.func_code.co_argcount - 1)
-#             print args
-#             x = other(*args)
-
-            complete = False
-            args = []
-            while not complete:
-                try:
-                    x = other(*args)
-                except TypeError:
-                    args.append(None)
-                else:
-                    complete = True
-            self.copy_format(x, all=all)
-            
-        # other is an instance of a class
-        else:
-
-            # set all default attibutes to the same values as other
-            for attr in self._defaultAttributes:
-                setattr(self, attr, getattr(other, attr))
-
-            if all:
-                for thisChild, thatChild in zip(self.children(), 
-                                                other.children()):
-                    thisChild.copy_format(thatChild)
+        """Set the default attributes (and those of the children, if all is
+        True) to the values of other.  other can also be a class, whose
+        default values are then copied (see copy_format_many)."""
+        copy_format_many([self], other, all)
 
     def _make_reference_list(self):
 
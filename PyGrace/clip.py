@@ -0,0 +1,123 @@
+"""Clipping of the data of a DataSet to the world of its graph at the time
+it is written.
+
+Each row gets an outcode (as in Cohen-Sutherland line clipping): a bit for
+each side of the world that the whole extent of the row (with its error
+bars, say) is beyond.  A row with outcode 0 can be seen.  Rows beyond the
+world are left out where that does not change what is drawn:
+
+    no line     only the rows that can be seen are kept
+    lines and   of each run of rows with the same outcode beyond the
+    stairs      world, only the first and the last row are kept.  The
+                regions of the outcodes are convex, so the lines between
+                the rows that are kept stay beyond the same side
+    segments    a pair of rows (or a group of three for 3-segments) is
+                kept whole if one of its segments may cross the world
+
+The rows do not need to be sorted.  With numpy, the data can be an array
+and the work is done with array operations; otherwise it is a list of rows.
+"""
+from operator import lt, gt
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# the bits of an outcode
+LEFT, RIGHT, BELOW, ABOVE = 1, 2, 4, 8
+
+# the line types of a DataSet that need care (see dataset.LINETYPES)
+NO_LINE, SEGMENTS, THREE_SEGMENTS = 0, 4, 5
+
+def _is_array(data):
+    return numpy is not None and isinstance(data, numpy.ndarray)
+
+def outcodes(xExtents, yExtents, world):
+    """Return the outcode of each row from the lowest and highest value of
+    each row along x, xExtents = (lows, highs), and along y.  An extent of
+    None means the rows can reach anywhere along that axis.  world is
+    (xmin, ymin, xmax, ymax), in either order along each axis."""
+    xmin, ymin, xmax, ymax = world
+    xmin, xmax = min(xmin, xmax), max(xmin, xmax)
+    ymin, ymax = min(ymin, ymax), max(ymin, ymax)
+    sides = []
+    if xExtents is not None:
+        sides.extend([(xExtents[1], lt, xmin, LEFT),
+                      (xExtents[0], gt, xmax, RIGHT)])
+    if yExtents is not None:
+        sides.extend([(yExtents[1], lt, ymin, BELOW),
+                      (yExtents[0], gt, ymax, ABOVE)])
+    if not sides:
+        return None
+
+    if _is_array(sides[0][0]):
+        codes = numpy.zeros(len(sides[0][0]), dtype=numpy.uint8)
+        for values, beyond, edge, bit in sides:
+            codes[beyond(values, edge)] |= bit
+        return codes
+
+    codes = [0] * len(sides[0][0])
+    for values, beyond, edge, bit in sides:
+        for i, value in enumerate(values):
+            if beyond(value, edge):
+                codes[i] |= bit
+    return codes
+
+def rows_to_keep(codes, lineType):
+    """Return the indices of the rows that are kept, in order, for the
+    outcodes of the rows and the line type of the set."""
+    if _is_array(codes):
+        return numpy.flatnonzero(_keep_array(codes, lineType))
+
+    n = len(codes)
+    if lineType == NO_LINE:
+        return [i for i in xrange(n) if not codes[i]]
+    if lineType in (SEGMENTS, THREE_SEGMENTS):
+        size = 2 if lineType == SEGMENTS else 3
+        end = n - n % size
+        keep = []
+        for start in xrange(0, end, size):
+            group = codes[start:start + size]
+            if any(not a & b for a, b in zip(group[:-1], group[1:])):
+                keep.extend(xrange(start, start + size))
+        # (the rows after the last whole group are kept as they are)
+        return keep + range(end, n)
+    return [i for i in xrange(n) if not codes[i] or
+            (i > 0 and codes[i - 1] != codes[i]) or
+            (i < n - 1 and codes[i + 1] != codes[i])]
+
+def _keep_array(codes, lineType):
+    """The rows that rows_to_keep keeps, as a boolean array."""
+    n = len(codes)
+    if lineType == NO_LINE:
+        return codes == 0
+    if lineType in (SEGMENTS, THREE_SEGMENTS):
+        size = 2 if lineType == SEGMENTS else 3
+        end = n - n % size
+        groups = codes[:end].reshape(-1, size)
+        seen = ((groups[:, :-1] & groups[:, 1:]) == 0).any(axis=1)
+        keep = numpy.ones(n, dtype=bool)
+        keep[:end] = numpy.repeat(seen, size)
+        return keep
+    keep = codes == 0
+    changes = codes[1:] != codes[:-1]
+    keep[1:] |= changes
+    keep[:-1] |= changes
+    return keep
+
+def clip_rows(data, xExtents, yExtents, world, lineType):
+    """Return the rows of data that are kept when the set is clipped to
+    world (see outcodes and rows_to_keep)."""
+    codes = outcodes(xExtents, yExtents, world)
+    if codes is None:
+        return data
+    keep = rows_to_keep(codes, lineType)
+
+    # a set with no rows at all may be dropped by xmgrace, so one row
+    # beyond the world stays
+    if not len(keep) and len(data):
+        keep = [0]
+    if _is_array(data):
+        return data[keep]
+    return [data[i] for i in keep]
@@ -0,0 +1,112 @@
+"""Compressed Grace project files.
+
+A project file whose name ends in '.gz', '.bz2' or '.xz' (after '.agr') is
+written through the compressor of the standard library, and read back
+through it.  '.xz' needs the lzma module (or backports.lzma on python 2).
+The project goes through the compressor in chunks of COMPRESS_CHUNK_BYTES,
+since the compressors are slow with the many small writes of
+Grace.write_to.
+"""
+import gzip
+import bz2
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+# the suffixes of compressed project files
+COMPRESSION_SUFFIXES = ('.gz', '.bz2', '.xz')
+
+# level of gzip compression: 6 is about as small as 9, and a lot faster
+GZIP_LEVEL = 6
+
+# number of bytes that are handed to (and read from) a compressor at a time
+COMPRESS_CHUNK_BYTES = 1 << 20
+
+def _open_gzip(filename, mode):
+    return gzip.GzipFile(filename, mode, GZIP_LEVEL)
+
+def _open_bz2(filename, mode):
+    return bz2.BZ2File(filename, mode)
+
+def _open_xz(filename, mode):
+    return lzma.LZMAFile(filename, mode)
+
+OPENERS = {'.gz': _open_gzip,
+           '.bz2': _open_bz2,
+           }
+if lzma is not None:
+    OPENERS['.xz'] = _open_xz
+
+def split_compression(filename):
+    """Return the name of a file without its compression suffix, and the
+    suffix ('' if it is not compressed)."""
+    for suffix in COMPRESSION_SUFFIXES:
+        if filename.lower().endswith(suffix):
+            return filename[:-len(suffix)], filename[-len(suffix):]
+    return filename, ''
+
+def is_compressed(filename):
+    return bool(split_compression(filename)[1])
+
+def open_project(filename, mode='r'):
+    """Open a project file for reading (mode 'r') or writing (mode 'w'),
+    through a compressor if its name ends in a compression suffix.  A
+    compressed file that is opened for writing buffers what is written."""
+    suffix = split_compression(filename)[1].lower()
+    if not suffix:
+        return open(filename, mode)
+    try:
+        opener = OPENERS[suffix]
+    except KeyError:
+        message = "can not open '%s': no lzma module for '%s' files" % \
+                  (filename, suffix)
+        raise ValueError(message)
+    stream = opener(filename, mode + 'b')
+    if mode == 'w':
+        return BufferedStream(stream)
+    return stream
+
+def iter_lines(stream, size=COMPRESS_CHUNK_BYTES):
+    """Iterate over the lines of a stream (with their newlines), reading
+    size bytes at a time."""
+    rest = ''
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        lines = (rest + chunk).split('\n')
+        rest = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if rest:
+        yield rest
+
+class BufferedStream(object):
+    """Collects what is written until there are size bytes, and writes them
+    to stream in one go."""
+    def __init__(self, stream, size=COMPRESS_CHUNK_BYTES):
+        self.stream = stream
+        self.size = size
+        self.chunks = []
+        self.nBytes = 0
+
+    def write(self, text):
+        self.chunks.append(text)
+        self.nBytes += len(text)
+        if self.nBytes >= self.size:
+            self.flush()
+
+    def flush(self):
+        if self.chunks:
+            self.stream.write(''.join(self.chunks))
+            self.chunks = []
+            self.nBytes = 0
+
+    def close(self):
+        self.flush()
+        self.stream.close()
@@ -1,4 +1,40 @@
-from base import GraceObject
+from functools import wraps
+from itertools import imap, ifilter
+from operator import itemgetter, add, sub
+
+from base import GraceObject, is_type, in_range, is_member
+from formatting import field_format, get_formatter
+from decimate import DECIMATORS, decimate, point_budget
+from clip import clip_rows
+
+# numpy is optional.  if it is available, the data of a DataSet can also be
+# given as a 2-D array with one column per field of the dataset type.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# number of data rows that are formatted and handed out at a time when
+# writing the data of a DataSet
+DATA_CHUNK_SIZE = 10000
+
+DATA_TYPES = ('xy', 'xydx', 'xydy', 'xydxdy', 'xydydy', 
+              'xydxdx', 'xydxdxdydy', 'bar', 'bardy', 'bardydy',
+              'xyhilo', 'xyz', 
+#               'xyr', # apparently unsupported
+              'xysize', 'xycolor',
+#               'xycolpat', # xmgrace does not support
+              'xyvmap', 'xyboxplot')
+
+# values of the decimate attribute of a Graph and a DataSet (see
+# decimate.py).  None for a DataSet means the same as its graph.
+DECIMATE_METHODS = (None, False) + tuple(sorted(DECIMATORS))
+
+# types of Graph whose data can be clipped to the world when it is written
+# (see clip.py), and the types of DataSet that reach anywhere along y (bars
+# go down to the baseline)
+CLIP_GRAPH_TYPES = ('XY', 'Fixed')
+UNBOUNDED_Y_TYPES = ('bar', 'bardy', 'bardydy')
 
 SYMBOLS = {"None":0,
            "Circle":1,
@@ -38,8 +74,203 @@ INDEX2LINESTYLES = {}
 for name,index in LINESTYLES.iteritems():
     INDEX2LINESTYLES[index] = name
 
+# number of data columns for each type of DataSet
+DATA_COLUMNS = {'xy':2,
+                'xydx':3,
+                'xydy':3,
+                'xydxdy':4,
+                'xydydy':4,
+                'xydxdx':4,
+                'xydxdxdydy':6,
+                'bar':2,
+                'bardy':3,
+                'bardydy':4,
+                'xyhilo':5,
+                'xyz':3,
+                'xysize':3,
+                'xycolor':3,
+                'xyvmap':4,
+                'xyboxplot':6,
+                }
+
+def is_array(data):
+    """Return True if data is stored in a numpy array."""
+    return numpy is not None and isinstance(data, numpy.ndarray)
+
+# column expressions that bound the extent of each type of DataSet along x
+# and y.  an expression is either a single column, (i,), or a column plus or
+# minus another column, (i, +1, j) and (i, -1, j).  for example, the x-extent
+# of an 'xydx' set is spanned by x, x - dx and x + dx.
+X, Y = (0,), (1,)
+DATA_BOUNDS = {'xy':         ((X,), (Y,)),
+               'bar':        ((X,), (Y,)),
+               'xyz':        ((X,), (Y,)),
+               'xysize':     ((X,), (Y,)),
+               'xycolor':    ((X,), (Y,)),
+               'xydx':       ((X, (0, -1, 2), (0, 1, 2)), (Y,)),
+               'xydy':       ((X,), (Y, (1, -1, 2), (1, 1, 2))),
+               'xydxdy':     ((X, (0, -1, 2), (0, 1, 2)),
+                              (Y, (1, -1, 3), (1, 1, 3))),
+               'xydxdx':     ((X, (0, 1, 2), (0, -1, 3)), (Y,)),
+               'xydydy':     ((X,), (Y, (1, 1, 2), (1, -1, 3))),
+               'xydxdxdydy': ((X, (0, 1, 2), (0, -1, 3)),
+                              (Y, (1, 1, 4), (1, -1, 5))),
+               'bardy':      ((X,), (Y, (1, 1, 2), (1, -1, 2))),
+               'bardydy':    ((X,), (Y, (1, 1, 2), (1, -1, 3))),
+               'xyhilo':     ((X,), (Y, (2,), (3,), (4,))),
+               'xyboxplot':  ((X,), (Y, (2,), (3,), (4,))),
+               'xyvmap':     ((X, (0, 1, 2)), (Y, (1, 1, 3))),
+#                'xyr':        (((0, -1, 2), (0, 1, 2)), # xmgrace does not
+#                               ((1, -1, 2), (1, 1, 2))), # support
+               }
+del X, Y
+
+def _evaluate(data, expression):
+    """Return the values of a bounds expression for all rows of data.  For
+    numpy arrays this is an array, otherwise it is an iterator that walks
+    the rows without building a list."""
+    if is_array(data):
+        if len(expression) == 1:
+            return data[:, expression[0]]
+        i, sign, j = expression
+        if sign > 0:
+            return data[:, i] + data[:, j]
+        return data[:, i] - data[:, j]
+    if len(expression) == 1:
+        return imap(itemgetter(expression[0]), data)
+    i, sign, j = expression
+    if sign > 0:
+        return imap(add, imap(itemgetter(i), data), imap(itemgetter(j), data))
+    return imap(sub, imap(itemgetter(i), data), imap(itemgetter(j), data))
+
+def _expressions(dataType):
+    """Return the x and y bounds expressions of a type of DataSet."""
+    try:
+        return DATA_BOUNDS[dataType]
+    except KeyError:
+        message = """
+Can not find limits of DataSet with type %s
+"""%dataType
+        raise TypeError, message
+
+def _range(data, expressions):
+    """Return the minimum and maximum over several bounds expressions, in
+    one pass over the data per expression and per reduction."""
+    lows, highs = [], []
+    for expression in expressions:
+        if is_array(data):
+            values = _evaluate(data, expression)
+            lows.append(values.min().item())
+            highs.append(values.max().item())
+        else:
+            lows.append(min(_evaluate(data, expression)))
+            highs.append(max(_evaluate(data, expression)))
+    return min(lows), max(highs)
+
+def _extents(data, expressions):
+    """Return the lowest and the highest value of several bounds
+    expressions for each row of data, (lows, highs)."""
+    values = [_evaluate(data, expression) for expression in expressions]
+    if len(values) == 1:
+        if is_array(data):
+            return values[0], values[0]
+        values = list(values[0])
+        return values, values
+    if is_array(data):
+        return reduce(numpy.minimum, values), reduce(numpy.maximum, values)
+    rows = zip(*values)
+    return map(min, rows), map(max, rows)
+
+def _check_array_columns(data, dataType):
+    """Throw an error if data is an array that does not have the right shape
+    for a DataSet of type dataType (None if it is not known yet)."""
+    if not is_array(data):
+        return
+    if data.ndim != 2:
+        message = 'data array must be 2-D (got %i-D instead)' % data.ndim
+        raise ValueError(message)
+    nColumns = DATA_COLUMNS.get(dataType)
+    if nColumns is not None and len(data) and data.shape[1] < nColumns:
+        message = "data array for type '%s' needs %i columns " \
+                  "(got %i instead)" % (dataType, nColumns, data.shape[1])
+        raise ValueError(message)
+
+def _check_data(obj, key, value):
+    """The data of a DataSet must fit its type (see _check_array_columns)."""
+    _check_array_columns(value, obj.__dict__.get('type'))
+
+def _check_type_columns(obj, key, value):
+    """The type of a DataSet must fit its data, unless the data was read
+    lazily and is not used yet."""
+    if 'data' in obj.__dict__:
+        _check_array_columns(obj.__dict__['data'], value)
+
+def _is_frozen(data):
+    """Return True if the rows of data can not be changed in place: a tuple
+    of tuples, or an array that can not be written to, and neither can the
+    arrays it is a view of."""
+    if isinstance(data, tuple):
+        return all(type(row) is tuple for row in data)
+    if not is_array(data):
+        return False
+    while is_array(data):
+        if data.flags.writeable:
+            return False
+        data = data.base
+    return data is None or isinstance(data, str)
+
+# the limits of data that can be changed in place are only kept while a
+# method that asks for them many times runs (see keeping_bounds).  the
+# number of such methods that are running, and the number of times that
+# the outermost one ended, which tells the limits of the runs apart.
+_bounds_state = [0, 0]
+
+def keeping_bounds(method):
+    """Decorate a method (such as Graph.autoscale) so that the limits of
+    each DataSet are found at most once while it runs, even if the data of
+    the set can be changed in place."""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        _bounds_state[0] += 1
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _bounds_state[0] -= 1
+            if not _bounds_state[0]:
+                _bounds_state[1] += 1
+    return wrapper
+
+def _is_positive(value):
+    return value > 0
+
+def _smallest_positive(data, expressions):
+    """Return the smallest positive value over several bounds expressions
+    (or None if there are no positive values)."""
+    result = None
+    for expression in expressions:
+        values = _evaluate(data, expression)
+        if is_array(data):
+            values = values[values > 0]
+            smallest = values.min().item() if len(values) else None
+        else:
+            try:
+                smallest = min(ifilter(_is_positive, values))
+            except ValueError:
+                smallest = None
+        if smallest is not None and (result is None or smallest < result):
+            result = smallest
+    return result
+
 class Symbol(GraceObject):
     _staticType = 'Symbol'
+
+    # check type of Symbol specific attribute
+    _attribute_rules = (
+        ('skip', is_type(int)),
+        ('char', is_type(int), in_range(0, 128, includeMax=False)),
+        ('shape', is_type(int), in_range(0, 12, includeMax=False)),
+        )
+
     def __init__(self, parent,
                  shape = 1,
                  size = 0.5,
@@ -56,20 +287,6 @@ class Symbol(GraceObject):
                  ):
         GraceObject.__init__(self, parent, locals())
 
-    def __setattr__(self, key, value):
-
-        # check type of Symbol specific attribute
-        if key == 'skip':
-            self._check_type(int, key, value)
-        elif key == 'char':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 128, includeMax=False)
-        elif key == 'shape':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 12, includeMax=False)
-
-        GraceObject.__setattr__(self, key, value)
-
     def __str__(self):
         self.index = self.parent.index
         return \
@@ -87,6 +304,12 @@ class Symbol(GraceObject):
 
 class Line(GraceObject):
     _staticType = 'Line'
+
+    # check Line specific attributes
+    _attribute_rules = (
+        ('type', is_type(int), in_range(0, 6, includeMax=False)),
+        )
+
     def __init__(self, parent,
                  type = 1,
                  linestyle = 1,
@@ -97,15 +320,6 @@ class Line(GraceObject):
                  ):
         GraceObject.__init__(self, parent, locals())
 
-    def __setattr__(self, key, value):
-
-        # check Line specific attributes
-        if key == 'type':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 6, includeMax=False)
-            
-        GraceObject.__setattr__(self, key, value)
-
     def __str__(self):
         self.index = self.parent.index
         return \
@@ -117,6 +331,12 @@ class Line(GraceObject):
     
 class Baseline(GraceObject):
     _staticType = 'BaseLine'
+
+    # check BaseLine specific attributes
+    _attribute_rules = (
+        ('type', is_type(int), in_range(0, 6, includeMax=False)),
+        )
+
     def __init__(self, parent,
                  type = 0,
                  onoff="off",
@@ -124,15 +344,6 @@ class Baseline(GraceObject):
                  ):
         GraceObject.__init__(self, parent, locals())
 
-    def __setattr__(self, key, value):
-
-        # check BaseLine specific attributes
-        if key == 'type':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 6, includeMax=False)
-            
-        GraceObject.__setattr__(self, key, value)
-
     def __str__(self):
         self.index = self.parent.index
         return \
@@ -141,6 +352,13 @@ class Baseline(GraceObject):
 
 class Fill(GraceObject):
     _staticType = 'Fill'
+
+    # check Fill specific attributes
+    _attribute_rules = (
+        ('type', is_type(int), in_range(0, 2)),
+        ('rule', is_type(int), in_range(0, 1)),
+        )
+
     def __init__(self, parent,
                  type = 0,
                  rule = 0,
@@ -150,18 +368,6 @@ class Fill(GraceObject):
                  ):
         GraceObject.__init__(self, parent, locals())
 
-    def __setattr__(self, key, value):
-
-        # check Fill specific attributes
-        if key == 'type':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 2)
-        elif key == 'rule':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 1)
-            
-        GraceObject.__setattr__(self, key, value)
-        
     def __str__(self):
         self.index = self.parent.index
         return \
@@ -172,6 +378,12 @@ class Fill(GraceObject):
 
 class AnnotatedValue(GraceObject):
     _staticType = 'AnnotatedValue'
+
+    # check AnnotatedValue specific attributes
+    _attribute_rules = (
+        ('type', is_type(int), in_range(0, 6, includeMax=False)),
+        )
+
     def __init__(self, parent,
                  onoff = "off",
                  type = 4,
@@ -189,15 +401,6 @@ class AnnotatedValue(GraceObject):
         GraceObject.__init__(self, parent, locals())
         self._formatting_template = {'offset': '%.20f, %.20f'}
 
-    def __setattr__(self, key, value):
-
-        # check AnnotatedValue specific attributes
-        if key == 'type':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 6, includeMax=False)
-            
-        GraceObject.__setattr__(self, key, value)
-        
     def __str__(self):
         self.index = self.parent.index
         return \
@@ -215,6 +418,13 @@ class AnnotatedValue(GraceObject):
                
 class ErrorBar(GraceObject):
     _staticType = 'ErrorBar'
+
+    # check type of ErrorBar specific attribute
+    _attribute_rules = (
+        ('riser_clip', is_type(str), is_member(('on', 'off'))),
+        ('riser_clip_length', is_type((float, int)), in_range(0, None)),
+        )
+
     def __init__(self, parent,
                  onoff = "on",
                  place = "both",
@@ -231,18 +441,6 @@ class ErrorBar(GraceObject):
                  ):
         GraceObject.__init__(self, parent, locals())
 
-    def __setattr__(self, key, value):
-
-        # check type of ErrorBar specific attribute
-        if key == 'riser_clip':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('on', 'off'))
-        elif key == 'riser_clip_length':
-            self._check_type((float, int), key, value)
-            self._check_range(key, value, 0, None)
-
-        GraceObject.__setattr__(self, key, value)
-        
     def __str__(self):
         self.index = self.parent.index
         return \
@@ -258,47 +456,134 @@ class ErrorBar(GraceObject):
 @    s%(index)s errorbar riser clip %(riser_clip)s
 @    s%(index)s errorbar riser clip length %(riser_clip_length)s""" % self
 
+def _check_precision(obj, key, value):
+    field_format(value)
+
+class _LazyStyle(object):
+    """A style child of a DataSet (symbol, line, ...) that is only made the
+    first time it is used.  Until then, the DataSet writes the lines of a
+    style with the default values (see DataSet._default_style), so that a
+    graph with many plain datasets does not carry six objects per set."""
+    def __init__(self, name, cls):
+        self.name = name
+        self.cls = cls
+
+    def __get__(self, dataset, owner):
+        if dataset is None:
+            return self
+        style = self.cls(dataset)
+        dataset.__dict__[self.name] = style
+        return style
+
 class DataSet(GraceObject):
     _staticType = 'DataSet'
+
+    # check DataSet specific attributes
+    _attribute_rules = (
+        ('type', is_type(str), is_member(DATA_TYPES), _check_type_columns),
+        ('data', _check_data),
+        ('dropline', is_type(str), is_member(('on', 'off'))),
+        ('comment', is_type(str)),
+        ('legend', is_type(str)),
+        ('precision', _check_precision),
+        ('decimate', is_member(DECIMATE_METHODS)),
+        ('clip_to_world', is_member((None, False, True))),
+        )
+
+    # the style children, in the order they are written
+    baseline = _LazyStyle('baseline', Baseline)
+    symbol = _LazyStyle('symbol', Symbol)
+    line = _LazyStyle('line', Line)
+    fill = _LazyStyle('fill', Fill)
+    avalue = _LazyStyle('avalue', AnnotatedValue)
+    errorbar = _LazyStyle('errorbar', ErrorBar)
+    _styles = ('baseline', 'symbol', 'line', 'fill', 'avalue', 'errorbar')
+
+    # the index of a set that was moved in its graph is only given again
+    # when it is next used (see Graph._number_datasets)
+    def _get_index(self):
+        graph = self.__dict__.get('parent')
+        if graph is not None and graph.__dict__.get('_renumber'):
+            graph._number_datasets()
+        return self.__dict__['index']
+
+    def _set_index(self, index):
+        self.__dict__['index'] = index
+
+    index = property(_get_index, _set_index)
+
     def __init__(self, parent, data, index,
                  type='xy',
                  hidden='false',
                  dropline='off',
                  comment='',
                  legend='',
+                 precision=None,
+                 decimate=None,
+                 clip_to_world=None,
                  **kwargs
                  ):
         GraceObject.__init__(self, parent, locals())
-        self.baseline = Baseline(self)
-        self.symbol = Symbol(self)
-        self.line = Line(self)
-        self.fill = Fill(self)
-        self.avalue = AnnotatedValue(self)
-        self.errorbar = ErrorBar(self)
-
-    def __setattr__(self, key, value):
-
-        DATA_TYPES = ('xy', 'xydx', 'xydy', 'xydxdy', 'xydydy', 
-                      'xydxdx', 'xydxdxdydy', 'bar', 'bardy', 'bardydy',
-                      'xyhilo', 'xyz', 
-#                       'xyr', # apparently unsupported
-                      'xysize', 'xycolor',
-#                       'xycolpat', # xmgrace does not support
-                      'xyvmap', 'xyboxplot')
-
-        # check DataSet specific attributes
-        if key == 'type':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, DATA_TYPES)
-        elif key == 'dropline':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('on', 'off'))
-        elif key == 'comment':
-            self._check_type(str, key, value)
-        elif key == 'legend':
-            self._check_type(str, key, value)
-            
-        GraceObject.__setattr__(self, key, value)
+        self._check_columns()
+
+    def __getattr__(self, key):
+
+        # the data of a set that was read lazily from a file (see
+        # reader.py) is only parsed when it is first used
+        if key == 'data':
+            block = self.__dict__.get('_data_block')
+            if block is not None:
+                self.data = block.load()
+                return self.data
+        raise AttributeError(key)
+
+    def _set_data_block(self, block):
+        """Take the data from a block of a file (see reader.MappedBlock)
+        that is parsed on first use."""
+        self.__dict__.pop('data', None)
+        self.__dict__['_data_block'] = block
+
+    def _unused_data_block(self):
+        """Return the block the data was read from lazily if the data has
+        not been used or replaced since, and None otherwise."""
+        if 'data' in self.__dict__:
+            return None
+        return self.__dict__.get('_data_block')
+
+    def __getitem__(self, key):
+
+        # a style child that was never used is written with default values
+        if key in self._styles and key not in self.__dict__:
+            return self._default_style(key)
+        return GraceObject.__getitem__(self, key)
+
+    def _default_style(self, name):
+        """Return the lines of style child name with its default values,
+        without making the child.  The lines after the '@    sN ' prefix
+        are stored in the root for each style, for as long as the root keeps
+        the same colors and fonts."""
+        root = self.root
+        defaults = root.__dict__.setdefault('_default_styles', {})
+        prefix = '@    s%s ' % self.index
+        try:
+            colors, fonts, lines = defaults[name]
+        except KeyError:
+            colors = None
+        if colors is not root.colors or fonts is not root.fonts:
+
+            # make a throwaway child to write the default lines with
+            style = getattr(self.__class__, name).cls(self)
+            del self._namedChildren[style._staticType]
+            lines = [line[len(prefix):] for line in str(style).split('\n')]
+            defaults[name] = (root.colors, root.fonts, lines)
+        return '\n'.join(prefix + line for line in lines)
+
+    def children(self):
+        """Make all of the style children before listing them, since the
+        caller may change them."""
+        for name in self._styles:
+            getattr(self, name)
+        return GraceObject.children(self)
 
     def __str__(self):
         return \
@@ -314,133 +599,162 @@ class DataSet(GraceObject):
 @    s%(index)s comment "%(comment)s"
 @    s%(index)s legend "%(legend)s" """ % self
 
+    def columns(self):
+        """Return the data as a list of columns.  If the data is a numpy
+        array, the columns are views into the array (no copy is made)."""
+        if is_array(self.data):
+            return [self.data[:, i] for i in range(self.data.shape[1])]
+        return zip(*self.data)
+
+    def _check_columns(self):
+        """Throw an error if the data is an array that does not have the
+        right shape for the type of the DataSet."""
+        _check_array_columns(self.data, self.type)
+
     def data_bounds(self):
+        """Return all of the values that span the extent of the data along x
+        and y (for example x, x - dx and x + dx for an 'xydx' set).  Use
+        limits and smallest_positive to reduce these without building the
+        lists."""
         x, y = [], []
-        if self.data:
-            if self.type=="xy" or self.type=="bar":
-                columns = zip(*self.data)
-                x, y = columns[:2]
-            elif self.type=="xydx":
-                for datum in self.data:
-                    x.extend([datum[0],
-                              datum[0]-datum[2],
-                              datum[0]+datum[2]])
-                    y.append(datum[1])
-            elif self.type=="xydy":
-                for datum in self.data:
-                    x.append(datum[0])
-                    y.extend([datum[1],
-                              datum[1]-datum[2],
-                              datum[1]+datum[2]])
-            elif self.type=="xydxdy":
-                for datum in self.data:
-                    x.extend([datum[0],
-                              datum[0]-datum[2],
-                              datum[0]+datum[2]])
-                    y.extend([datum[1],
-                              datum[1]-datum[3],
-                              datum[1]+datum[3]])
-            elif self.type=="xydxdx":
-                for datum in self.data:
-                    x.extend([datum[0],
-                              datum[0]+datum[2],
-                              datum[0]-datum[3]])
-                    y.append(datum[1])
-            elif self.type=="xydydy":
-                for datum in self.data:
-                    x.append(datum[0])
-                    y.extend([datum[1],
-                              datum[1]+datum[2],
-                              datum[1]-datum[3]])
-            elif self.type=="xydxdxdydy":
-                for datum in self.data:
-                    x.extend([datum[0],
-                              datum[0]+datum[2],
-                              datum[0]-datum[3]])
-                    y.extend([datum[1],
-                              datum[1]+datum[4],
-                              datum[1]-datum[5]])
-            elif self.type=="bardy":
-                for datum in self.data:
-                    x.append(datum[0])
-                    y.extend([datum[1],
-                              datum[1]+datum[2],
-                              datum[1]-datum[2]])
-            elif self.type=="bardydy":
-                for datum in self.data:
-                    x.append(datum[0])
-                    y.extend([datum[1],
-                              datum[1]+datum[2],
-                              datum[1]-datum[3]])
-            elif self.type=="xyhilo":
-                columns = zip(*self.data)
-                x = columns[0]
-                y = columns[1] + columns[2] + columns[3] + columns[4]
-            elif self.type=="xyz":
-                columns = zip(*self.data)
-                x, y = columns[:2]
-#             elif self.type=="xyr": # xmgrace does not support
-#                 for datum in self.data:
-#                     x.extend([datum[0]-datum[2],
-#                               datum[0]+datum[2]])
-#                     y.extend([datum[1]-datum[2],
-#                               datum[1]+datum[2]])
-            elif self.type=="xysize":
-                columns = zip(*self.data)
-                x, y = columns[:2]
-            elif self.type=="xycolor":
-                columns = zip(*self.data)
-                x, y = columns[:2]
-#             elif self.type=="xycolpat": # xmgrace does not support
-#                 pass
-            elif self.type=="xyvmap":
-                for datum in self.data:
-                    x.extend([datum[0],
-                              datum[0]+datum[2]])
-                    y.extend([datum[1],
-                              datum[1]+datum[3]])
-            elif self.type=='xyboxplot':
-                col = zip(*self.data)
-                x = col[0]
-                y = col[1] + col[2] + col[3] + col[4]
+        if len(self.data):
+            xExpressions, yExpressions = _expressions(self.type)
+            x = [_evaluate(self.data, e) for e in xExpressions]
+            y = [_evaluate(self.data, e) for e in yExpressions]
+            if is_array(self.data):
+                x, y = numpy.concatenate(x), numpy.concatenate(y)
             else:
-                message = """
-Can not find limits of DataSet with type %s
-"""%self.type
-                raise TypeError, message
+                x, y = [i for c in x for i in c], [i for c in y for i in c]
         return x,y
 
+    def _bounds(self):
+        """Return the limits, (xMin, yMin, xMax, yMax), and the smallest
+        positive values, (x, y), of the data.  They are found once and kept
+        until the data is replaced, its length changes or the type changes,
+        if the data can not be changed in place (see _is_frozen).  The
+        limits of other data are only kept while an autoscale runs (see
+        keeping_bounds)."""
+        data = self.data
+        stored = self.__dict__.get('_storedBounds')
+        if stored is not None and stored[0] is data and \
+                stored[1] == len(data) and stored[2] == self.type:
+            generation = stored[3]
+            if generation is None:
+                if not is_array(data) or _is_frozen(data):
+                    return stored[4]
+            elif _bounds_state[0] and generation == _bounds_state[1]:
+                return stored[4]
+        xExpressions, yExpressions = _expressions(self.type)
+        xMin, xMax = _range(data, xExpressions)
+        yMin, yMax = _range(data, yExpressions)
+        bounds = ((xMin, yMin, xMax, yMax),
+                  (_smallest_positive(data, xExpressions),
+                   _smallest_positive(data, yExpressions)))
+        if _is_frozen(data):
+            generation = None
+        elif _bounds_state[0]:
+            generation = _bounds_state[1]
+        else:
+            self.__dict__.pop('_storedBounds', None)
+            return bounds
+        self.__dict__['_storedBounds'] = (data, len(data), self.type,
+                                          generation, bounds)
+        return bounds
+
+    def data_changed(self):
+        """Forget the limits of the data, after rows of the data were
+        changed in place while limits are kept (see keeping_bounds)."""
+        self.__dict__.pop('_storedBounds', None)
+
     def limits(self,only_visible=True):
-        if self.data:
+        if len(self.data):
             if ((only_visible and self.hidden=="false") 
                 or not only_visible):
-                x, y = self.data_bounds()
-                return min(x), min(y), max(x), max(y)
+                return self._bounds()[0]
         return None,None,None,None
 
     def smallest_positive(self,only_visible=True):
-        if self.data:
+        if len(self.data):
             if ((only_visible and self.hidden=="false") 
                 or not only_visible):
-                x, y = self.data_bounds()
-                x = [i for i in x if i > 0]
-                y = [i for i in y if i > 0]
-                if x:
-                    xMin = min(x)
-                else:
-                    xMin = None
-                if y:
-                    yMin = min(y)
-                else:
-                    yMin = None
-                return xMin, yMin
+                return self._bounds()[1]
         return None,None
 
-    def _repr_data(self):
+    def _decimation(self):
+        """Return the method and the budget of points that the data is
+        decimated with when it is written, or None if it is written as it
+        is."""
+        method = self.decimate
+        if method is None:
+            method = getattr(self.parent, 'decimate', None)
+        if not method:
+            return None
+        return method, point_budget(self.parent)
+
+    def _clipping(self):
+        """Return the world and the line type that the data is clipped with
+        when it is written, or None if it is written as it is.  Sets that
+        are filled or have droplines are not clipped, since those reach
+        into the world from rows beyond it, and neither are the sets of
+        stacked graphs and of graphs that are not XY."""
+        clip = self.clip_to_world
+        graph = self.parent
+        if clip is None:
+            clip = getattr(graph, 'clip_to_world', False)
+
+        # the fill and line are not made just to be looked at (see
+        # _LazyStyle); until they are, they have the types of Fill and Line
+        fill = self.__dict__.get('fill')
+        line = self.__dict__.get('line')
+        if not clip or graph.type not in CLIP_GRAPH_TYPES or \
+                graph.stacked == 'true' or self.dropline == 'on' or \
+                (fill is not None and fill.type != 0):
+            return None
+        return graph.get_world(), line.type if line is not None else 1
+
+    def _selection(self):
+        """Return how the rows that are written are picked from the data:
+        (clipping, decimation), see _clipping and _decimation."""
+        return self._clipping(), self._decimation()
+
+    def _select_rows(self, data, selection):
+        """Return the rows of data that are written for selection (the
+        rows are first clipped to the world, then decimated)."""
+        clipping, decimation = selection
+        if clipping is not None and len(data):
+            xExpressions, yExpressions = _expressions(self.type)
+            yExtents = None
+            if self.type not in UNBOUNDED_Y_TYPES:
+                yExtents = _extents(data, yExpressions)
+            data = clip_rows(data, _extents(data, xExpressions), yExtents,
+                             *clipping)
+        if decimation is not None:
+            data = decimate(data, *decimation)
+        return data
+
+    def _iter_data(self, chunk_size=DATA_CHUNK_SIZE):
+        """Iterate over the string representation of the data in blocks of
+        at most chunk_size rows, formatted with the precision of the set.
+        The last block is always the '&' that ends the data of the set in a
+        Grace file.  Data that was never used since it was read lazily from
+        a file is copied from the file as it is.  If the set (or its graph)
+        clips to the world or decimates, only the rows that can be seen are
+        written (see clip.py and decimate.py); the data itself does not
+        change."""
+        selection = self._selection()
+        block = self._unused_data_block()
+        if block is not None and self.precision is None and \
+                selection == (None, None):
+            for chunk in block.iter_chunks():
+                yield chunk
+            yield '&'
+            return
         if self.type[:2]=='xy' or self.type[:3] =='bar': #any xy or bar type
-            l=[' '.join(map(str,self.data[i])) for i in range(len(self.data))]
-        else:
-            l = []
-        l.append('&')
-        return '\n'.join(l)
+            formatter = get_formatter(self.precision)
+            data = self._select_rows(self.data, selection)
+            for start in xrange(0, len(data), chunk_size):
+                yield formatter.format_block(data[start:start + chunk_size])
+        yield '&'
 
+    def _repr_data(self):
+        return '\n'.join(self._iter_data())
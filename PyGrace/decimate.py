@@ -0,0 +1,167 @@
+"""Decimation of the data of a DataSet at the time it is written.
+
+A set with many more points than the output has dots across the view of
+its graph is written with only the rows that can be seen:
+
+    'minmax'  the first and last row, and the rows with the smallest and
+              largest y in each of about budget / 2 runs of rows, so that
+              every spike stays (the envelope of the line is exact)
+    'lttb'    Largest-Triangle-Three-Buckets: one row per run of rows, the
+              one that makes the largest triangle with the row kept before
+              it and the average of the next run, which follows the shape
+              of the line with fewer points
+
+Both expect the rows to be sorted by x (as for a time series).  The rows
+that are kept are whole rows, so error columns and the like stay with
+their points.  With numpy, the data can be an array and the work is done
+with array operations; otherwise it is a list of rows.
+
+The budget of points for a graph is found from the width of its view and
+the size of the page (see point_budget).
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# the resolution (dots per inch) that decimated data must look the same at,
+# and the number of points kept per dot across the width of the view
+DECIMATE_DPI = 300
+POINTS_PER_DOT = 2
+
+def _is_array(data):
+    return numpy is not None and isinstance(data, numpy.ndarray)
+
+def point_budget(graph, dpi=DECIMATE_DPI):
+    """Return the number of points that a set in graph needs at most to
+    look the same at dpi: two per dot across the width of the view.  A unit
+    of the view is the shorter side of the page, and the page size is in
+    points (1/72 inch)."""
+    grace = graph.root
+    width = (graph.view.xmax - graph.view.xmin) * \
+        min(grace.width, grace.height) / 72.0
+    return max(int(abs(width) * dpi) * POINTS_PER_DOT, 4)
+
+def _runs(n, nRuns):
+    """Return the start of each of nRuns runs of about equal length of n
+    rows, and n."""
+    return [i * n // nRuns for i in xrange(nRuns)] + [n]
+
+def minmax(data, budget):
+    """Return the rows of data with the smallest and largest y of each of
+    about budget / 2 runs of rows, and the first and last row, in order.
+
+    All runs but the last have the same length, so that with numpy they
+    can be viewed as the rows of a 2-D array without a copy.  The last run
+    holds the rows that are left over (if any)."""
+    n = len(data)
+    nRuns = max((budget - 4) // 2, 1)
+    if n <= budget:
+        return data
+    if _is_array(data):
+        return data[_minmax_indices_array(data[:, 1], nRuns)]
+
+    keep = set((0, n - 1))
+    y = [row[1] for row in data]
+    size = n // nRuns
+    starts = range(0, size * nRuns, size) + [size * nRuns, n]
+    for start, end in zip(starts[:-1], starts[1:]):
+        run = xrange(start, end)
+        if not run:
+            continue
+        keep.add(min(run, key=y.__getitem__))
+        keep.add(max(run, key=y.__getitem__))
+    return [data[i] for i in sorted(keep)]
+
+def _minmax_indices_array(y, nRuns):
+    """The indices of the rows that minmax keeps, for a column of y."""
+    n = len(y)
+    size = n // nRuns
+    body = y[:size * nRuns].reshape(nRuns, size)
+    offsets = numpy.arange(nRuns) * size
+    indices = [numpy.array([0, n - 1]),
+               offsets + body.argmin(axis=1),
+               offsets + body.argmax(axis=1)]
+    if size * nRuns < n:
+        tail = y[size * nRuns:]
+        indices.append(numpy.array([size * nRuns + tail.argmin(),
+                                    size * nRuns + tail.argmax()]))
+    return numpy.unique(numpy.concatenate(indices))
+
+def lttb(data, budget):
+    """Return budget rows of data picked with Largest-Triangle-Three-
+    Buckets (always with the first and the last row), in order."""
+    n = len(data)
+    if n <= budget or budget < 3:
+        return data
+    if _is_array(data):
+        return data[_lttb_indices_array(data[:, 0], data[:, 1], budget)]
+
+    x = [row[0] for row in data]
+    y = [row[1] for row in data]
+    starts = _runs(n - 2, budget - 2)
+    keep = [0]
+    a = 0
+    for i in xrange(budget - 2):
+        start, end = starts[i] + 1, starts[i + 1] + 1
+
+        # the average of the next run (or the last row)
+        if i < budget - 3:
+            nextStart, nextEnd = end, starts[i + 2] + 1
+            count = float(nextEnd - nextStart)
+            xAverage = sum(x[nextStart:nextEnd]) / count
+            yAverage = sum(y[nextStart:nextEnd]) / count
+        else:
+            xAverage, yAverage = x[-1], y[-1]
+
+        # twice the area of the triangle made with each row of this run
+        xa, ya = x[a], y[a]
+        dx, dy = xa - xAverage, yAverage - ya
+        best, a = -1.0, start
+        for j in xrange(start, end):
+            area = abs(dx * (y[j] - ya) - (xa - x[j]) * dy)
+            if area > best:
+                best, a = area, j
+        keep.append(a)
+    keep.append(n - 1)
+    return [data[i] for i in keep]
+
+def _lttb_indices_array(x, y, budget):
+    """The indices of the rows that lttb keeps, for columns x and y."""
+    n = len(x)
+    starts = numpy.array(_runs(n - 2, budget - 2)) + 1
+
+    # the average of each run, and the last row after the last run
+    sums = numpy.add.reduceat
+    counts = numpy.diff(starts).astype(float)
+    xAverages = numpy.append(sums(x[:-1], starts[:-1]) / counts, x[-1])
+    yAverages = numpy.append(sums(y[:-1], starts[:-1]) / counts, y[-1])
+
+    # the row picked in each run depends on the row picked before it, so
+    # the runs are gone through in turn (each one with array operations)
+    keep = numpy.empty(budget, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in xrange(budget - 2):
+        start, end = starts[i], starts[i + 1]
+        xa, ya = x[a], y[a]
+        area = numpy.abs((xa - xAverages[i + 1]) * (y[start:end] - ya) -
+                         (xa - x[start:end]) * (yAverages[i + 1] - ya))
+        a = start + area.argmax()
+        keep[i + 1] = a
+    return keep
+
+DECIMATORS = {'minmax': minmax,
+              'lttb': lttb,
+              }
+
+def decimate(data, method, budget):
+    """Return the rows of data that method ('minmax' or 'lttb') keeps for
+    a budget of points."""
+    try:
+        decimator = DECIMATORS[method]
+    except KeyError:
+        message = "decimate must be one of %s (got %r instead)" % \
+                  (sorted(DECIMATORS), method)
+        raise ValueError(message)
+    return decimator(data, budget)
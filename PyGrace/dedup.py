@@ -0,0 +1,161 @@
+"""Writing the data that several sets of a project share only once (see
+Grace.write_agr with data_mode='dedup').
+
+The sets are written in order.  A set whose data is the same as that of a
+set before it (the same object, or the same contents) is not written again,
+but copied from that set, after which its own settings are written again
+(since xmgrace copies the settings along with the data):
+
+    @copy G0.S0 to G1.S0
+    @with g1
+    @    s0 hidden false
+    ...
+
+The contents of an array are compared by a hash of its bytes, and those of
+a list (or of data read lazily from a file) by a hash of the text that is
+written, which is spooled to a temporary file until it is written (see
+DEDUP_SPOOL_BYTES).  The hash also covers the type, the precision and how
+the rows are picked (see DataSet._selection), so that the copy writes the
+same rows.  Sets with fewer than min_rows rows are always written, since
+their settings would take about as much room as their data.
+"""
+import hashlib
+import tempfile
+
+from sidecar import _source
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# sets with fewer rows than this are written even if their data is shared
+DEDUP_MIN_ROWS = 100
+
+# the text of the data of a list that was hashed is held in memory up to
+# this many bytes, and in a temporary file beyond that
+DEDUP_SPOOL_BYTES = 1 << 22
+
+def _rows(source):
+    try:
+        return len(source)
+    except TypeError:
+        return source.mapped[source.start:source.end].count('\n') + 1
+
+class DataDedup(object):
+    """Writes the data of the sets of a project, copying data that was
+    written before instead of writing it again.
+
+    blocks      the number of data blocks that were written
+    copies      the number of sets that were copied instead
+    identical   the number of those with the same data object as before
+    equal       the number of those with the same contents as before
+    rows_saved  the number of rows that were not written
+    bytes_saved the number of bytes that were not written (the data that
+                was not written less the lines that copy it)
+    """
+    def __init__(self, min_rows=DEDUP_MIN_ROWS):
+        self.min_rows = min_rows
+        self.blocks = 0
+        self.copies = 0
+        self.identical = 0
+        self.equal = 0
+        self.rows_saved = 0
+        self.bytes_saved = 0
+        self._byIdentity = {}
+        self._byContents = {}
+
+    def __repr__(self):
+        return '<DataDedup: %i blocks, %i copies (%i identical, %i equal), ' \
+               '%i rows and %i bytes saved>' % \
+               (self.blocks, self.copies, self.identical, self.equal,
+                self.rows_saved, self.bytes_saved)
+
+    def iter_lines(self, grace):
+        """Iterate over the chunks of the data blocks of the project (see
+        Grace.iter_lines)."""
+        for graph in grace.graphs:
+            for dataset in graph.datasets:
+                for chunk in self._dataset_lines(grace, graph, dataset):
+                    yield chunk
+
+    def _dataset_lines(self, grace, graph, dataset):
+        source = _source(dataset)
+        nRows = _rows(source)
+        if nRows < self.min_rows:
+            for chunk in grace._iter_dataset_lines(graph, dataset):
+                yield chunk
+            return
+        settings = (dataset.type, dataset.precision, dataset._selection())
+        target = (graph.index, dataset.index)
+
+        # the same data object as a set before
+        identity = (id(source), settings)
+        known = self._byIdentity.get(identity)
+        if known is not None and known[0] is source and known[1] == nRows:
+            self.identical += 1
+            for chunk in self._copy_lines(graph, dataset, known[2]):
+                yield chunk
+            return
+
+        # the same contents as a set before.  the text of a list is only
+        # known once it is formatted, so it is spooled until it is written
+        spool = None
+        if numpy is not None and isinstance(source, numpy.ndarray):
+            source = numpy.ascontiguousarray(source)
+            digest = hashlib.sha1(source)
+            digest.update(repr((source.shape, source.dtype.str)))
+        else:
+            digest = hashlib.sha1()
+            spool = tempfile.SpooledTemporaryFile(DEDUP_SPOOL_BYTES)
+            sizes = []
+            for chunk in dataset._iter_data():
+                digest.update(chunk)
+                digest.update('\n')
+                spool.write(chunk)
+                sizes.append(len(chunk))
+        digest.update(repr(settings))
+        key = digest.digest()
+        known = self._byContents.get(key)
+        if known is not None:
+            if spool is not None:
+                spool.close()
+            self.equal += 1
+            for chunk in self._copy_lines(graph, dataset, known):
+                yield chunk
+            self._byIdentity[identity] = (_source(dataset), nRows, known)
+            return
+
+        # new data
+        if spool is None:
+            chunks = dataset._iter_data()
+        else:
+            spool.seek(0)
+            chunks = (spool.read(size) for size in sizes)
+        size = 0
+        try:
+            yield '@target G%i.S%i' % target
+            yield '@type %s' % dataset.type
+            for chunk in chunks:
+                size += len(chunk) + 1
+                yield chunk
+        finally:
+            if spool is not None:
+                spool.close()
+        self.blocks += 1
+        known = (target, nRows, size)
+        self._byContents[key] = known
+        self._byIdentity[identity] = (_source(dataset), nRows, known)
+
+    def _copy_lines(self, graph, dataset, known):
+        """The lines that copy the data of the set known was written for
+        into dataset, and write the settings of dataset again."""
+        (graphIndex, datasetIndex), nRows, size = known
+        lines = ['@copy G%i.S%i to G%i.S%i' % (graphIndex, datasetIndex,
+                                               graph.index, dataset.index),
+                 '@with g%i' % graph.index,
+                 dataset._render()]
+        self.copies += 1
+        self.rows_saved += nRows
+        self.bytes_saved += size - sum(len(line) + 1 for line in lines)
+        return lines
@@ -1,4 +1,4 @@
-from base import GraceObject 
+from base import GraceObject, is_type, in_range
 
 DRAWTEXT_JUSTIFICATIONS = {"l":0,
                            "r":1,
@@ -47,7 +47,10 @@ class DrawingObject(GraceObject):
 
     def _make_header(self, objectString):
 
-        # create header with correct graph association
+        # create header with correct graph association.  (__str__ keeps it
+        # in __dict__, since setting an attribute while the object is
+        # written would throw away the stored strings, see
+        # GraceObject.invalidate)
         headerList = ['@with %s' % objectString]
         if not self._linked_graph is None:
             template = '@    %s g%%s' % objectString
@@ -92,7 +95,7 @@ class DrawBox(DrawingObject):
         self._formatting_template = {'lowleft': '%.20f, %.20f',
                                      'upright': '%.20f, %.20f'}
     def __str__(self):
-        self._header = self._make_header('box')
+        self.__dict__['_header'] = self._make_header('box')
         return \
 """%(_header)s
 @    box %(onoff)s
@@ -129,7 +132,7 @@ class DrawText(DrawingObject):
         DrawingObject.__init__(self, parent, locals())
 
     def __str__(self):
-        self._header = self._make_header('string')
+        self.__dict__['_header'] = self._make_header('string')
         return \
 """%(_header)s
 @    string %(onoff)s
@@ -149,7 +152,21 @@ class DrawText(DrawingObject):
         return self.x, self.y, self.x, self.y
 
 
+def _check_arrow_layout(obj, key, value):
+    obj._check_range(key, value[0], 0, None)
+    obj._check_range(key, value[1], 0, 1, includeMax=True)
+
 class DrawLine(DrawingObject):
+
+    # check DrawLine specific attributes
+    _attribute_rules = (
+        ('start end', is_type(tuple)),
+        ('arrow', is_type(int), in_range(0, 3)),
+        ('arrow_type', is_type(int), in_range(0, 2)),
+        ('arrow_length', is_type((float, int)), in_range(0, None)),
+        ('arrow_layout', is_type(tuple), _check_arrow_layout),
+        )
+
     def __init__(self, parent,
                  onoff = 'on',
                  loctype = 'view',
@@ -169,29 +186,8 @@ class DrawLine(DrawingObject):
                                      'end': '%.20f, %.20f',
                                      'arrow_layout': '%.20f, %.20f'}
 
-    def __setattr__(self, key, value):
-
-        # check Graph specific attributes
-        if key == 'start' or key == 'end':
-            self._check_type(tuple, key, value)
-        elif key == 'arrow':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 3)
-        elif key == 'arrow_type':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 2)
-        elif key == 'arrow_length':
-            self._check_type((float, int), key, value)
-            self._check_range(key, value, 0, None)
-        elif key == 'arrow_layout':
-            self._check_type(tuple, key, value)
-            self._check_range(key, value[0], 0, None)
-            self._check_range(key, value[1], 0, 1, includeMax=True)
-            
-        GraceObject.__setattr__(self, key, value)
-
     def __str__(self):
-        self._header = self._make_header('line')
+        self.__dict__['_header'] = self._make_header('line')
         return \
 """%(_header)s
 @    line %(onoff)s
@@ -230,7 +226,7 @@ class DrawEllipse(DrawingObject):
         self._formatting_template = {'lowleft': '%.20f, %.20f',
                                      'upright': '%.20f, %.20f'}
     def __str__(self):
-        self._header = self._make_header('ellipse')
+        self.__dict__['_header'] = self._make_header('ellipse')
         return \
 """%(_header)s
 @    ellipse %(onoff)s
@@ -252,6 +248,11 @@ class DrawEllipse(DrawingObject):
 
 
 class LabelledPoint(DrawingObject):
+
+    # the ellipse and text are children of the parent, not of self, so
+    # setting their attributes does not throw away the string of self
+    _cacheable = False
+
     def __init__(self, parent,
                  onoff = 'on',
                  loctype = 'view',
@@ -294,6 +295,11 @@ class LabelledPoint(DrawingObject):
         return self.x, self.y, self.x, self.y
 
 class MultiLegend(DrawingObject):
+
+    # the ellipse and text are children of the parent, not of self, so
+    # setting their attributes does not throw away the string of self
+    _cacheable = False
+
     def __init__(self, parent,
                  onoff = 'on',
                  loctype = 'view',
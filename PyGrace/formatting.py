@@ -0,0 +1,118 @@
+"""Fast formatting of the numeric data blocks of a Grace project.
+
+Instead of joining the string representation of every value of every row,
+a block of rows is written with a single %-format operation: the row
+template (for example '%s %s' for an 'xy' set) is repeated once per row
+and applied to the flattened values of the block.  The templates of the
+last few block shapes are kept (the full chunks of a set all have the same
+shape), and reused for every block of that shape.
+
+The precision of the output is selected with one of
+
+    None      str() of each value (the default, same output as always)
+    'repr'    repr() of each value (round-trips floats exactly)
+    n         an integer number of significant digits ('%.ng')
+    '%...'    a printf-style format for a single number (e.g. '%.4f'),
+              with one of the conversions e, f or g (upper case too)
+"""
+
+import re
+from itertools import chain, imap
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# number of block templates kept by each DataFormatter.  a block template
+# can be as long as DATA_CHUNK_SIZE rows, and the last block of every set
+# has a shape of its own, so only the most recently used ones are kept
+BLOCK_TEMPLATES_KEPT = 4
+
+# a printf-style format of exactly one floating point number
+_NUMBER_FORMAT = re.compile(r'%[-+ #0]*\d*(\.\d+)?[eEfFgG]\Z')
+
+def field_format(precision):
+    """Return the printf-style format of a single value for the given
+    precision."""
+    if precision is None:
+        return '%s'
+    elif precision == 'repr':
+        return '%r'
+    elif isinstance(precision, (int, long)) and \
+            not isinstance(precision, bool):
+        if precision < 1:
+            message = 'precision must be at least 1 (got %i)' % precision
+            raise ValueError(message)
+        return '%%.%ig' % precision
+    elif isinstance(precision, str) and _NUMBER_FORMAT.match(precision):
+        return precision
+    message = "precision must be None, 'repr', an integer or a " \
+              "format like '%%.4f' (got %r instead)" % (precision,)
+    raise ValueError(message)
+
+class DataFormatter(object):
+    """Formats blocks of data rows into text, one row per line and the
+    values of a row separated by single spaces."""
+    def __init__(self, precision=None):
+        self.precision = precision
+        self.field = field_format(precision)
+
+        # row and block templates, stored by number of columns and by
+        # (number of rows, number of columns), the most recently used block
+        # template last
+        self._rowTemplates = {}
+        self._blockTemplates = OrderedDict()
+
+    def _row_template(self, nColumns):
+        try:
+            return self._rowTemplates[nColumns]
+        except KeyError:
+            template = ' '.join([self.field] * nColumns)
+            self._rowTemplates[nColumns] = template
+            return template
+
+    def _block_template(self, nRows, nColumns):
+        templates = self._blockTemplates
+        try:
+            template = templates.pop((nRows, nColumns))
+        except KeyError:
+            template = '\n'.join([self._row_template(nColumns)] * nRows)
+            if len(templates) >= BLOCK_TEMPLATES_KEPT:
+                templates.popitem(last=False)
+        templates[(nRows, nColumns)] = template
+        return template
+
+    def format_block(self, rows):
+        """Return the text of a block of rows (a list of tuples or a 2-D
+        numpy array) without a trailing newline."""
+        if not len(rows):
+            return ''
+
+        # a numpy block is always rectangular
+        if numpy is not None and isinstance(rows, numpy.ndarray):
+            nRows, nColumns = rows.shape
+            template = self._block_template(nRows, nColumns)
+            return template % tuple(rows.ravel().tolist())
+
+        # a block of rows with different lengths is written row by row
+        lengths = set(imap(len, rows))
+        if len(lengths) > 1:
+            return '\n'.join(self._row_template(len(row)) % tuple(row)
+                             for row in rows)
+
+        template = self._block_template(len(rows), lengths.pop())
+        return template % tuple(chain.from_iterable(rows))
+
+# formatters are shared between all data sets with the same precision
+_formatters = {}
+
+def get_formatter(precision=None):
+    """Return the (shared) DataFormatter for a precision."""
+    try:
+        return _formatters[precision]
+    except KeyError:
+        formatter = DataFormatter(precision)
+        _formatters[precision] = formatter
+        return formatter
@@ -1,16 +1,42 @@
 import time
 import os
+import stat
+import tempfile
+import traceback
 
-from base import GraceObject
+from base import GraceObject, is_type, in_range, is_member
 from graph import Graph
+from dataset import keeping_bounds
 from drawing_objects import DrawingObject
 from colors import DefaultColorScheme
 from fonts import default as default_fonts
+from render import guess_filetype, render_command, RenderPool, \
+     RenderResult, failed_result
+from compression import split_compression, open_project
+from sidecar import Sidecar
+from dedup import DataDedup
 
 HEADER_COMMENT = '# Amaral Group python interface for xmgrace. OH YEAH!'
 INDEX_ORIGIN = 0  # zero or one (one is for losers)
 
+# how write_agr writes the data of the sets: in the project, in files of
+# their own next to it (see sidecar.py), or in the project once for all sets
+# with the same data (see dedup.py)
+DATA_MODES = ('inline', 'sidecar', 'dedup')
+
 class Grace(GraceObject):
+
+    # check Grace specific attributes
+    _attribute_rules = (
+        ('width height', is_type(int), in_range(0, None)),
+        ('verbose', is_type(bool)),
+        ('version', is_type(str)),
+        ('background_fill', is_type(str), is_member(('on', 'off'))),
+        )
+
+    # every object is written with the colors and fonts of the root
+    _tree_attributes = ('colors', 'fonts')
+
     def __init__(self,
                  width=792,
                  height=612,
@@ -37,22 +63,6 @@ class Grace(GraceObject):
         # maximum frame ratios in viewport units
         self.get_canvas_dimensions()
 
-    def __setattr__(self, key, value):
-
-        # check Grace specific attributes
-        if key == 'width' or key == 'height':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, None)
-        elif key == 'verbose':
-            self._check_type(bool, key, value)
-        elif key == 'version':
-            self._check_type(str, key, value)
-        elif key == 'background_fill':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('on', 'off'))
-            
-        GraceObject.__setattr__(self, key, value)
-        
     def set_portrait(self):
         self.width = 612
         self.height = 792
@@ -90,36 +100,162 @@ class Grace(GraceObject):
 	lines.append(str(self.timestamp))
         return '\n'.join(lines)
     
-    def __str__(self):
-        lines = []
-        lines.append('# Grace project file')
-        lines.append(HEADER_COMMENT)
-	lines.append(self._header_string())
-        lines.extend(map(str, self.drawing_objects))
-	lines.extend(map(str, self.graphs))
+    def iter_lines(self, data_writer=None):
+        """iter_lines(data_writer=None) -> iterator over the chunks of the
+        project file.
+
+        Each chunk holds one or more complete lines (without the trailing
+        newline), so that joining the chunks with newlines gives the same
+        string as str(self).  The data of each DataSet is yielded in blocks
+        of DATA_CHUNK_SIZE rows, so the whole project never has to be held
+        in memory at once.  If data_writer is given (a Sidecar or a
+        DataDedup, see write_agr), it writes the data of the sets instead.
+        """
+        yield '# Grace project file'
+        yield HEADER_COMMENT
+        yield self._header_string()
+        for drawing_object in self.drawing_objects:
+            yield drawing_object._render()
+        for graph in self.graphs:
+            yield str(graph)
+        if data_writer is not None:
+            for chunk in data_writer.iter_lines(self):
+                yield chunk
+            return
         for graph in self.graphs:
             for dataset in graph.datasets:
-                lines.append('@target G%i.S%i' % (graph.index, dataset.index))
-                lines.append('@type %s' % dataset.type)
-                lines.append(dataset._repr_data())
-        return '\n'.join(lines)
+                for chunk in self._iter_dataset_lines(graph, dataset):
+                    yield chunk
+
+    def _iter_dataset_lines(self, graph, dataset):
+        """The chunks of the data block of dataset in the project."""
+        yield '@target G%i.S%i' % (graph.index, dataset.index)
+        yield '@type %s' % dataset.type
+        for chunk in dataset._iter_data():
+            yield chunk
 
-    def write_agr(self, filename='temp.agr'):
-        """write_agr(filename='temp.agr') -> none.
+    def write_to(self, stream, data_writer=None):
+        """write_to(stream, data_writer=None) -> none.
 
-        This function writes an xmgrace (.agr) file.
+        Write the project to any object with a write method (an open file,
+        a gzip stream, the input pipe of gracebat, ...) one chunk at a time.
         """
-        # format filename (include the correct file extension)
+        chunks = self.iter_lines(data_writer)
+        for chunk in chunks:
+            stream.write(chunk)
+            break
+        for chunk in chunks:
+            stream.write('\n')
+            stream.write(chunk)
+
+    def __str__(self):
+        return '\n'.join(self.iter_lines())
+
+    def write_agr(self, filename='temp.agr', data_mode='inline',
+                  data_dir=None):
+        """write_agr(filename='temp.agr', data_mode='inline', data_dir=None)
+        -> Sidecar, DataDedup or none.
+
+        This function writes an xmgrace (.agr) file, compressed if the name
+        ends in '.agr.gz', '.agr.bz2' or '.agr.xz' (see compression.py).
+        The data of the sets is written according to data_mode:
+
+            'inline'   in the project, as it is
+            'sidecar'  to files in data_dir (default: the directory of the
+                       project) that the project reads by their names
+                       relative to its own directory (see sidecar.py)
+            'dedup'    in the project, but data that is the same as that
+                       of a set before it is copied from that set (see
+                       dedup.py)
+
+        For 'sidecar' and 'dedup', the object that wrote the data is
+        returned, with counts of what it saved.
+        """
+        if data_mode not in DATA_MODES:
+            message = "data_mode must be one of %s (got %r instead)" % \
+                      (DATA_MODES, data_mode)
+            raise ValueError(message)
+
+        # format filename (include the correct file extension, before the
+        # compression suffix if there is one)
+        filename, suffix = split_compression(filename)
         if not filename.split('.')[-1].upper() == 'AGR':
             filename = filename + '.agr'
-        
+        filename = filename + suffix
+
+        data_writer = None
+        if data_mode == 'sidecar':
+            projectDir = os.path.dirname(os.path.abspath(filename))
+            if data_dir is None:
+                data_dir = projectDir
+            data_writer = Sidecar(data_dir, projectDir)
+        elif data_mode == 'dedup':
+            data_writer = DataDedup()
+
+        self._write_project_file(
+            filename, lambda stream: self.write_to(stream, data_writer))
+        return data_writer
+
+    def _write_project_file(self, filename, write):
+        """Write a project file with write(stream)."""
+
+        # data blocks that were read lazily from this very file are still
+        # needed while it is written, so the project goes to a new file
+        # that replaces the old one (with the same mode) once it is complete
+        if self._maps_file(filename):
+            handle, partial = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(filename)), suffix='.agr')
+            outfile = os.fdopen(handle, 'w')
+            try:
+                write(outfile)
+                outfile.close()
+                os.chmod(partial, stat.S_IMODE(os.stat(filename).st_mode))
+                os.rename(partial, filename)
+            except:
+                outfile.close()
+                os.remove(partial)
+                raise
+            return
+
         # write file
-	outfile = open(filename,'w')
-	outfile.write(str(self))
-	outfile.close()
+        outfile = open_project(filename, 'w')
+        write(outfile)
+        outfile.close()
+
+    def _maps_file(self, filename):
+        """Return True if the data of a set is still mapped from file
+        filename (see reader.py)."""
+        if not os.path.exists(filename):
+            return False
+        for graph in self.graphs:
+            for dataset in graph.datasets:
+                block = dataset.__dict__.get('_data_block')
+                if block is not None and \
+                        os.path.samefile(block.source, filename):
+                    return True
+        return False
+
+    @classmethod
+    def read_agr(cls, filename, array=None, strict=False, lazy=False):
+        """read_agr(filename, array=None, strict=False, lazy=False) -> Grace.
+
+        Read an xmgrace (.agr) file back into a new instance of this class,
+        with its colors, fonts, graphs, axes, data sets and drawing
+        objects.  If numpy is installed (or array is True), the data of the
+        sets is read into numpy arrays.  Lines of the file that PyGrace does
+        not know are skipped, unless strict is True.
+
+        With lazy=True, the file is memory mapped and the data of each set
+        is only parsed when it is first used.  The data that is never used
+        is copied straight from the file when the project is written.
+        """
+        # the reader depends on all of the object model, including this
+        # module, so it is only imported when it is needed
+        from reader import read_agr
+        return read_agr(filename, cls, array, strict, lazy)
 
-    def write_file(self, filename='temp.eps', filetype=None):
-        """write_file(filename='temp.eps', filetype=None) -> none.
+    def write_file(self, filename='temp.eps', filetype=None, cache=None):
+        """write_file(filename='temp.eps', filetype=None, cache=None) -> none.
 
         This function uses gracebat to output a image file of the specified
         type.  Here are the allowed types (for version 5.1.14):
@@ -130,50 +266,101 @@ class Grace(GraceObject):
         for a bad description.  The key is that popen with the 'w' option
         returns a file object in write mode, that will be sent to the command
         once the file object is closed (after writing stuff to it).
+
+        If cache is a RenderCache (see render.py), an unchanged project that
+        was rendered before is copied from the cache instead of running
+        gracebat again.
         """
+        if cache is not None:
+            cache.write_file(self, filename, filetype)
+            return
 
-        # dictionary for converting file extensions to proper gracebat
-        # file types
-        ext2filetype = {"eps":"EPS",
-                        "ps":"PostScript",
-                        "mif":"MIF",
-                        "svg":"SVG",
-                        "pnm":"PNM",
-                        "jpg":"JPEG",
-                        "jpeg":"JPEG",
-                        "png":"PNG",
-                        }
-
-        # find extension of file
-        root,ext = os.path.splitext(filename)
-        ext = ext[1:].lower()
-
-        if ext=="agr" or (filetype and filetype.lower() == 'agr'):
+        # find the gracebat file type from the extension of the file
+        filetype = guess_filetype(filename, filetype)
+        if filetype == 'agr':
             self.write_agr(filename)
             return
-        elif ext in ext2filetype and filetype is None:
-            filetype = ext2filetype[ext]
-        elif filetype is None:
-            message = """
-Grace.write_file tries to guess the gracebat file type from the given
-file name.  In this case, Grace.write_file does not recognize the file
-type of file '%s'.  Please specify the gracebat file type manually
-using the 'filetype' keyword argument.
-"""%(filename)
-            raise TypeError, message
 
         # make command that will be piped to
-        command = 'gracebat -hardcopy -hdevice %s -printfile "%s" -pipe' % \
-                  (filetype, filename)
+        command = render_command(filename, filetype)
 
         # set up a file as an INPUT pipe to command
         pipeInput = os.popen(command, 'w')
 
         # write grace file to input pipe, and close.  once the input pipe is
         # closed, the command runs and xmgrace outputs a file
-        pipeInput.write(str(self))
+        self.write_to(pipeInput)
         pipeInput.close()
 
+    def write_files(self, filenames, pool=None, timeout=None):
+        """write_files(filenames, pool=None, timeout=None) -> list of
+        RenderResults.
+
+        Write the project to several files at once, such as
+        ['fig.eps', 'fig.png', 'fig.svg'].  The project is serialized only
+        once, and the same string is piped into gracebat for every file,
+        all at the same time on a RenderPool (see render.py) with a worker
+        per file that is rendered, or on pool if it is given.  An entry of
+        filenames can also be a (filename, filetype) tuple.  A .agr file is
+        written from the string as well.
+
+        Failures do not raise: the RenderResult of each file (in the order
+        of filenames) tells how long it took and what went wrong, if
+        anything.
+        """
+        project = str(self)
+
+        # the file types are found before anything is written, and a file
+        # whose type is not known only fails its own RenderResult
+        entries = []
+        for entry in filenames:
+            if isinstance(entry, basestring):
+                entry = (entry,)
+            filename, filetype, result = entry[0], None, None
+            try:
+                filetype = guess_filetype(*entry)
+            except Exception:
+                result = failed_result(filename)
+            entries.append((filename, filetype, result))
+        nRendered = len([filename for filename, filetype, result in entries
+                         if result is None and filetype != 'agr'])
+
+        # the project files are written while the images render
+        ownPool = pool is None and nRendered > 0
+        if ownPool:
+            pool = RenderPool(workers=nRendered, timeout=timeout)
+        try:
+            submitted = []
+            for filename, filetype, result in entries:
+                job = None
+                if result is None and filetype != 'agr':
+                    job = pool.submit(project, filename, filetype, timeout)
+                submitted.append((filename, job, result))
+            results = []
+            for filename, job, result in submitted:
+                if result is None and job is None:
+                    result = self._write_project_string(project, filename)
+                elif result is None:
+                    result = pool.wait(job)
+                results.append(result)
+        finally:
+            if ownPool:
+                pool.close()
+        return results
+
+    def _write_project_string(self, project, filename):
+        """Write project (a string) to the project file filename and return
+        the RenderResult."""
+        result = RenderResult(filename, 'agr')
+        start = time.time()
+        try:
+            self._write_project_file(filename,
+                                     lambda stream: stream.write(project))
+        except Exception:
+            result.error = traceback.format_exc()
+        result.seconds = time.time() - start
+        return result
+
     def add_color(self, red, green, blue, name=None):
         color = self.colors.add_color(red, green, blue, name)
         return color
@@ -248,10 +435,12 @@ using the 'filetype' keyword argument.
     #--------------------------------------------------------------------------
     # methods for rescaling graphs 
     #--------------------------------------------------------------------------
+    @keeping_bounds
     def autoscale(self, padx=0,pady=0):
         for graph in self.graphs:
             graph.autoscale(padx=padx,pady=pady)
 
+    @keeping_bounds
     def autoscalex_same(self, pad=0, graphs=(), exclude_graphs=()):
         """Autoscale all x-axes to have the same world coordinates
         """
@@ -293,6 +482,7 @@ can not be used simultaneously.
         for graph in graphs:
             graph.autotickx()
 
+    @keeping_bounds
     def autoscaley_same(self,pad=0, graphs=(), exclude_graphs=()):
         """Autoscale all y-axes to have the same world coordinates
         """
@@ -334,6 +524,7 @@ can not be used simultaneously.
         for graph in graphs:
             graph.autoticky()
 
+    @keeping_bounds
     def autoscale_same(self,padx=0,pady=0, graphs=(), exclude_graphs=()):
         """Autoscale all graphs in a this MultiGrace to have the same x,y
         world coordinates.
@@ -353,6 +544,7 @@ can not be used simultaneously.
 class Timestamp(GraceObject):
     """A string representation of the time is created at time of printing."""
     _staticType = 'Timestamp'
+    _cacheable = False
     def __init__(self, parent,
                  onoff='off',
                  x = 0.03,
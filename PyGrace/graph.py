@@ -1,9 +1,10 @@
-from base import GraceObject
+from base import GraceObject, is_type, in_range, is_member
 from drawing_objects import DrawingObject
-from dataset import DataSet, SYMBOLS, INDEX2SYMBOLS, LINESTYLES, \
-    INDEX2LINESTYLES
+from dataset import DataSet, DECIMATE_METHODS, SYMBOLS, INDEX2SYMBOLS, \
+    LINESTYLES, INDEX2LINESTYLES, is_array, numpy, keeping_bounds
 from axis import Axis,LINEAR_SCALE,LOGARITHMIC_SCALE
 import math
+import numbers
 
 INDEX_ORIGIN = 0  # zero or one (one is for losers)
 
@@ -63,6 +64,13 @@ class View(GraceObject):
 
 class World(GraceObject):
     _staticType = 'World'
+
+    # check type of World specific attribute
+    _attribute_rules = (
+        ('znorm', is_type((float, int))),
+        ('stack_world', is_type(tuple)),
+        )
+
     def __init__(self, parent,
                  xmin=0,
                  xmax=1,
@@ -76,16 +84,6 @@ class World(GraceObject):
         self._formatting_template = \
             {'stack_world': '%.20f, %.20f, %.20f, %.20f'}
 
-    def __setattr__(self, key, value):
-
-        # check type of Frame specific attribute
-        if key == 'znorm':
-            self._check_type((float, int), key, value)
-        elif key == 'stack_world':
-            self._check_type(tuple, key, value)
-
-        GraceObject.__setattr__(self, key, value)
-
     def __str__(self):
         return \
 """@    world xmin %(xmin)s
@@ -97,6 +95,12 @@ class World(GraceObject):
 
 class Frame(GraceObject):
     _staticType = 'Frame'
+
+    # check type of Frame specific attribute
+    _attribute_rules = (
+        ('type', is_type(int), in_range(0, 6, includeMax=False)),
+        )
+
     def __init__(self, parent,
                  type = 0,
                  linestyle = 1,
@@ -109,14 +113,6 @@ class Frame(GraceObject):
                  ):
         GraceObject.__init__(self, parent, locals())
 
-    def __setattr__(self, key, value):
-
-        # check type of Frame specific attribute
-        if key == 'type':
-            self._check_type(int, key, value)
-            self._check_range(key, value, 0, 6, includeMax=False)
-        GraceObject.__setattr__(self, key, value)
-
     def __str__(self):
         return \
 """@    frame type %(type)s
@@ -129,6 +125,14 @@ class Frame(GraceObject):
 
 class Legend(GraceObject):
     _staticType = 'Legend'
+
+    # check Legend specific attributes
+    _attribute_rules = (
+        ('loc', is_type(tuple)),
+        ('invert', is_type(str), is_member(('true', 'false'))),
+        ('hgap vgap', is_type((float, int))),
+        )
+
     def __init__(self, parent,
                  onoff = 'on',         # must be 'on' or 'off'
                  loctype = 'view',     # must be 'view' or 'world'
@@ -151,19 +155,6 @@ class Legend(GraceObject):
         GraceObject.__init__(self, parent, locals())
         self._formatting_template = {'loc': '%.20f, %.20f'}
 
-    def __setattr__(self, key, value):
-
-        # check Legend specific attributes
-        if key == 'loc':
-            self._check_type(tuple, key, value)
-        elif key == 'invert':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('true', 'false'))
-        elif key == 'hgap' or key == 'vgap':
-            self._check_type((float, int), key, value)
-            
-        GraceObject.__setattr__(self, key, value)
-      
     def __str__(self):
         return \
 """@    legend %(onoff)s
@@ -185,12 +176,24 @@ class Legend(GraceObject):
 
 class Graph(GraceObject):
     _staticType = 'Graph'
+
+    # check Graph specific attributes
+    _attribute_rules = (
+        ('type', is_type(str)),
+        ('stacked', is_type(str), is_member(('true', 'false'))),
+        ('bar_hgap', is_type((float, int))),
+        ('decimate', is_member(DECIMATE_METHODS)),
+        ('clip_to_world', is_member((False, True))),
+        )
+
     def __init__(self, parent, index,
                  onoff='on',
                  hidden='false',
                  type='XY',
                  stacked = 'false',
                  bar_hgap=0.00,
+                 decimate=None,
+                 clip_to_world=False,
                  **kwargs
                  ):
         GraceObject.__init__(self, parent, locals())
@@ -210,21 +213,20 @@ class Graph(GraceObject):
 
         self.drawing_objects = []
 
-    def __setattr__(self, key, value):
-
-        # check Graph specific attributes
-        if key == 'type':
-            self._check_type(str, key, value)
-        elif key == 'stacked':
-            self._check_type(str, key, value)
-            self._check_membership(key, value, ('true', 'false'))
-        elif key == 'bar_hgap':
-            self._check_type((float, int), key, value)
+    def __str__(self):
 
-        GraceObject.__setattr__(self, key, value)
+        # only the lines of the graph itself are stored, since the lists of
+        # datasets and drawing objects can be changed in place
+        if self.__dict__.get('_renumber'):
+            self._number_datasets()
+        graphString = self._render()
+        datasetString = '\n'.join(dataset._render()
+                                  for dataset in self.datasets)
+        doString = '\n'.join(do._render() for do in self.drawing_objects)
+        return '\n'.join((doString, graphString, datasetString))
 
-    def __str__(self):
-        graphString = \
+    def _fragment_string(self):
+        return \
 """@g%(index)s %(onoff)s
 @g%(index)s hidden %(hidden)s
 @g%(index)s type %(type)s
@@ -241,9 +243,6 @@ class Graph(GraceObject):
 %(yaxis)s
 %(altxaxis)s
 %(altyaxis)s""" % self
-        datasetString = '\n'.join(str(dataset) for dataset in self.datasets)
-        doString = '\n'.join(str(do) for do in self.drawing_objects)
-        return '\n'.join((doString, graphString, datasetString))
 
     def add_dataset(self, data, cls=DataSet, *args, **kwargs):
 
@@ -299,70 +298,139 @@ class Graph(GraceObject):
             del do                
 
     def alldata(self):
+        """Return the data of all datasets.  If every dataset stores its
+        data in a numpy array with the same number of columns, the arrays
+        are stacked into a single array.  Otherwise a list of rows is
+        returned."""
+        arrays = [dataset.data for dataset in self.datasets]
+        if arrays and all(is_array(a) and a.ndim == 2 for a in arrays) and \
+                len(set(a.shape[1] for a in arrays)) == 1:
+            return numpy.concatenate(arrays)
         result = []
-        for dataset in self.datasets:
-            result.extend(dataset.data)
+        for data in arrays:
+            if is_array(data):
+                data = map(tuple, data.tolist())
+            result.extend(data)
         return result
 
+    def _position(self, dataset):
+        """Return the place of dataset in self.datasets."""
+
+        # the index gives the place, unless datasets were moved since the
+        # indices were last given
+        if not self.__dict__.get('_renumber'):
+            position = dataset.__dict__.get('index', -1) - INDEX_ORIGIN
+            if 0 <= position < len(self.datasets) and \
+                    self.datasets[position] is dataset:
+                return position
+        try:
+            return map(id, self.datasets).index(id(dataset))
+        except ValueError:
+            raise ValueError('dataset is not in this graph')
+
+    def _moved(self):
+        """Note that the datasets changed places.  The indices are only
+        given again when they are next used (see _number_datasets), so that
+        moving many datasets does not renumber all of them each time."""
+        self.__dict__['_renumber'] = True
+
+    def _number_datasets(self):
+        """Give each dataset the index of its place in self.datasets."""
+        self.__dict__['_renumber'] = False
+        for position, dataset in enumerate(self.datasets):
+            index = position + INDEX_ORIGIN
+            if dataset.__dict__.get('index') != index:
+                dataset.index = index
+        self._datasetIndex = len(self.datasets) + INDEX_ORIGIN
+
     def move_dataset_to_front(self, dataset):
         """Move data set to the front.  This emulates the functionality of the
         xmgrace GUI.
         """
 
-        _dataset = self.datasets.pop(dataset.index-INDEX_ORIGIN)
-        _index = _dataset.index
-        assert _dataset==dataset, "Not the same dataset"
-        self.datasets.append(dataset)
-        for index,dataset in enumerate(self.datasets):
-            dataset.index = index + INDEX_ORIGIN
+        self.datasets.append(self.datasets.pop(self._position(dataset)))
+        self._moved()
 
     def move_dataset_to_back(self, dataset):
         """Move data set to the back.  This emulates the functionality of the
         xmgrace GUI.
         """
 
-        _dataset = self.datasets.pop(dataset.index-INDEX_ORIGIN)
-        assert _dataset==dataset, "Not the same dataset"
-        self.datasets.insert(0, dataset)
-        for index,dataset in enumerate(self.datasets):
-            dataset.index = index + INDEX_ORIGIN
+        self.datasets.insert(0, self.datasets.pop(self._position(dataset)))
+        self._moved()
 
     def move_dataset_forward(self, dataset):
         """Move data set forward by one dataset.  This emulates the 
         functionality of the xmgrace GUI.
         """
 
-        _dataset = self.datasets.pop(dataset.index-INDEX_ORIGIN)
-        _index = _dataset.index
-        assert _dataset==dataset, "Not the same dataset"
-        self.datasets.insert(_index-INDEX_ORIGIN+1, dataset)
-        for index,dataset in enumerate(self.datasets):
-            dataset.index = index + INDEX_ORIGIN
+        position = self._position(dataset)
+        self.datasets.insert(position + 1, self.datasets.pop(position))
+        self._moved()
 
     def move_dataset_backward(self, dataset):
         """Move data set backward by one dataset.  This emulates the 
         functionality of the xmgrace GUI.
         """
 
-        _dataset = self.datasets.pop(dataset.index-INDEX_ORIGIN)
-        _index = _dataset.index
-        assert _dataset==dataset, "Not the same dataset"
-        _newListIndex = max(0, _index-INDEX_ORIGIN-1) 
-        self.datasets.insert(_newListIndex, dataset)
-        for index,dataset in enumerate(self.datasets):
-            dataset.index = index + INDEX_ORIGIN
+        position = self._position(dataset)
+        self.datasets.insert(max(0, position - 1), self.datasets.pop(position))
+        self._moved()
 
     def set_dataset_order(self, datasets):
-        """Specify the order of the data sets.
+        """Specify the order of the data sets.  Each dataset is moved to the
+        back in turn, so the last one given ends up in the back.
         """
 
         # make sure that the lengths of order and datasets are the same
         assert len(datasets)==len(self.datasets),\
             "'datasets' not same length as Graph.datasets."
 
-        # use the move_dataset_to_back
-        for dataset in datasets:
-            self.move_dataset_to_back(dataset)
+        self.reorder(list(reversed(datasets)))
+
+    def reorder(self, order):
+        """Put the datasets in a new order, from back to front.  order holds
+        all of the datasets of the graph, or their places in self.datasets.
+        """
+
+        datasets = [self.datasets[item]
+                    if isinstance(item, numbers.Integral) else item
+                    for item in order]
+        if len(datasets) != len(self.datasets) or \
+                set(map(id, datasets)) != set(map(id, self.datasets)):
+            raise ValueError('order must hold each dataset of the graph once')
+        self.datasets[:] = datasets
+        self._moved()
+
+    def insert_dataset(self, position, data, cls=DataSet, *args, **kwargs):
+        """Add a dataset (see add_dataset) at place position in
+        self.datasets, rather than in the front."""
+
+        dataset = self.add_dataset(data, cls, *args, **kwargs)
+        self.datasets.insert(position, self.datasets.pop())
+        self._moved()
+        return dataset
+
+    def remove_dataset(self, dataset):
+        """Remove dataset from the graph.  The datasets in front of it move
+        back to fill its place."""
+
+        self.remove_datasets([dataset])
+
+    def remove_datasets(self, datasets):
+        """Remove several datasets from the graph at once (see
+        remove_dataset)."""
+
+        removed = set(map(id, datasets))
+        if not removed <= set(map(id, self.datasets)):
+            raise ValueError('dataset is not in this graph')
+        self.datasets[:] = [dataset for dataset in self.datasets
+                            if id(dataset) not in removed]
+        children = self._dynamicChildren.get(DataSet._staticType)
+        if children:
+            children[:] = [child for child in children
+                           if id(child) not in removed]
+        self._moved()
 
     def logy(self): self.yaxis.set_log()
     def logx(self): self.xaxis.set_log()
@@ -556,16 +624,14 @@ There are no datasets or drawing_objects on which to determine the limits.
 
     def format_for_print(self, printWidth):
         charSize, lineWidth, offset = self.calculate_sizes(printWidth)
-        self.set_linewidths(lineWidth)
-        self.set_suffix(charSize * 1.1, 'size', True)
-        self.set_suffix(charSize, '_size', True)
-        self.set_suffix(charSize * 0.67, 'minor_size', True)
-        megaset = []
-        for dataset in self.datasets:
-            megaset.extend(dataset.data)
+        self.set_suffixes([(lineWidth, 'linewidth'),
+                           (charSize * 1.1, 'size'),
+                           (charSize, '_size'),
+                           (charSize * 0.67, 'minor_size')])
+        nPoints = sum(len(dataset.data) for dataset in self.datasets)
         try:
-            mul = 1.75 * len(megaset)**-.35
-            mul = 1 * len(megaset)**-.35
+            mul = 1.75 * nPoints**-.35
+            mul = 1 * nPoints**-.35
         except ZeroDivisionError:
             pass
         for dataset in self.datasets:
@@ -579,6 +645,7 @@ There are no datasets or drawing_objects on which to determine the limits.
         self.autoscale()
         self.format_for_print(printWidth)
 
+    @keeping_bounds
     def autoscalex(self, pad=0, only_visible=True):
         xMin, yMin, xMax, yMax = self.limits(only_visible=only_visible)
         if self.xaxis.scale==LINEAR_SCALE:
@@ -616,6 +683,7 @@ There are no datasets or drawing_objects on which to determine the limits.
         self.xaxis.tick.minor_ticks = nxMinor
         self.xaxis.auto_precision()
 
+    @keeping_bounds
     def autoscaley(self, pad=0, only_visible=True):
         xMin, yMin, xMax, yMax = self.limits(only_visible=only_visible)
         if self.yaxis.scale==LINEAR_SCALE:
@@ -654,6 +722,7 @@ There are no datasets or drawing_objects on which to determine the limits.
         self.yaxis.tick.minor_ticks = nyMinor
         self.yaxis.auto_precision()
 
+    @keeping_bounds
     def autoscale(self, padx=0, pady=0, only_visible=True):
         self.autoscalex(pad=padx,only_visible=only_visible)
         self.autoscaley(pad=pady,only_visible=only_visible)
@@ -0,0 +1,256 @@
+"""Live updates of a project in a running xmgrace.
+
+A LiveSession sends a project once through a pipe into xmgrace (or into
+any other stream) and after that only the commands for what changed: the
+lines of the graphs that are different, the points that were appended to a
+data set, the data sets and graphs that were removed, and a 'redraw'.
+Updates that come faster than the interval of the session are coalesced
+into one.
+"""
+import time
+import subprocess
+from itertools import izip, islice
+
+from dataset import DATA_COLUMNS
+from formatting import get_formatter
+
+# command that starts xmgrace reading commands from standard input
+XMGRACE_COMMAND = 'xmgrace -dpipe 0 -nosafe -noask'
+
+def _changed_lines(old, new):
+    """Return the lines of new that are not the same as the line at the
+    same place in old (all of new if the number of lines changed)."""
+    if old is None or len(old) != len(new):
+        return list(new)
+    return [line for (before, line) in izip(old, new) if before != line]
+
+def _data_state(dataset):
+    """Return what is remembered of the data of dataset when it is sent:
+    the data, its number of rows, the type, the number of rows that were
+    ever appended to it (see StreamingDataSet.appended), which is more than
+    the number of rows once a sliding window drops old rows, and how the
+    rows that are written are picked (see DataSet._selection)."""
+    data = dataset.data
+    return (data, len(data), dataset.type,
+            getattr(dataset, 'appended', len(data)), dataset._selection())
+
+def _rows_from(data, start):
+    """Return the rows of data from start on."""
+    try:
+        return data[start:]
+    except TypeError:
+        return list(islice(data, start, None))
+
+class RecordingPipe(object):
+    """A stream that keeps everything that is written to it, to stand in
+    for the pipe of xmgrace (in tests, for example)."""
+    def __init__(self):
+        self.chunks = []
+        self.flushes = 0
+        self.closed = False
+
+    def write(self, text):
+        self.chunks.append(text)
+
+    def flush(self):
+        self.flushes += 1
+
+    def close(self):
+        self.closed = True
+
+    def lines(self):
+        """Return all lines that were written."""
+        return ''.join(self.chunks).splitlines()
+
+    def clear(self):
+        self.chunks = []
+
+class LiveSession(object):
+    """Keep a running xmgrace up to date with grace.
+
+    The project is sent when the session is made.  Call update() after
+    changing the project; the changes are sent at most once per interval
+    seconds (changes in between are sent together with the next update
+    that is due), and flush() sends them right away.  The data of a set is
+    assumed to only grow at the end as long as it is the same object;
+    anything else (a new list or array, fewer rows, another type, another
+    world for a set that is clipped to it) sends the whole set again, as
+    does resend(dataset).  A changed drawing object
+    sends the whole project again, since xmgrace can not change drawing
+    objects that it already has.
+
+    If stream is None, xmgrace is started with command and the commands are
+    written to its standard input.  clock is the function that gives the
+    time for the interval.
+    """
+    def __init__(self, grace, stream=None, command=XMGRACE_COMMAND,
+                 interval=0.1, clock=time.time):
+        self.grace = grace
+        self.interval = interval
+        self.clock = clock
+        self.process = None
+        if stream is None:
+            self.process = subprocess.Popen(command, shell=True,
+                                            stdin=subprocess.PIPE)
+            stream = self.process.stdin
+        self.stream = stream
+        self.pending = False
+        self.updates = 0
+        self._send(self._project_commands())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self):
+        """Send the changes since the last update if the interval has
+        passed, and return True if they were sent.  Otherwise the changes
+        wait for a later update (or flush)."""
+        if self.clock() - self._sent < self.interval:
+            self.pending = True
+            return False
+        self._send(self._changes())
+        return True
+
+    def flush(self):
+        """Send the changes since the last update right away."""
+        self._send(self._changes())
+
+    def resend(self, dataset=None):
+        """Send all of the data of dataset again with the next update (or
+        the whole project if dataset is None), for changes that can not be
+        seen, such as rows changed in place."""
+        if dataset is None or self._state is None:
+            self._state = None
+        else:
+            key = (dataset.parent.index, dataset.index)
+            self._state['data'].pop(key, None)
+            self._state['resend'].add(key)
+
+    def close(self):
+        """Send the changes that are waiting and close the pipe."""
+        self.flush()
+        self.stream.close()
+        if self.process is not None:
+            self.process.wait()
+
+    def _send(self, commands):
+        if commands:
+            commands.append('redraw')
+            self.stream.write('\n'.join(commands))
+            self.stream.write('\n')
+            self.stream.flush()
+            self.updates += 1
+        self._sent = self.clock()
+        self.pending = False
+
+    def _header_lines(self):
+        """The lines of the project before the graphs, without the time of
+        the timestamp (which is different every time)."""
+        return [line for line in self.grace._header_string().split('\n')
+                if not line.startswith('@timestamp def')]
+
+    def _drawing_objects(self):
+        """The strings of all drawing objects, of the project and of each
+        graph, in order."""
+        result = [do._render() for do in self.grace.drawing_objects]
+        for graph in self.grace.graphs:
+            result.extend(do._render() for do in graph.drawing_objects)
+        return result
+
+    def _graph_lines(self, graph):
+        """The lines of graph (with those of its datasets), without the
+        lines of its drawing objects."""
+        text = str(graph)
+        doString = '\n'.join(do._render() for do in graph.drawing_objects)
+        return text[len(doString) + 1:].split('\n')
+
+    def _project_commands(self):
+        """Return the commands that send the whole project, and remember
+        what was sent."""
+        commands = list(self.grace.iter_lines())
+        self._state = self._snapshot()
+        return commands
+
+    def _snapshot(self):
+        graphs, data = {}, {}
+        for graph in self.grace.graphs:
+            graphs[graph.index] = self._graph_lines(graph)
+            for dataset in graph.datasets:
+                data[graph.index, dataset.index] = _data_state(dataset)
+        return {'header': self._header_lines(),
+                'drawing_objects': self._drawing_objects(),
+                'graphs': graphs,
+                'data': data,
+                'resend': set()}
+
+    def _changes(self):
+        """Return the commands that bring xmgrace from what was sent last to
+        the project as it is now."""
+        old = self._state
+        if old is None or old['drawing_objects'] != self._drawing_objects():
+            return ['new'] + self._project_commands()
+
+        commands = _changed_lines(old['header'], self._header_lines())
+        graphs, data = {}, {}
+        for graph in self.grace.graphs:
+            lines = self._graph_lines(graph)
+            changed = _changed_lines(old['graphs'].get(graph.index), lines)
+            if changed:
+                commands.append('@with g%i' % graph.index)
+                commands.extend(changed)
+            graphs[graph.index] = lines
+            for dataset in graph.datasets:
+                key = (graph.index, dataset.index)
+                commands.extend(self._data_commands(dataset, key, old))
+                data[key] = _data_state(dataset)
+
+        # data sets and graphs that are gone
+        for key in sorted(set(old['data']) - set(data)):
+            if key[0] in graphs:
+                commands.append('kill g%i.s%i' % key)
+        for index in sorted(set(old['graphs']) - set(graphs)):
+            commands.append('kill g%i' % index)
+
+        self._state = {'header': self._header_lines(),
+                       'drawing_objects': old['drawing_objects'],
+                       'graphs': graphs,
+                       'data': data,
+                       'resend': set()}
+        return commands
+
+    def _data_commands(self, dataset, key, old):
+        """Return the commands for the data of dataset that was not sent
+        yet: the new points if rows were only appended to the same data, all
+        of it otherwise."""
+        data, nRows, dataType, nAppended, selection = _data_state(dataset)
+        try:
+            sentData, nSent, sentType, nSentAppended, sentSelection = \
+                old['data'][key]
+        except KeyError:
+            sentData = None
+        # (the rows of a set that is clipped or decimated are picked from
+        # all of the data, so it is sent again when rows are appended)
+        appended = sentData is data and sentType == dataType and \
+            sentSelection == selection and \
+            0 <= nRows - nSent == nAppended - nSentAppended
+        if appended and nRows == nSent:
+            return []
+        if appended and selection == (None, None):
+            rows = _rows_from(data, nSent)
+            if DATA_COLUMNS.get(dataset.type) == 2:
+                block = get_formatter(dataset.precision).format_block(rows)
+                template = 'g%i.s%i point %%s' % key
+                return [template % ', '.join(line.split())
+                        for line in block.split('\n')]
+
+        # send the set from scratch (keeping its settings if it was there)
+        commands = []
+        if sentData is not None or key in old['resend']:
+            commands.append('kill g%i.s%i saveall' % key)
+        commands.append('@target G%i.S%i' % key)
+        commands.append('@type %s' % dataset.type)
+        commands.extend(dataset._iter_data())
+        return commands
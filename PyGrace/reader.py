@@ -0,0 +1,861 @@
+"""Reading Grace projects (.agr files) back into the PyGrace object model.
+
+The header of a project is parsed with keyword tables: every line of the
+form '@<object> <keyword...> <value>' is looked up by the longest keyword
+that starts the line, and the handler of that keyword sets the attribute of
+the Grace, Graph, Axis, DataSet or DrawingObject it belongs to.  Values are
+converted to the types PyGrace uses: quoted strings, integers, floats,
+words ('on', 'Normal', ...) and comma separated tuples.
+
+Data blocks (the lines between '@type' and '&') are read as a stream.  If
+numpy is installed, blocks of rows are converted to floats with a single
+numpy.fromstring call and the data of each set is stored in an array;
+otherwise each set gets a list of tuples.
+
+With lazy=True, the file is memory mapped and the data blocks are only
+located (by byte offset) on the first scan.  A block is parsed when the
+data of its set is first used, and the blocks that are never used are
+copied straight from the mapped file when the project is written again.
+
+Data that a project reads from files of its own ('@read block' and
+'@block', see sidecar.py) or copies from one set to another ('@copy', see
+dedup.py) is read into the sets as xmgrace would.
+
+Compressed project files ('.agr.gz', '.agr.bz2', '.agr.xz') are read
+through their decompressor.
+
+Lines that PyGrace does not know about (xmgrace writes a few more settings
+than PyGrace does) are skipped, unless the reader is strict.
+"""
+
+import os
+import re
+import mmap
+import bisect
+import warnings
+
+from grace import Grace
+from graph import Graph
+from dataset import DataSet, DATA_CHUNK_SIZE
+from colors import Color, ColorScheme
+from fonts import Font, FontSet
+from drawing_objects import DrawText, DrawLine, DrawBox, DrawEllipse
+from compression import is_compressed, open_project, iter_lines
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# number of data rows that are converted at a time by numpy
+READ_CHUNK_SIZE = 10 * DATA_CHUNK_SIZE
+
+# number of bytes of a mapped data block that are written at a time
+MAPPED_CHUNK_BYTES = 1 << 20
+
+#------------------------------------------------------------------------------
+# conversion of values
+#------------------------------------------------------------------------------
+def _number(token):
+    """Convert a token to an int or a float if possible."""
+    token = token.strip()
+    if token.lstrip('+-').isdigit():
+        return int(token)
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+def _value(text):
+    """Convert the value of a line to a python value: a quoted string, a
+    tuple of comma separated numbers, a number or a word."""
+    text = text.strip()
+    if text.startswith('"'):
+        end = text.rfind('"')
+        if end > 0:
+            return text[1:end]
+        return text[1:]
+    elif ',' in text:
+        return tuple(_number(token) for token in text.split(','))
+    return _number(text)
+
+#------------------------------------------------------------------------------
+# handlers of keywords.  each handler is called with the object that the line
+# belongs to and the (unconverted) value of the line.  a handler returns False
+# if it does not understand the value.
+#------------------------------------------------------------------------------
+def _attr(name, convert=_value):
+    """Handler that sets one attribute."""
+    def handler(target, text):
+        setattr(target, name, convert(text))
+    return handler
+
+def _unpack(*names):
+    """Handler that sets several attributes from a tuple, for example the
+    x and y of a timestamp.  A name can also be a tuple of names that gets
+    a tuple of values, like the lowleft corner of a box."""
+    def handler(target, text):
+        values = list(_value(text))
+        for name in names:
+            if isinstance(name, tuple):
+                setattr(target, name[0], tuple(values[:len(name)]))
+                del values[:len(name)]
+            else:
+                setattr(target, name, values.pop(0))
+    return handler
+
+def _reject(target, text):
+    return False
+
+def _ignore(target, text):
+    pass
+
+def _by_value(words, otherwise=_reject):
+    """Handler for keywords that set different attributes depending on the
+    value.  words maps values to attribute names, and any other value is
+    handed to the otherwise handler."""
+    def handler(target, text):
+        value = _value(text)
+        try:
+            name = words[value]
+        except (KeyError, TypeError):
+            return otherwise(target, text)
+        setattr(target, name, value)
+    return handler
+
+def _spec_tick(tickType):
+    """Handler of a special tick ('xaxis tick major 0, 1.5')."""
+    major = _attr('major')
+    def handler(tick, text):
+        if ',' not in text:
+            if tickType == 'major':
+                major(tick, text)
+            return
+        index, value = _value(text)
+        _put(tick, 'spec_ticks', index, value, 0)
+        _put(tick, 'spec_ticktypes', index, tickType, tick.spec_typedefault)
+    return handler
+
+def _spec_tick_number(tick, text):
+    """The number of special ticks starts a new list of special ticks."""
+    tick.spec_ticks = []
+    tick.spec_ticktypes = []
+    tick.spec_ticklabels = []
+
+def _put(target, name, index, value, fill):
+    """Store value at index of the list attribute name of target."""
+    values = list(getattr(target, name))
+    values.extend([fill] * (index + 1 - len(values)))
+    values[index] = value
+    setattr(target, name, values)
+
+def _ticklabel(axis, text):
+    """Handler of 'xaxis ticklabel on' and 'xaxis ticklabel 0, "label"'."""
+    if ',' in text:
+        index, label = text.split(',', 1)
+        tick = axis.tick
+        _put(tick, 'spec_ticklabels', int(index), _value(label),
+             tick.spec_labeldefault)
+    else:
+        return _by_value(ON_OFF)(axis.ticklabel, text)
+
+#------------------------------------------------------------------------------
+# keyword tables.  a table maps keywords (the words that follow the name of
+# the object) to the child of the object they belong to and a handler.
+#------------------------------------------------------------------------------
+ON_OFF = {'on': 'onoff', 'off': 'onoff'}
+
+def _keywords(child, prefix, keywords):
+    """Return a table in which each keyword sets the attribute of the same
+    name (with underscores instead of spaces)."""
+    table = {}
+    for keyword in keywords.split(','):
+        keyword = keyword.strip()
+        table[(prefix + ' ' + keyword).strip()] = \
+            (child, _attr(keyword.replace(' ', '_')))
+    return table
+
+GRACE_KEYWORDS = {
+    'version': (None, _attr('version', str)),
+    'page size': (None, _unpack('width', 'height')),
+    'page background fill': (None, _attr('background_fill')),
+    'background color': (None, _attr('background_color')),
+    'timestamp': ('timestamp', _by_value(ON_OFF, _unpack('x', 'y'))),
+    'timestamp def': (None, _ignore),
+    }
+GRACE_KEYWORDS.update(_keywords('timestamp', 'timestamp',
+                                'color, rot, font, char size'))
+
+# lines that start with the name of a graph ('@g0 on')
+GRAPH_KEYWORDS = {
+    '': (None, _by_value(ON_OFF)),
+    }
+GRAPH_KEYWORDS.update(_keywords(None, '', 'hidden, type, stacked, bar hgap'))
+
+# lines that follow '@with g0'
+WITH_KEYWORDS = {
+    'world': ('world', _unpack('xmin', 'ymin', 'xmax', 'ymax')),
+    'stack world': ('world', _attr('stack_world')),
+    'znorm': ('world', _attr('znorm')),
+    'view': ('view', _unpack('xmin', 'ymin', 'xmax', 'ymax')),
+    'title': ('title', _attr('text')),
+    'subtitle': ('subtitle', _attr('text')),
+    'legend': ('legend', _by_value(ON_OFF, _attr('loc'))),
+    'xaxes scale': ('xaxis', _attr('scale')),
+    'xaxes invert': ('xaxis', _attr('invert')),
+    'yaxes scale': ('yaxis', _attr('scale')),
+    'yaxes invert': ('yaxis', _attr('invert')),
+    }
+WITH_KEYWORDS.update(_keywords('world', 'world', 'xmin, xmax, ymin, ymax'))
+WITH_KEYWORDS.update(_keywords('view', 'view', 'xmin, xmax, ymin, ymax'))
+WITH_KEYWORDS.update(_keywords('title', 'title', 'font, size, color'))
+WITH_KEYWORDS.update(_keywords('subtitle', 'subtitle', 'font, size, color'))
+WITH_KEYWORDS.update(_keywords('legend', 'legend', """loctype, box color,
+    box pattern, box linewidth, box linestyle, box fill color,
+    box fill pattern, font, char size, color, length, vgap, hgap, invert"""))
+WITH_KEYWORDS.update(_keywords('frame', 'frame', """type, linestyle,
+    linewidth, color, pattern, background color, background pattern"""))
+
+AXIS_KEYWORDS = {
+    '': (None, _by_value(ON_OFF)),
+    'bar': ('bar', _by_value(ON_OFF)),
+    'label': ('label', _attr('text')),
+    'label place': ('label', _by_value(
+                dict.fromkeys(('normal', 'opposite', 'both'), 'place'),
+                _by_value(dict.fromkeys(('auto', 'spec', 'para'), 'place_loc'),
+                          _attr('place_tup')))),
+    'tick': ('tick', _by_value(dict(ON_OFF, **dict.fromkeys(
+                    ('in', 'out', 'both'), 'inout')))),
+    'tick major': ('tick', _spec_tick('major')),
+    'tick minor': ('tick', _spec_tick('minor')),
+    'tick spec': ('tick', _spec_tick_number),
+    'ticklabel': (None, _ticklabel),
+    'ticklabel offset': ('ticklabel', _by_value(
+                dict.fromkeys(('auto', 'spec'), 'offset_loc'),
+                _attr('offset_tup'))),
+    }
+AXIS_KEYWORDS.update(_keywords(None, '', 'type zero, offset'))
+AXIS_KEYWORDS.update(_keywords('bar', 'bar', 'color, linestyle, linewidth'))
+AXIS_KEYWORDS.update(_keywords('label', 'label',
+                               'layout, color, char size, font'))
+AXIS_KEYWORDS.update(_keywords('tick', 'tick', """minor ticks, default,
+    place rounded, place, major size, major color, major linewidth,
+    major linestyle, major grid, minor size, minor color, minor linewidth,
+    minor linestyle, minor grid, spec type"""))
+AXIS_KEYWORDS.update(_keywords('ticklabel', 'ticklabel', """format, prec,
+    formula, append, prepend, angle, skip, stagger, place, start type, start,
+    stop type, stop, char size, font, color"""))
+
+DATASET_KEYWORDS = {
+    'symbol': ('symbol', _attr('shape')),
+    'baseline': ('baseline', _by_value(ON_OFF)),
+    'avalue': ('avalue', _by_value(ON_OFF)),
+    'errorbar': ('errorbar', _by_value(ON_OFF)),
+    }
+DATASET_KEYWORDS.update(_keywords(None, '',
+                                  'hidden, type, dropline, comment, legend'))
+DATASET_KEYWORDS.update(_keywords('symbol', 'symbol', """size, color, pattern,
+    fill color, fill pattern, linewidth, linestyle, char, char font, skip"""))
+DATASET_KEYWORDS.update(_keywords('line', 'line', """type, linestyle,
+    linewidth, color, pattern"""))
+DATASET_KEYWORDS.update(_keywords('baseline', 'baseline', 'type'))
+DATASET_KEYWORDS.update(_keywords('fill', 'fill',
+                                  'type, rule, color, pattern'))
+DATASET_KEYWORDS.update(_keywords('avalue', 'avalue', """type, char size,
+    font, color, rot, format, prec, prepend, append, offset"""))
+DATASET_KEYWORDS.update(_keywords('errorbar', 'errorbar', """place, color,
+    pattern, size, linewidth, linestyle, riser linewidth, riser linestyle,
+    riser clip, riser clip length"""))
+
+# drawing objects by the name that follows '@with', with their keywords
+_CORNERS = ('lowleft', 'lowleft'), ('upright', 'upright')
+_BOX_KEYWORDS = """loctype, linestyle, linewidth, color, fill color,
+    fill pattern"""
+DRAWING_OBJECTS = {
+    'string': (DrawText, {
+            '': (None, _by_value(ON_OFF, _unpack('x', 'y'))),
+            'def': (None, _attr('text')),
+            }, 'loctype, color, rot, font, just, char size'),
+    'box': (DrawBox, {
+            '': (None, _by_value(ON_OFF, _unpack(*_CORNERS))),
+            'def': (None, _ignore),
+            }, _BOX_KEYWORDS),
+    'ellipse': (DrawEllipse, {
+            '': (None, _by_value(ON_OFF, _unpack(*_CORNERS))),
+            'def': (None, _ignore),
+            }, _BOX_KEYWORDS),
+    'line': (DrawLine, {
+            '': (None, _by_value(ON_OFF, _unpack(('start', 'start'),
+                                                 ('end', 'end')))),
+            'def': (None, _ignore),
+            }, """loctype, linewidth, linestyle, color, arrow, arrow type,
+                  arrow length, arrow layout"""),
+    }
+for _name, (_cls, _table, _simple) in DRAWING_OBJECTS.items():
+    _table.update(_keywords(None, '', _simple))
+    DRAWING_OBJECTS[_name] = (_cls, _table)
+del _name, _cls, _table, _simple
+
+# the longest keyword in any table, in words
+MAX_KEYWORD_WORDS = max(len(keyword.split())
+                        for table in [GRACE_KEYWORDS, GRAPH_KEYWORDS,
+                                      WITH_KEYWORDS, AXIS_KEYWORDS,
+                                      DATASET_KEYWORDS] +
+                        [table for cls, table in DRAWING_OBJECTS.values()]
+                        for keyword in table)
+
+def _dispatch(table, target, text):
+    """Apply the handler of the longest keyword of table that starts text.
+    Return False if no keyword matches (or its handler does not understand
+    the value)."""
+    words = text.split()
+    for n in xrange(min(len(words), MAX_KEYWORD_WORDS), -1, -1):
+        try:
+            child, handler = table[' '.join(words[:n])]
+        except KeyError:
+            continue
+        if child is not None:
+            target = getattr(target, child)
+        if n < len(words):
+            value = text.split(None, n)[n]
+        else:
+            value = ''
+        return handler(target, value) is not False
+    return False
+
+#------------------------------------------------------------------------------
+# data blocks
+#------------------------------------------------------------------------------
+# text of a data block with something else than integers in it, and an
+# integer that may not fit into an array of integers
+_NOT_INTEGER = re.compile(r'[^-+0-9\s]')
+_LONG_INTEGER = re.compile(r'\d{19}')
+
+def _parse_rows(lines):
+    """Convert lines of data to a list of tuples of numbers."""
+    return [tuple(_number(token) for token in line.split())
+            for line in lines]
+
+def _parse_array(text, nRows, nColumns):
+    """Convert text with nRows lines of nColumns numbers to a 2-D array, or
+    return None if it is not a rectangular block of numbers.  The array
+    holds integers if all of the numbers are integers (so that they are
+    written back as they were), and floats otherwise."""
+    dtype = float
+    if not _NOT_INTEGER.search(text):
+        if _LONG_INTEGER.search(text):
+            return None
+        dtype = int
+
+    # numpy warns about (and newer versions raise on) text that is not a
+    # number, in which case the block is read without numpy
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        try:
+            values = numpy.fromstring(text, dtype=dtype, sep=' ')
+        except ValueError:
+            return None
+    if nColumns == 0 or values.size != nRows * nColumns:
+        return None
+    return values.reshape((nRows, nColumns))
+
+def read_data(lines, array=None):
+    """Read the rows of a data block from an iterator over lines, up to and
+    including the '&' that ends the block.  The rows are converted
+    READ_CHUNK_SIZE at a time.  Returns a 2-D numpy array if array is True
+    (default: if numpy is installed and the block is rectangular and all
+    numeric), and a list of tuples otherwise."""
+    if array is None:
+        array = numpy is not None
+    blocks, rows, chunk = [], [], []
+
+    def convert(chunk):
+        if array and not rows:
+            block = _parse_array(' '.join(chunk), len(chunk),
+                                 len(chunk[0].split()))
+            if block is not None:
+                blocks.append(block)
+                return
+            # fall back to python lists for the rest of the data block
+            for block in blocks:
+                rows.extend(map(tuple, block.tolist()))
+            del blocks[:]
+        rows.extend(_parse_rows(chunk))
+
+    for line in lines:
+        line = line.strip()
+        if line == '&':
+            break
+        elif not line or line.startswith('#'):
+            continue
+        chunk.append(line)
+        if len(chunk) == READ_CHUNK_SIZE:
+            convert(chunk)
+            chunk = []
+    if chunk:
+        convert(chunk)
+
+    if rows or not array:
+        return rows
+    elif not blocks:
+        return numpy.zeros((0, 2))
+    elif len(blocks) == 1:
+        return blocks[0]
+    elif len(set(block.shape[1] for block in blocks)) == 1:
+        return numpy.concatenate(blocks)
+    return [row for block in blocks for row in map(tuple, block.tolist())]
+
+class MappedBlock(object):
+    """The data block of a set in a memory mapped project file.  The text
+    of the block runs from byte start up to (not including) byte end, and
+    does not include the '&' that ends it."""
+    def __init__(self, mapped, start, end, source, array=None):
+        self.mapped = mapped
+        self.start = start
+        self.end = end
+        self.source = source
+        self.array = array
+
+    def __repr__(self):
+        return '<MappedBlock %s [%i:%i]>' % (self.source, self.start, self.end)
+
+    def load(self):
+        """Parse the block (see read_data)."""
+        text = self.mapped[self.start:self.end]
+        array = self.array
+        if array is None:
+            array = numpy is not None
+
+        # a block without comments or text is converted in one go
+        if array and text:
+            firstLine = text.split('\n', 1)[0]
+            data = _parse_array(text, text.count('\n') + 1,
+                                len(firstLine.split()))
+            if data is not None:
+                return data
+        return read_data(iter(text.splitlines()), array)
+
+    def iter_chunks(self, size=MAPPED_CHUNK_BYTES):
+        """Iterate over the text of the block in chunks of about size bytes
+        that end at the end of a line (without the newline)."""
+        mapped, position, end = self.mapped, self.start, self.end
+        while position < end:
+            cut = min(position + size, end)
+            if cut < end:
+                newline = mapped.rfind('\n', position, cut)
+                if newline < 0:
+                    newline = mapped.find('\n', cut, end)
+                if newline >= 0:
+                    cut = newline
+                else:
+                    cut = end
+            yield mapped[position:cut]
+            position = cut + 1
+
+def _block_end(mapped, start):
+    """Return the end of the data block that starts at byte start of a
+    mapped file, and the start of the line that follows its '&'."""
+    position = start - 1
+    while True:
+        found = mapped.find('\n&', position)
+        if found < 0:
+            message = "data block at byte %i does not end with '&'" % start
+            raise ValueError(message)
+        after = found + 2
+        lineEnd = mapped.find('\n', after)
+        if lineEnd < 0:
+            lineEnd = len(mapped)
+
+        # the '&' must be alone on its line
+        if not mapped[after:lineEnd].strip():
+            if mapped[found - 1:found] == '\r':
+                found -= 1
+            return max(found, start), lineEnd + 1
+        position = after
+
+def _mapped_lines(mapped):
+    """Iterate over the lines of a mapped file, from its current position
+    (which can be moved while iterating)."""
+    readline = mapped.readline
+    line = readline()
+    while line:
+        yield line
+        line = readline()
+
+#------------------------------------------------------------------------------
+# the parser
+#------------------------------------------------------------------------------
+_MAP_COLOR = re.compile(
+    r'map\s+color\s+(\d+)\s+to\s+\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)\s*,'
+    r'\s*"(.*)"')
+_MAP_FONT = re.compile(r'map\s+font\s+(\d+)\s+to\s+"(.*?)"')
+_TARGET = re.compile(r'target\s+G(\d+)\.S(\d+)', re.IGNORECASE)
+_READ_BLOCK = re.compile(r'read\s+block\s+"(.*)"')
+_COPY = re.compile(r'copy\s+G(\d+)\.S(\d+)\s+to\s+G(\d+)\.S(\d+)',
+                   re.IGNORECASE)
+_BLOCK = re.compile(r'block\s+(\w+)\s+"([\d:]+)"')
+_GRAPH = re.compile(r'g(\d+)$')
+_SET = re.compile(r's(\d+)$')
+_AXES = ('xaxis', 'yaxis', 'altxaxis', 'altyaxis')
+_GRAPH_OBJECTS = ('world', 'stack', 'znorm', 'view', 'title', 'subtitle',
+                  'legend', 'frame', 'xaxes', 'yaxes')
+
+class _Attributes(object):
+    """Holds the attributes of a drawing object until all of its lines are
+    read."""
+    pass
+
+class AgrParser(object):
+    """Builds a Grace (or an instance of a subclass of Grace) from the
+    lines of a Grace project file.
+
+    array    store the data of the sets in numpy arrays (default: if numpy
+             is installed)
+    strict   throw a ValueError for lines that are not understood instead
+             of skipping them
+    directory
+             the directory that the relative names of data files (of '@read
+             block' lines) are found in, usually that of the project file
+             (default: the current directory)
+    """
+    def __init__(self, cls=Grace, array=None, strict=False, directory=None):
+        self.cls = cls
+        self.array = array
+        self.strict = strict
+        self.directory = directory
+        self.mapped = None
+
+    def parse_mapped(self, mapped, source):
+        """Build a Grace from a memory mapped project file, leaving the data
+        blocks in the file until they are used."""
+        self.mapped = mapped
+        self.source = source
+        try:
+            return self.parse(_mapped_lines(mapped))
+        finally:
+            self.mapped = None
+
+    def parse(self, lines):
+        self.grace = self.cls()
+        self.graph = None
+        self.drawing_object = None
+        self.colors = []
+        self.fonts = []
+        self.block = None
+        self.block_files = {}
+
+        # the graphs and sets by index, the indices of the sets of each
+        # graph in order, and the place in those from which on a set may
+        # have no data yet (see _read_block)
+        self.graphs = {}
+        self.datasets = {}
+        self.set_indices = {}
+        self.block_start = {}
+
+        lines = iter(lines)
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            elif line.startswith('@'):
+                self._parse_line(line[1:].strip(), lines)
+            elif self.strict:
+                message = "data outside of a data block: '%s'" % line
+                raise ValueError(message)
+
+        self._finish_drawing_object()
+        return self._finish()
+
+    def _parse_line(self, text, lines):
+        words = text.split()
+        first = words[0]
+
+        # a drawing object ends at its 'def' line (or at any other
+        # '@with')
+        if self.drawing_object is not None:
+            if first == self.drawing_object.kind:
+                self._parse_drawing_object(words, text)
+                return
+            self._finish_drawing_object()
+
+        if first == 'with':
+            self._with(words[1])
+            return
+        elif first == 'target':
+            self._read_target(text, lines)
+            return
+        elif first == 'map':
+            self._read_map(text)
+            return
+        elif first == 'read':
+            self._read_block_file(text)
+            return
+        elif first == 'block':
+            self._read_block(text)
+            return
+        elif first == 'copy':
+            self._read_copy(text)
+            return
+        elif first == 'autoscale':
+            return
+
+        match = _GRAPH.match(first)
+        if match:
+            graph = self._get_graph(int(match.group(1)))
+            if _dispatch(GRAPH_KEYWORDS, graph, text[len(first):]):
+                return
+        elif self.graph is not None:
+            match = _SET.match(first)
+            if match:
+                dataset = self._get_dataset(self.graph, int(match.group(1)))
+                if _dispatch(DATASET_KEYWORDS, dataset, text[len(first):]):
+                    return
+            elif first in _AXES:
+                axis = getattr(self.graph, first)
+                if _dispatch(AXIS_KEYWORDS, axis, text[len(first):]):
+                    return
+            elif first in _GRAPH_OBJECTS:
+                if _dispatch(WITH_KEYWORDS, self.graph, text):
+                    return
+        if _dispatch(GRACE_KEYWORDS, self.grace, text):
+            return
+
+        if self.strict:
+            message = "unknown line in Grace project: '@%s'" % text
+            raise ValueError(message)
+
+    def _with(self, name):
+        match = _GRAPH.match(name)
+        if match:
+            self.graph = self._get_graph(int(match.group(1)))
+        elif name in DRAWING_OBJECTS:
+            self.drawing_object = _Attributes()
+            self.drawing_object.kind = name
+            self.drawing_object.graph = None
+            self.drawing_object.attributes = _Attributes()
+        elif self.strict:
+            message = "unknown object in Grace project: '@with %s'" % name
+            raise ValueError(message)
+
+    def _parse_drawing_object(self, words, text):
+        drawing_object = self.drawing_object
+        cls, table = DRAWING_OBJECTS[drawing_object.kind]
+        rest = text[len(words[0]):]
+
+        # the graph that the drawing object is linked to
+        if len(words) == 2 and _GRAPH.match(words[1]):
+            drawing_object.graph = int(words[1][1:])
+        elif not _dispatch(table, drawing_object.attributes, rest):
+            if self.strict:
+                message = "unknown line in Grace project: '@%s'" % text
+                raise ValueError(message)
+        if words[1:2] == ['def']:
+            self._finish_drawing_object()
+
+    def _finish_drawing_object(self):
+        drawing_object = self.drawing_object
+        if drawing_object is None:
+            return
+        self.drawing_object = None
+        cls, table = DRAWING_OBJECTS[drawing_object.kind]
+        if drawing_object.graph is None:
+            parent = self.grace
+        else:
+            parent = self._get_graph(drawing_object.graph)
+        parent.add_drawing_object(cls, **vars(drawing_object.attributes))
+
+    def _read_map(self, text):
+        match = _MAP_COLOR.match(text)
+        if match:
+            index, red, green, blue = map(int, match.groups()[:4])
+            self.colors.append(Color(index, red, green, blue,
+                                     match.group(5)))
+            return
+        match = _MAP_FONT.match(text)
+        if match:
+            self.fonts.append(Font(int(match.group(1)), match.group(2)))
+        elif self.strict:
+            message = "unknown line in Grace project: '@%s'" % text
+            raise ValueError(message)
+
+    def _read_target(self, text, lines):
+        match = _TARGET.match(text)
+        if not match:
+            message = "can not read data target: '@%s'" % text
+            raise ValueError(message)
+        graph = self._get_graph(int(match.group(1)))
+        dataset = self._get_dataset(graph, int(match.group(2)))
+
+        # the type of the set comes before its data
+        for line in lines:
+            line = line.strip()
+            if line.startswith('@type'):
+                dataset.type = line[len('@type'):].strip()
+                break
+            elif line and not line.startswith('#'):
+                message = "expected '@type' after '@%s' (got '%s')" % \
+                          (text, line)
+                raise ValueError(message)
+
+        # the data of a mapped file is only located, and skipped
+        if self.mapped is not None:
+            start = self.mapped.tell()
+            end, after = _block_end(self.mapped, start)
+            dataset._set_data_block(MappedBlock(self.mapped, start, end,
+                                                self.source, self.array))
+            self.mapped.seek(min(after, len(self.mapped)))
+        else:
+            dataset.data = read_data(lines, self.array)
+            if not len(dataset.data):
+                self.block_start.pop(graph.index, None)
+
+    def _read_block_file(self, text):
+        """Read the data file of '@read block' (see sidecar.py), which the
+        '@block' lines after it take columns from."""
+        match = _READ_BLOCK.match(text)
+        if not match:
+            message = "can not read data file: '@%s'" % text
+            raise ValueError(message)
+        filename = match.group(1)
+        if self.directory is not None:
+            filename = os.path.join(self.directory, filename)
+        if filename not in self.block_files:
+            stream = open(filename)
+            try:
+                self.block_files[filename] = read_data(stream, self.array)
+            finally:
+                stream.close()
+        self.block = self.block_files[filename]
+
+    def _read_block(self, text):
+        """Put columns of the last data file into the first set of the
+        current graph that has no data (as xmgrace does)."""
+        match = _BLOCK.match(text)
+        if not match or self.block is None:
+            message = "can not read data block: '@%s'" % text
+            raise ValueError(message)
+        columns = [int(column) - 1 for column in match.group(2).split(':')]
+        graph = self.graph
+        if graph is None:
+            graph = self._get_graph(0)
+
+        # the sets before block_start all have data, so they are not
+        # looked at again
+        indices = self.set_indices.get(graph.index, [])
+        place = self.block_start.get(graph.index, 0)
+        while place < len(indices):
+            dataset = self.datasets[graph.index, indices[place]]
+            if dataset._unused_data_block() is None and \
+                    not len(dataset.data):
+                break
+            place += 1
+        else:
+            index = indices[-1] + 1 if indices else 0
+            dataset = self._get_dataset(graph, index)
+        self.block_start[graph.index] = place
+        dataset.type = match.group(1)
+        if numpy is not None and isinstance(self.block, numpy.ndarray):
+            dataset.data = self.block[:, columns]
+        else:
+            dataset.data = [tuple(row[i] for i in columns)
+                            for row in self.block]
+
+    def _read_copy(self, text):
+        """Copy the type and the data of a set into another (see dedup.py).
+        The settings of the set that is copied to follow the copy."""
+        match = _COPY.match(text)
+        if not match:
+            message = "can not read data copy: '@%s'" % text
+            raise ValueError(message)
+        indices = map(int, match.groups())
+        source = self._get_dataset(self._get_graph(indices[0]), indices[1])
+        dataset = self._get_dataset(self._get_graph(indices[2]), indices[3])
+        dataset.type = source.type
+        block = source._unused_data_block()
+        if block is not None:
+            dataset._set_data_block(block)
+        elif numpy is not None and isinstance(source.data, numpy.ndarray):
+            dataset.data = source.data.copy()
+        else:
+            dataset.data = list(source.data)
+        if block is None and not len(dataset.data):
+            self.block_start.pop(indices[2], None)
+
+    def _get_graph(self, index):
+        """Return the graph with the given index, adding it if needed."""
+        try:
+            return self.graphs[index]
+        except KeyError:
+            pass
+        graph = Graph(self.grace, index)
+        self.grace.graphs.append(graph)
+        self.graphs[index] = graph
+        return graph
+
+    def _get_dataset(self, graph, index):
+        """Return the set with the given index, adding it if needed."""
+        key = (graph.index, index)
+        try:
+            return self.datasets[key]
+        except KeyError:
+            pass
+        dataset = DataSet(graph, [], index)
+        graph.datasets.append(dataset)
+        self.datasets[key] = dataset
+
+        # (the sets are almost always added in order, at the end)
+        indices = self.set_indices.setdefault(graph.index, [])
+        place = bisect.bisect(indices, index)
+        indices.insert(place, index)
+        if place < self.block_start.get(graph.index, 0):
+            self.block_start[graph.index] = place
+        return dataset
+
+    def _finish(self):
+        grace = self.grace
+        if self.colors:
+            grace.colors = ColorScheme(self.colors)
+        if self.fonts:
+            grace.fonts = FontSet(self.fonts)
+
+        # keep graphs and sets in the order of their indices, so that new
+        # ones get the next free index
+        grace.graphs.sort(key=lambda graph: graph.index)
+        if grace.graphs:
+            grace._graphIndex = grace.graphs[-1].index + 1
+        for graph in grace.graphs:
+            graph.datasets.sort(key=lambda dataset: dataset.index)
+            if graph.datasets:
+                graph._datasetIndex = graph.datasets[-1].index + 1
+        grace.get_canvas_dimensions()
+        return grace
+
+def parse_agr(lines, cls=Grace, array=None, strict=False, directory=None):
+    """Build a Grace from the lines of a Grace project file (any iterable
+    of strings, for example an open file)."""
+    return AgrParser(cls, array, strict, directory).parse(lines)
+
+def read_agr(filename, cls=Grace, array=None, strict=False, lazy=False):
+    """Read a Grace project file into a Grace instance (see AgrParser).  If
+    lazy is True, the data blocks stay in the (memory mapped) file until
+    they are used.  A compressed file (see compression.py) is read through
+    its decompressor, and always in full, since it can not be mapped.  Data
+    files are found relative to the directory of the project file."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    if is_compressed(filename):
+        stream = open_project(filename)
+        try:
+            return parse_agr(iter_lines(stream), cls, array, strict,
+                             directory)
+        finally:
+            stream.close()
+
+    stream = open(filename, 'rb')
+    try:
+        if lazy and os.fstat(stream.fileno()).st_size:
+            mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            parser = AgrParser(cls, array, strict, directory)
+            return parser.parse_mapped(mapped, os.path.abspath(filename))
+        return parse_agr(stream, cls, array, strict, directory)
+    finally:
+        stream.close()
@@ -0,0 +1,500 @@
+"""Rendering of Grace projects to image files with gracebat.
+
+Grace.write_file renders one project at a time.  A RenderPool keeps a
+number of long-lived worker threads that each pipe projects into a
+renderer process, so that many figures can be rendered concurrently on all
+cores, with a timeout and the error output captured for every job.  A
+RenderCache stores rendered files by the content of their project, so that
+rendering an unchanged project again only copies a file.
+"""
+import os
+import re
+import time
+import signal
+import Queue
+import shutil
+import hashlib
+import tempfile
+import threading
+import traceback
+import subprocess
+
+from compression import split_compression
+
+# dictionary for converting file extensions to proper gracebat file types
+EXTENSION_FILETYPES = {"eps":"EPS",
+                       "ps":"PostScript",
+                       "mif":"MIF",
+                       "svg":"SVG",
+                       "pnm":"PNM",
+                       "jpg":"JPEG",
+                       "jpeg":"JPEG",
+                       "png":"PNG",
+                       }
+
+# command that renders a project read from standard input.  it is filled in
+# with the gracebat file type and the name of the output file.
+GRACEBAT_COMMAND = \
+    'gracebat -hardcopy -hdevice %(filetype)s -printfile "%(filename)s" -pipe'
+
+def guess_filetype(filename, filetype=None):
+    """Return the gracebat file type for filename.  Grace project files
+    give 'agr' (also when they are compressed, see compression.py).  An
+    explicitly given filetype is returned as is."""
+
+    # find extension of file (of a project file, before the compression
+    # suffix)
+    project = split_compression(filename)[0]
+    if project.lower().endswith('.agr'):
+        filename = project
+    root,ext = os.path.splitext(filename)
+    ext = ext[1:].lower()
+
+    if ext=="agr" or (filetype and filetype.lower() == 'agr'):
+        return 'agr'
+    elif ext in EXTENSION_FILETYPES and filetype is None:
+        return EXTENSION_FILETYPES[ext]
+    elif filetype is None:
+        message = """
+Grace.write_file tries to guess the gracebat file type from the given
+file name.  In this case, Grace.write_file does not recognize the file
+type of file '%s'.  Please specify the gracebat file type manually
+using the 'filetype' keyword argument.
+"""%(filename)
+        raise TypeError, message
+    return filetype
+
+def render_command(filename, filetype, command=GRACEBAT_COMMAND):
+    """Return the shell command that renders a project to filename."""
+    return command % {'filetype': filetype, 'filename': filename}
+
+if os.name == 'posix':
+    _new_process_group = os.setsid
+else:
+    _new_process_group = None
+
+def _kill(process):
+    """Kill a renderer process (and its process group on posix)."""
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass
+
+def _remove(filename):
+    """Remove a file if it is there."""
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+class RenderResult(object):
+    """The outcome of rendering one project.  error is None if the
+    renderer succeeded, and otherwise holds the captured error output (or
+    the traceback of the exception that was raised)."""
+    def __init__(self, filename, filetype):
+        self.filename = filename
+        self.filetype = filetype
+        self.returncode = None
+        self.error = None
+        self.seconds = None
+
+    def __nonzero__(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.error is None:
+            status = 'ok'
+        else:
+            status = 'failed'
+        return '<RenderResult %s (%s) %s in %.3fs>' % \
+            (self.filename, self.filetype, status, self.seconds or 0.0)
+
+def failed_result(filename, filetype=None):
+    """Return the RenderResult of a file that failed before it was
+    rendered, with the traceback of the exception that is being handled."""
+    result = RenderResult(filename, filetype)
+    result.error = traceback.format_exc()
+    result.seconds = 0.0
+    return result
+
+class _Job(object):
+    """A project waiting to be rendered by a worker of a RenderPool."""
+    def __init__(self, project, filename, filetype, timeout):
+        self.project = project
+        self.timeout = timeout
+        self.result = RenderResult(filename, filetype)
+        self.done = threading.Event()
+
+def _write_project(project, stream):
+    """Write a Grace instance (or an already serialized project) to a
+    stream."""
+    if isinstance(project, str):
+        stream.write(project)
+    else:
+        project.write_to(stream)
+
+class RenderPool(object):
+    """A pool of render workers.
+
+    workers   number of projects that are rendered at the same time
+              (default: number of cores)
+    command   shell command that renders a project from standard input,
+              with %(filetype)s and %(filename)s fields (default:
+              GRACEBAT_COMMAND).  Any stand-in renderer can be used here.
+    timeout   default number of seconds after which a render is killed
+              (None to wait forever)
+    """
+    def __init__(self, workers=None, command=GRACEBAT_COMMAND, timeout=None):
+        if workers is None:
+            try:
+                import multiprocessing
+                workers = multiprocessing.cpu_count()
+            except (ImportError, NotImplementedError):
+                workers = 1
+        if workers < 1:
+            message = 'a RenderPool needs at least one worker (got %i)' % \
+                      workers
+            raise ValueError(message)
+
+        self.workers = workers
+        self.command = command
+        self.timeout = timeout
+
+        # the worker threads are started when the first job is submitted
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start(self):
+        self._lock.acquire()
+        try:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+        finally:
+            self._lock.release()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            try:
+                self._run(job)
+            finally:
+                job.done.set()
+
+    def _run(self, job):
+        """Render one job in a new renderer process and record the
+        result."""
+        result = job.result
+        command = render_command(result.filename, result.filetype,
+                                 self.command)
+
+        # the output of the renderer goes to temporary files, so that a
+        # chatty renderer can never block while we are still writing to it
+        output = tempfile.TemporaryFile()
+        timedOut, aborted = [], []
+        start = time.time()
+        try:
+            # on posix, the renderer gets its own process group so that a
+            # timeout kills the shell and everything it started
+            process = subprocess.Popen(command, shell=True,
+                                       stdin=subprocess.PIPE,
+                                       stdout=output, stderr=output,
+                                       preexec_fn=_new_process_group)
+            timer = None
+            if job.timeout is not None:
+                def kill():
+                    timedOut.append(True)
+                    _kill(process)
+                timer = threading.Timer(job.timeout, kill)
+                timer.start()
+            try:
+                try:
+                    _write_project(job.project, process.stdin)
+                    process.stdin.close()
+                except IOError:
+                    # the renderer went away; its output tells why
+                    if not timedOut:
+                        result.error = traceback.format_exc()
+                except Exception:
+                    # the project could not be written whole.  the renderer
+                    # is killed before it sees the end of its input, since
+                    # it would render what it got so far
+                    aborted.append(traceback.format_exc())
+                    _kill(process)
+                    try:
+                        process.stdin.close()
+                    except IOError:
+                        pass
+                result.returncode = process.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+        except Exception:
+            result.error = traceback.format_exc()
+        result.seconds = time.time() - start
+
+        if timedOut:
+            result.error = 'rendering %s timed out after %s seconds' % \
+                (result.filename, job.timeout)
+        elif aborted:
+            result.error = aborted[0]
+            _remove(result.filename)
+        elif result.returncode:
+            output.seek(0)
+            message = output.read().strip()
+            result.error = message or \
+                '%s exited with status %i' % (command, result.returncode)
+        output.close()
+
+    def submit(self, grace, filename, filetype=None, timeout=None):
+        """Queue grace to be rendered to filename and return the job.  Call
+        wait(job) to get its RenderResult.  grace can also be a project
+        that was already serialized to a string."""
+        filetype = guess_filetype(filename, filetype)
+        if filetype == 'agr':
+            message = 'use Grace.write_agr to write .agr files (%s)' % \
+                      filename
+            raise ValueError(message)
+        if timeout is None:
+            timeout = self.timeout
+        if not self._threads:
+            self._start()
+        job = _Job(grace, filename, filetype, timeout)
+        self._queue.put(job)
+        return job
+
+    def wait(self, job):
+        """Block until job is rendered and return its RenderResult."""
+        # waiting with a timeout keeps the main thread responsive to
+        # KeyboardInterrupt
+        while not job.done.wait(0.1):
+            pass
+        return job.result
+
+    def render(self, grace, filename, filetype=None, timeout=None):
+        """Render grace to filename and return the RenderResult."""
+        return self.wait(self.submit(grace, filename, filetype, timeout))
+
+    def render_many(self, jobs, timeout=None):
+        """Render a sequence of (grace, filename) or (grace, filename,
+        filetype) tuples concurrently and return their RenderResults in
+        the same order.  A job that can not be submitted (a file type that
+        is not known, say) only fails its own RenderResult."""
+        submitted = []
+        for job in jobs:
+            try:
+                submitted.append(self.submit(*job, **{'timeout': timeout}))
+            except Exception:
+                submitted.append(failed_result(job[1]))
+        return [self.wait(job) if isinstance(job, _Job) else job
+                for job in submitted]
+
+    def close(self):
+        """Stop the workers once all queued jobs are rendered."""
+        for thread in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+# the time of the timestamp changes every time a project is written, and
+# is left out when computing the key of a project in a RenderCache
+_TIMESTAMP_TIME = re.compile(r'^@timestamp def ".*"[ ]*$', re.MULTILINE)
+
+# versions of the renderers, by command, found by RenderCache
+_renderer_versions = {}
+
+def renderer_version(command=GRACEBAT_COMMAND):
+    """Return the version string of the renderer used by command (the
+    output of 'gracebat -version'), or 'unknown' if it can not be run."""
+    try:
+        return _renderer_versions[command]
+    except KeyError:
+        pass
+    program = command.split()[0]
+    try:
+        process = subprocess.Popen([program, '-version'],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT)
+        version = process.communicate()[0].strip() or 'unknown'
+    except OSError:
+        version = 'unknown'
+    _renderer_versions[command] = version
+    return version
+
+def project_key(grace, filetype, version=''):
+    """Return the hex digest that identifies the rendering of a project:
+    the sha1 of the serialized project (without the time of the timestamp),
+    the file type and the version of the renderer."""
+    digest = hashlib.sha1()
+    digest.update('%s\n%s\n' % (filetype, version))
+    if isinstance(grace, str):
+        chunks = [grace]
+    else:
+        chunks = grace.iter_lines()
+    for chunk in chunks:
+        if '@timestamp def' in chunk:
+            chunk = _TIMESTAMP_TIME.sub('', chunk)
+        digest.update(chunk)
+        digest.update('\n')
+    return digest.hexdigest()
+
+# mode of the files in the cache, which are never changed once stored
+STORED_FILE_MODE = 0444
+
+def _place(source, filename, link=False):
+    """Put a copy of file source at filename, as a hard link if link is
+    True and that is possible."""
+    if os.path.exists(filename):
+        os.remove(filename)
+    if link:
+        try:
+            os.link(source, filename)
+            return
+        except (OSError, AttributeError):
+            pass
+    shutil.copyfile(source, filename)
+
+class RenderCache(object):
+    """An on-disk cache of rendered projects.
+
+    Rendered files are stored by the key of their project (see project_key)
+    so that rendering an unchanged project again copies (or hard links) the
+    stored file instead of running gracebat.  The stored files are read
+    only.  A file that is written as a hard link (link=True) is the stored
+    file itself, so it is read only too, and its time changes whenever the
+    stored file is used.
+
+    directory   where rendered files are stored (default: ~/.cache/pygrace)
+    max_bytes   total size of the stored files; the least recently used
+                files are removed beyond that (None for no limit)
+    command     renderer command (see RenderPool)
+    version     version of the renderer that goes into the key (default:
+                found from 'gracebat -version')
+    link        hard link cached files to their destination instead of
+                copying them (default: False)
+    """
+    def __init__(self, directory=None, max_bytes=500*1024*1024,
+                 command=GRACEBAT_COMMAND, version=None, link=False):
+        if directory is None:
+            directory = os.path.join(os.path.expanduser('~'), '.cache',
+                                     'pygrace')
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.command = command
+        self.version = version
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '<RenderCache %s: %i hits, %i misses>' % \
+            (self.directory, self.hits, self.misses)
+
+    def path(self, grace, filetype):
+        """Return the file in which the rendering of grace is stored."""
+        if self.version is None:
+            self.version = renderer_version(self.command)
+        key = project_key(grace, filetype,
+                          '%s\n%s' % (self.version, self.command))
+        return os.path.join(self.directory, '%s.%s' % (key, filetype.lower()))
+
+    def write_file(self, grace, filename, filetype=None):
+        """Render grace to filename like Grace.write_file, using the stored
+        file if the same project was rendered before.  Returns True on a
+        cache hit."""
+        filetype = guess_filetype(filename, filetype)
+        if filetype == 'agr':
+            grace.write_agr(filename)
+            return False
+
+        stored = self.path(grace, filetype)
+        if os.path.exists(stored):
+            self.hits += 1
+            # touching the stored file marks it as recently used
+            os.utime(stored, None)
+            _place(stored, filename, self.link)
+            return True
+
+        # render into the cache directory and move the file in place only
+        # once it is complete, so that a failed render is never stored
+        self.misses += 1
+        handle, partial = tempfile.mkstemp(dir=self.directory,
+                                           suffix='.partial')
+        os.close(handle)
+        os.remove(partial)
+        try:
+            pipeInput = os.popen(render_command(partial, filetype,
+                                                self.command), 'w')
+            _write_project(grace, pipeInput)
+            status = pipeInput.close()
+            if status or not os.path.exists(partial):
+                message = 'rendering %s failed' % filename
+                if status:
+                    message += ' (exit status %i)' % (status >> 8)
+                raise IOError(message)
+            os.chmod(partial, STORED_FILE_MODE)
+            os.rename(partial, stored)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        _place(stored, filename, self.link)
+        self.evict()
+        return False
+
+    def size(self):
+        """Return the total size in bytes of the stored files."""
+        return sum(size for (mtime, size, path) in self._entries())
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.partial'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+        return entries
+
+    def evict(self, max_bytes=None):
+        """Remove the least recently used files until the stored files
+        take at most max_bytes (default: self.max_bytes)."""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        if max_bytes is None:
+            return
+        entries = self._entries()
+        total = sum(size for (mtime, size, path) in entries)
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """Remove all stored files and reset the counters."""
+        self.evict(0)
+        self.hits = self.misses = 0
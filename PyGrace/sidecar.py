@@ -0,0 +1,159 @@
+"""Data of the sets of a project in files of their own, next to the project
+(see Grace.write_agr with data_mode='sidecar').
+
+The project then only holds the directives that read the data:
+
+    @read block "data/data_<hash>.dat"
+    @block xydy "1:2:3"
+
+The names of the files are relative to the directory of the project, so
+that the project can be moved along with its files.
+
+Each file is named after a hash of what is in it, so sets (and projects,
+such as styled variants of one figure) with the same data share one file,
+and a file that is already there is not written again.  Within one write,
+the same data is also only formatted once.  The files are text in the
+format of the precision of the set (as in the project itself), since that
+is what xmgrace reads.
+
+xmgrace reads a block into the first set of the current graph that has no
+data yet, so only the sets with indices 0, 1, 2, ... of a graph (up to the
+first missing index or set without data) are read from files; the other
+sets are written in the project as usual.  The hidden flag and the comment
+of each set are written again after its block, since reading the block
+changes them.
+"""
+import os
+import hashlib
+import tempfile
+
+from dataset import DATA_COLUMNS
+
+# prefix and extension of the names of the data files
+DATA_FILE_PREFIX = 'data_'
+DATA_FILE_EXTENSION = '.dat'
+DATA_FILE_MODE = 0644
+
+def _columns(dataset):
+    """Return the columns of the block that xmgrace reads, '1:2' for 'xy'."""
+    return ':'.join(str(i + 1) for i in xrange(DATA_COLUMNS[dataset.type]))
+
+def _source(dataset):
+    """Return where the data of dataset is written from: the block of the
+    file it was read from lazily while it is not used (see reader.py), or
+    the data."""
+    block = dataset._unused_data_block()
+    if block is not None:
+        return block
+    return dataset.data
+
+def _has_rows(dataset):
+    block = dataset._unused_data_block()
+    if block is not None:
+        return block.end > block.start
+    return len(dataset.data) > 0
+
+def _size(source):
+    try:
+        return len(source)
+    except TypeError:
+        return source.end - source.start
+
+def _from_files(graph):
+    """Return the sets of graph that are read from files (see above)."""
+    result = []
+    for position, dataset in enumerate(sorted(graph.datasets,
+                                              key=lambda d: d.index)):
+        if dataset.index != position or not _has_rows(dataset):
+            break
+        result.append(dataset)
+    return result
+
+class Sidecar(object):
+    """Writes the data of the sets of a project to files in directory, and
+    gives the lines of the project that read them.  The names of the files
+    in those lines are relative to project_dir (if it is given, and
+    absolute otherwise).  written and reused count the files that were
+    written and that were already there."""
+    def __init__(self, directory, project_dir=None):
+        self.directory = os.path.abspath(directory)
+        self.project_dir = project_dir
+        self.written = 0
+        self.reused = 0
+        self._files = {}
+
+    def iter_lines(self, grace):
+        """Iterate over the chunks of the project that take the place of
+        the data blocks (see Grace.iter_lines)."""
+        yield '@autoscale onread none'
+        for graph in grace.graphs:
+            fromFiles = _from_files(graph)
+            if fromFiles:
+                yield '@with g%i' % graph.index
+            for dataset in fromFiles:
+                yield '@read block "%s"' % self.block_name(dataset)
+                yield '@block %s "%s"' % (dataset.type, _columns(dataset))
+                yield '@    s%i hidden %s' % (dataset.index, dataset.hidden)
+                yield '@    s%i comment "%s"' % (dataset.index,
+                                                  dataset.comment)
+            readIds = set(id(dataset) for dataset in fromFiles)
+            for dataset in graph.datasets:
+                if id(dataset) not in readIds:
+                    for chunk in grace._iter_dataset_lines(graph, dataset):
+                        yield chunk
+
+    def block_name(self, dataset):
+        """Return the name of the file with the data of dataset as the
+        project reads it (see data_file)."""
+        filename = self.data_file(dataset)
+        if self.project_dir is None:
+            return filename
+        return os.path.relpath(filename, os.path.abspath(self.project_dir))
+
+    def data_file(self, dataset):
+        """Return the (absolute) name of the file with the data of dataset,
+        writing it if it is not there yet."""
+        source = _source(dataset)
+        key = (id(source), dataset.type, dataset.precision,
+               dataset._selection())
+        try:
+            known, size, filename = self._files[key]
+        except KeyError:
+            known = None
+        if known is source and size == _size(source):
+            return filename
+
+        # the text goes to a new file, which is renamed after the hash of
+        # its contents once it is complete
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        handle, partial = tempfile.mkstemp(dir=self.directory,
+                                           suffix=DATA_FILE_EXTENSION)
+        os.chmod(partial, DATA_FILE_MODE)
+        outfile = os.fdopen(handle, 'w')
+        digest = hashlib.sha1()
+        try:
+            for chunk in dataset._iter_data():
+                if chunk == '&':
+                    continue
+                digest.update(chunk)
+                digest.update('\n')
+                outfile.write(chunk)
+                outfile.write('\n')
+            outfile.close()
+        except:
+            outfile.close()
+            os.remove(partial)
+            raise
+        filename = os.path.join(self.directory, DATA_FILE_PREFIX +
+                                digest.hexdigest() + DATA_FILE_EXTENSION)
+        if os.path.exists(filename):
+            os.remove(partial)
+            self.reused += 1
+        else:
+            os.rename(partial, filename)
+            self.written += 1
+
+        # (the data is kept with the name, so that its id is not reused)
+        self._files[key] = (source, _size(source), filename)
+        return filename
@@ -0,0 +1,82 @@
+"""Visual error and speed of decimating DataSet data (see decimate.py).
+
+A noisy random walk with a few spikes is decimated with 'minmax' and
+'lttb' to several point counts.  Both the full and the decimated line are
+drawn on a raster of the size of the view of a default graph at
+DECIMATE_DPI, and the error is how far (in dots) the lowest and highest
+dot of the line in each column moved.  Run from the root of the
+repository (numpy is needed):
+
+    python benchmarks/bench_decimate.py [n_points ...]
+
+The default sizes are 1M and 10M points.
+"""
+import sys
+import time
+
+import numpy
+
+from PyGrace.grace import Grace
+from PyGrace.decimate import decimate, point_budget
+
+def signal(n):
+    """A random walk with noise and a spike every n / 7 points."""
+    random = numpy.random.RandomState(1)
+    x = numpy.arange(n, dtype=float)
+    y = numpy.cumsum(random.normal(0, 1, n)) + random.normal(0, 5, n)
+    y[n // 7::n // 7] += 50 * y.std()
+    return numpy.column_stack((x, y))
+
+def envelope(data, bounds, width, height):
+    """Return the lowest and highest dot that the line through the rows of
+    data covers in each of width columns of a raster of height dots."""
+    xmin, xmax, ymin, ymax = bounds
+    x, y = data[:, 0], data[:, 1]
+
+    # the line is also sampled at both edges of every column, so that a
+    # segment that crosses a column without a point in it is drawn too
+    edges = numpy.linspace(xmin, xmax, width + 1)
+    edgeY = numpy.interp(edges, x, y)
+    columns = numpy.concatenate((
+        ((x - xmin) / (xmax - xmin) * width).astype(int),
+        numpy.arange(width + 1), numpy.arange(width + 1) - 1))
+    dots = (numpy.concatenate((y, edgeY, edgeY)) - ymin) / \
+        (ymax - ymin) * (height - 1)
+    inside = (columns >= 0) & (columns < width)
+    columns, dots = columns[inside], dots[inside]
+    low = numpy.empty(width)
+    low.fill(numpy.inf)
+    high = numpy.empty(width)
+    high.fill(-numpy.inf)
+    numpy.minimum.at(low, columns, dots)
+    numpy.maximum.at(high, columns, dots)
+    return low, high
+
+def main(sizes):
+    graph = Grace().add_graph()
+    default = point_budget(graph)
+    width, height = default // 2, 1000
+    for n in sizes:
+        data = signal(n)
+        bounds = (data[0, 0], data[-1, 0],
+                  data[:, 1].min(), data[:, 1].max())
+        fullLow, fullHigh = envelope(data, bounds, width, height)
+        print '%i points, raster of %i x %i dots' % (n, width, height)
+        print '    %-8s %8s %8s %10s %10s %10s' % \
+            ('method', 'budget', 'kept', 'seconds', 'mean err', 'max err')
+        for method in ('minmax', 'lttb'):
+            for budget in (500, 1000, 2000, default, 4 * default):
+                start = time.time()
+                kept = decimate(data, method, budget)
+                elapsed = time.time() - start
+                low, high = envelope(kept, bounds, width, height)
+                error = numpy.concatenate((abs(low - fullLow),
+                                           abs(high - fullHigh)))
+                print '    %-8s %8i %8i %10.3f %10.2f %10.2f' % \
+                    (method, budget, len(kept), elapsed,
+                     error.mean(), error.max())
+                sys.stdout.flush()
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000, 10000000]
+    main(sizes)
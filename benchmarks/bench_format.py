@@ -0,0 +1,65 @@
+"""Throughput of writing DataSet data blocks (DataSet._iter_data).
+
+Compares the old row by row formatting (' '.join(map(str, row))) with the
+block formatter for lists of tuples and, if numpy is installed, for numpy
+arrays, at several precisions.  Run from the root of the repository:
+
+    python benchmarks/bench_format.py [n_points ...]
+
+The default sizes are 1M and 10M points.
+"""
+import sys
+import time
+import random
+
+from PyGrace.grace import Grace
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def old_repr_data(data):
+    """The formatting that was used before the block formatter."""
+    l = [' '.join(map(str, data[i])) for i in range(len(data))]
+    l.append('&')
+    return '\n'.join(l)
+
+def throughput(function):
+    """Return (MB written, MB/s) of a function that yields strings."""
+    start = time.time()
+    nBytes = 0
+    for chunk in function():
+        nBytes += len(chunk) + 1
+    elapsed = time.time() - start
+    return nBytes / 1e6, nBytes / 1e6 / elapsed
+
+def report(label, function):
+    megabytes, rate = throughput(function)
+    print '    %-28s %8.1f MB %8.1f MB/s' % (label, megabytes, rate)
+    sys.stdout.flush()
+
+def main(sizes):
+    random.seed(1)
+    for n in sizes:
+        print '%i points (xy)' % n
+        rows = [(i * 0.001, random.gauss(0, 1)) for i in xrange(n)]
+
+        graph = Grace().add_graph()
+        dataset = graph.add_dataset(rows)
+        report('old row by row', lambda: [old_repr_data(rows)])
+        for precision in (None, 'repr', 6, '%.4f'):
+            dataset.precision = precision
+            report('list, precision=%r' % (precision,), dataset._iter_data)
+
+        if numpy is not None:
+            array = numpy.array(rows)
+            dataset = graph.add_dataset(array)
+            for precision in (None, 'repr', 6, '%.4f'):
+                dataset.precision = precision
+                report('array, precision=%r' % (precision,),
+                       dataset._iter_data)
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000, 10000000]
+    main(sizes)
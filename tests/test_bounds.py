@@ -0,0 +1,122 @@
+"""The limits of the data of sets, which autoscale uses, and which are kept
+only as long as the data can not have changed."""
+import unittest
+
+from PyGrace.grace import Grace
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class CountingRows(list):
+    """A list of rows that counts how often it is walked."""
+    walks = 0
+
+    def __iter__(self):
+        CountingRows.walks += 1
+        return list.__iter__(self)
+
+def _world(graph):
+    return tuple(graph.get_world())
+
+class InPlaceEditTest(unittest.TestCase):
+    def setUp(self):
+        self.grace = Grace()
+        self.graph = self.grace.add_graph()
+
+    def test_list_row_replaced(self):
+        dataset = self.graph.add_dataset([(0, 0), (1, 3), (2, 9), (3, 4)])
+        self.graph.autoscale()
+        self.assertEqual(_world(self.graph), (0, 0, 3, 9))
+        dataset.data[0] = (-50, -5)
+        self.graph.autoscale()
+        self.assertEqual(_world(self.graph), (-50, -5, 5, 9))
+        self.assertEqual(self.graph.yaxis.tick.major, 2)
+        text = str(self.grace)
+        self.assertTrue('@    world xmin -50.0\n' in text)
+        self.assertTrue('@    world ymin -5.0\n' in text)
+
+    def test_rows_edited_between_limits(self):
+        dataset = self.graph.add_dataset([[1, 1], [2, 2]])
+        self.assertEqual(dataset.limits(), (1, 1, 2, 2))
+        dataset.data[1][1] = 7
+        self.assertEqual(dataset.limits(), (1, 1, 2, 7))
+        self.assertEqual(dataset.smallest_positive(), (1, 1))
+        dataset.data[0][0] = -1
+        self.assertEqual(dataset.smallest_positive(), (2, 1))
+
+    def test_type_and_hidden(self):
+        dataset = self.graph.add_dataset([(1, 5, 2), (2, 6, 1)])
+        self.assertEqual(self.graph.limits(), (1, 5, 2, 6))
+        dataset.type = 'xydy'
+        self.assertEqual(self.graph.limits(), (1, 3, 2, 7))
+        other = self.graph.add_dataset([(10, 10)])
+        self.assertEqual(self.graph.limits(), (1, 3, 10, 10))
+        other.hidden = 'true'
+        self.assertEqual(self.graph.limits(), (1, 3, 2, 7))
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_array_changed_in_place(self):
+        data = numpy.array([[0., 1.], [1., 2.], [2., 4.]])
+        dataset = self.graph.add_dataset(data)
+        self.assertEqual(dataset.limits(), (0, 1, 2, 4))
+        data *= -1
+        self.assertEqual(dataset.limits(), (-2, -4, 0, -1))
+        data[[0, 2]] = data[[2, 0]]
+        data[1, 1] = 100
+        self.assertEqual(dataset.limits(), (-2, -4, 0, 100))
+
+class KeptLimitsTest(unittest.TestCase):
+    def setUp(self):
+        self.grace = Grace()
+        self.graph = self.grace.add_graph()
+
+    def test_tuples_are_kept(self):
+        rows = tuple((i, i * i) for i in range(10))
+        dataset = self.graph.add_dataset(rows)
+        dataset.limits()
+        self.assertTrue('_storedBounds' in dataset.__dict__)
+        dataset.data = ((1, 1), [2, 2])
+        dataset.limits()
+        self.assertFalse('_storedBounds' in dataset.__dict__)
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_read_only_arrays_are_kept(self):
+        data = numpy.array([[0., 1.], [1., 2.]])
+        view = data[:]
+        view.flags.writeable = False
+        dataset = self.graph.add_dataset(view)
+        dataset.limits()
+
+        # the array the view is of can still be changed
+        self.assertFalse('_storedBounds' in dataset.__dict__)
+        data.flags.writeable = False
+        dataset.limits()
+        self.assertTrue('_storedBounds' in dataset.__dict__)
+        data.flags.writeable = True
+        data[0, 0] = -3
+        self.assertEqual(dataset.limits(), (-3, 1, 1, 2))
+
+    def test_autoscale_walks_each_set_once(self):
+        graphs = [self.graph] + [self.grace.add_graph() for i in range(3)]
+        datasets = []
+        for i, graph in enumerate(graphs):
+            graph.yaxis.set_log()
+            rows = CountingRows((x, (x - 2) * (i + 1)) for x in range(6))
+            datasets.append(graph.add_dataset(rows))
+        CountingRows.walks = 0
+        datasets[0]._bounds()
+        walksPerSet = CountingRows.walks
+
+        CountingRows.walks = 0
+        self.grace.autoscale_same()
+        self.assertEqual(CountingRows.walks, walksPerSet * len(datasets))
+
+        # and again after the autoscale, since the rows may change
+        CountingRows.walks = 0
+        self.grace.autoscale_same()
+        self.assertEqual(CountingRows.walks, walksPerSet * len(datasets))
+
+if __name__ == '__main__':
+    unittest.main()
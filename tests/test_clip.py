@@ -0,0 +1,117 @@
+"""Clipping the rows of a set to the world of its graph when it is written
+(clip.py)."""
+import unittest
+
+from PyGrace import base
+from PyGrace.grace import Grace
+from PyGrace.clip import outcodes, rows_to_keep, clip_rows, \
+     LEFT, RIGHT, BELOW, ABOVE, NO_LINE, SEGMENTS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _columns(rows):
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+def _written_rows(dataset):
+    rows = []
+    for chunk in dataset._iter_data():
+        for line in chunk.split('\n'):
+            if line != '&':
+                rows.append(tuple(float(v) for v in line.split()))
+    return rows
+
+class ClipTest(unittest.TestCase):
+    world = (0, 0, 10, 10)
+
+    def codes(self, rows):
+        x, y = _columns(rows)
+        return outcodes((x, x), (y, y), self.world)
+
+    def test_outcodes(self):
+        rows = [(5, 5), (-1, 5), (11, 5), (5, -1), (5, 11), (-1, 11)]
+        self.assertEqual(self.codes(rows),
+                         [0, LEFT, RIGHT, BELOW, ABOVE, LEFT | ABOVE])
+
+    def test_world_in_either_order(self):
+        x, y = _columns([(-1, 5), (5, 5)])
+        self.assertEqual(outcodes((x, x), (y, y), (10, 10, 0, 0)),
+                         [LEFT, 0])
+
+    def test_line_keeps_the_ends_of_each_run_beyond(self):
+        rows = [(-3, 5), (-2, 5), (-1, 5), (5, 5), (11, 5), (12, 5),
+                (13, 5), (5, 6)]
+        self.assertEqual(rows_to_keep(self.codes(rows), 1),
+                         [2, 3, 4, 6, 7])
+
+    def test_no_line_keeps_what_is_seen(self):
+        rows = [(-3, 5), (5, 5), (11, 5), (6, 6)]
+        self.assertEqual(rows_to_keep(self.codes(rows), NO_LINE), [1, 3])
+
+    def test_segment_that_crosses_the_world_is_kept(self):
+        # (-1, 5)-(11, 5) crosses the world, (-1, 5)-(-2, 6) does not
+        rows = [(-1, 5), (11, 5), (-1, 5), (-2, 6), (20, 20)]
+        self.assertEqual(rows_to_keep(self.codes(rows), SEGMENTS),
+                         [0, 1, 4])
+
+    def test_one_row_stays(self):
+        rows = [(20, 20), (30, 30)]
+        x, y = _columns(rows)
+        self.assertEqual(clip_rows(rows, (x, x), (y, y), self.world,
+                                   NO_LINE), [(20, 20)])
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_arrays_keep_the_same_rows(self):
+        rows = [(i - 20, (i * 7) % 30 - 10) for i in range(60)]
+        x, y = _columns(rows)
+        array = numpy.array(rows, dtype=float)
+        for lineType in (NO_LINE, 1, SEGMENTS, 5):
+            kept = clip_rows(rows, (x, x), (y, y), self.world, lineType)
+            keptArray = clip_rows(array, (array[:, 0], array[:, 0]),
+                                  (array[:, 1], array[:, 1]), self.world,
+                                  lineType)
+            self.assertEqual(keptArray.tolist(), [list(r) for r in kept])
+
+    def test_written_rows_of_a_clipped_set(self):
+        graph = Grace().add_graph()
+        graph.clip_to_world = True
+        graph.set_world(0, 0, 10, 10)
+        rows = [(x, 5) for x in range(-20, 30)]
+        dataset = graph.add_dataset(rows)
+        written = _written_rows(dataset)
+        self.assertEqual(written[0], (-1, 5))
+        self.assertEqual(written[-1], (11, 5))
+        self.assertEqual(len(written), 13)
+        self.assertEqual(len(dataset.data), 50)
+
+        # a filled set reaches into the world from beyond it
+        dataset.fill.type = 1
+        self.assertEqual(len(_written_rows(dataset)), 50)
+        dataset.fill.type = 0
+        dataset.clip_to_world = False
+        self.assertEqual(len(_written_rows(dataset)), 50)
+
+    def test_clipping_does_not_make_the_styles(self):
+        grace = Grace()
+        graph = grace.add_graph()
+        graph.clip_to_world = True
+        graph.set_world(0, 0, 10, 10)
+        dataset = graph.add_dataset([(x, 5) for x in range(-20, 30)])
+        str(grace)
+        str(grace)
+        self.assertFalse('fill' in dataset.__dict__)
+        self.assertFalse('line' in dataset.__dict__)
+
+        # so writing the project again reuses the string of the graph
+        base.reset_render_stats()
+        str(grace)
+        self.assertEqual(base.render_stats()['Graph'], (1, 0))
+
+        # a set drawn without a line only keeps the rows in the world
+        dataset.line.type = 0
+        self.assertEqual(len(_written_rows(dataset)), 11)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""The colors of a ColorBar for values, and the rectangles that draw it
+(Extensions/colorbar.py)."""
+import unittest
+
+from PyGrace.grace import Grace
+from PyGrace.Extensions.colorbar import ColorBar
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _spans(bar):
+    # a rectangle is drawn from three corners
+    return sorted((min(y for x, y in dataset.data),
+                   max(y for x, y in dataset.data))
+                  for dataset in bar.datasets)
+
+class ColorBarTest(unittest.TestCase):
+    def setUp(self):
+        self.grace = Grace()
+        self.bar = self.grace.add_graph(ColorBar, domain=(0, 7),
+                                        autoscale=False,
+                                        color_range=[2, 3, 4, 5, 6, 7, 8])
+
+    def test_z2color(self):
+        # the colors go from the top of the domain down
+        bar = self.bar
+        self.assertEqual([bar.z2color(z) for z in (0, 0.5, 3.5, 6.99, 7)],
+                         [8, 8, 5, 2, 2])
+        self.assertEqual(bar.z2color(-1), None)
+        self.assertEqual(bar.z2color(7.5), None)
+
+    def test_z2color_array_matches_z2color(self):
+        zs = [-1, 0, 1, 2.5, 6.999, 7, 8]
+        colors = self.bar.z2color_array(zs)
+        expected = [self.bar.z2color(z) for z in zs]
+        if numpy is not None:
+            self.assertEqual(list(colors.mask),
+                             [color is None for color in expected])
+            colors = colors.tolist()
+        self.assertEqual(list(colors), expected)
+
+    def test_z2color_array_of_one_value(self):
+        for z in (-1, 0, 3.5, 7, 8):
+            self.assertEqual(self.bar.z2color_array(z), self.bar.z2color(z))
+        if numpy is not None:
+            self.assertEqual(self.bar.z2color_array(numpy.float64(3.5)), 5)
+            self.assertEqual(self.bar.z2color_array(numpy.array(3.5)), 5)
+            self.assertEqual(self.bar.z2color_array(numpy.nan), None)
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_nan_is_masked(self):
+        colors = self.bar.z2color_array(numpy.array([numpy.nan, 3]))
+        self.assertEqual(colors.mask.tolist(), [True, False])
+        self.assertEqual(colors[1], 5)
+
+    def test_logarithmic(self):
+        bar = self.grace.add_graph(ColorBar, domain=(1, 1000),
+                                   scale='Logarithmic', autoscale=False,
+                                   color_range=[2, 3, 4])
+        zs = [0.5, 1, 9, 11, 999, 1000, 2000]
+        self.assertEqual([bar.z2color(z) for z in zs],
+                         [None, 4, 4, 3, 2, 2, None])
+        colors = bar.z2color_array(zs)
+        if numpy is not None:
+            colors = colors.tolist()
+        self.assertEqual(list(colors), [None, 4, 4, 3, 2, 2, None])
+
+    def test_colors2zs(self):
+        ranges = self.bar.colors2zs()
+        self.assertEqual(len(ranges), 7)
+        self.assertEqual(ranges[0], (0, 1))
+        self.assertEqual(ranges[-1], (6, 7))
+        for color, zs in zip(self.bar.color_range, ranges):
+            self.assertEqual(self.bar.color2zs(color), zs)
+
+    def test_rectangles_are_added_once(self):
+        str(self.bar)
+        rectangles = list(self.bar.datasets)
+        self.assertEqual(len(rectangles), 7)
+        str(self.bar)
+        self.assertEqual(map(id, self.bar.datasets), map(id, rectangles))
+
+        # a new domain replaces them
+        self.bar.set_domain((0, 14), autoscale=False)
+        str(self.bar)
+        self.assertEqual(len(self.bar.datasets), 7)
+        self.assertFalse(id(self.bar.datasets[0]) in map(id, rectangles))
+        self.assertEqual(_spans(self.bar)[0], (0, 2))
+
+    def test_same_neighbouring_colors_share_a_rectangle(self):
+        bar = self.grace.add_graph(ColorBar, domain=(0, 4), autoscale=False,
+                                   color_range=[2, 2, 3, 3])
+        str(bar)
+        self.assertEqual(_spans(bar), [(0, 2), (2, 4)])
+
+    def test_other_sets_stay(self):
+        marker = self.bar.add_dataset([(0.5, 3)])
+        str(self.bar)
+        self.bar.set_domain((1, 2), autoscale=False)
+        str(self.bar)
+        self.assertTrue(id(marker) in map(id, self.bar.datasets))
+        self.assertEqual(len(self.bar.datasets), 8)
+
+if __name__ == '__main__':
+    unittest.main()
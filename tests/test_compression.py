@@ -0,0 +1,49 @@
+"""Writing and reading compressed projects (compression.py)."""
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+
+from PyGrace.grace import Grace
+
+def _lines(grace):
+    return [line for line in str(grace).split('\n')
+            if 'timestamp def' not in line]
+
+class CompressionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.grace = Grace()
+        graph = self.grace.add_graph()
+        graph.add_dataset([(x * 0.1, (x % 13) - 6) for x in range(3000)],
+                          legend='saw')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def round_trip(self, name):
+        filename = os.path.join(self.directory, name)
+        self.grace.write_agr(filename)
+        self.assertEqual(os.listdir(self.directory), [name])
+        read = Grace.read_agr(filename, array=False)
+        self.assertEqual(_lines(read), _lines(self.grace))
+        return filename
+
+    def test_gzip(self):
+        filename = self.round_trip('saw.agr.gz')
+        stream = gzip.open(filename)
+        lines = [line for line in stream.read().split('\n')
+                 if 'timestamp def' not in line]
+        self.assertEqual(lines, _lines(self.grace))
+        stream.close()
+
+    def test_bz2(self):
+        self.round_trip('saw.agr.bz2')
+
+    def test_agr_goes_before_the_suffix(self):
+        self.grace.write_agr(os.path.join(self.directory, 'saw.gz'))
+        self.assertEqual(os.listdir(self.directory), ['saw.agr.gz'])
+
+if __name__ == '__main__':
+    unittest.main()
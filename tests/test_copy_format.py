@@ -0,0 +1,54 @@
+"""Copying the format of one object, or of the defaults of a class, to
+others (copy_format and copy_format_many)."""
+import unittest
+
+from PyGrace.grace import Grace
+from PyGrace.graph import Graph
+from PyGrace.dataset import DataSet
+from PyGrace.base import copy_format_many
+
+class CopyFormatTest(unittest.TestCase):
+    def setUp(self):
+        self.grace = Grace()
+        self.graph = self.grace.add_graph()
+        self.source = self.graph.add_dataset([(0, 0)])
+        self.source.symbol.configure(shape=4, size=0.4, color=2)
+        self.source.line.linestyle = 3
+
+    def test_copy_from_an_object(self):
+        target = self.graph.add_dataset([(1, 1), (2, 2)])
+        target.copy_format(self.source)
+        self.assertEqual(target.symbol.shape, 4)
+        self.assertEqual(target.line.linestyle, 3)
+        self.assertEqual(target.data, [(1, 1), (2, 2)])
+
+    def test_copy_from_a_class_gives_the_defaults(self):
+        self.source.copy_format(DataSet)
+        plain = self.graph.add_dataset([(0, 0)])
+        self.assertEqual(self.source.symbol.shape, plain.symbol.shape)
+        self.assertEqual(self.source.line.linestyle, plain.line.linestyle)
+
+    def test_lists_are_not_shared(self):
+        graph = self.grace.add_graph()
+        graph.xaxis.tick.spec_ticks = [0, 1]
+        other = self.grace.add_graph()
+        other.copy_format(graph)
+        self.assertEqual(other.xaxis.tick.spec_ticks, [0, 1])
+        other.xaxis.tick.spec_ticks.append(2)
+        self.assertEqual(graph.xaxis.tick.spec_ticks, [0, 1])
+
+    def test_copy_format_many(self):
+        targets = [self.graph.add_dataset([(i, i)]) for i in range(5)]
+        copy_format_many(targets, self.source)
+        self.assertEqual([t.symbol.shape for t in targets], [4] * 5)
+        self.assertEqual([t.line.linestyle for t in targets], [3] * 5)
+        self.assertEqual(targets[-1].data, [(4, 4)])
+
+    def test_graph_format_from_class(self):
+        plain = self.grace.add_graph()
+        self.graph.world.xmax = 5
+        self.graph.copy_format(Graph)
+        self.assertEqual(self.graph.world.xmax, plain.world.xmax)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""The extent of the data of each type of DataSet (data_bounds, limits and
+smallest_positive), for lists and arrays."""
+import unittest
+
+from PyGrace.grace import Grace
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# a row of each type, and the limits (xMin, yMin, xMax, yMax) of it and the
+# row (1, 1, 1, 1, 1, 1) together
+ROWS = {'xy':         ((2, 3), (1, 1, 2, 3)),
+        'xydx':       ((2, 3, 0.5), (0, 1, 2.5, 3)),
+        'xydy':       ((2, 3, 0.5), (1, 0, 2, 3.5)),
+        'xydxdy':     ((2, 3, 0.5, 4), (0, -1, 2.5, 7)),
+        'xydxdx':     ((2, 3, 0.5, 4), (-2, 1, 2.5, 3)),
+        'xydydy':     ((2, 3, 0.5, 4), (1, -1, 2, 3.5)),
+        'xydxdxdydy': ((2, 3, 1, 2, 3, 4), (0, -1, 3, 6)),
+        'bardy':      ((2, 3, 5), (1, -2, 2, 8)),
+        'bardydy':    ((2, 3, 5, 6), (1, -3, 2, 8)),
+        'xyhilo':     ((2, 3, 9, -4, 0), (1, -4, 2, 9)),
+        'xyvmap':     ((2, 3, -5, 2), (-3, 1, 2, 5)),
+        'xysize':     ((2, 3, 100), (1, 1, 2, 3)),
+        }
+
+class DataBoundsTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = Grace().add_graph()
+
+    def check(self, array):
+        for dataType, (row, limits) in sorted(ROWS.items()):
+            data = [(1,) * len(row), row]
+            if array:
+                data = numpy.array(data, dtype=float)
+            dataset = self.graph.add_dataset(data, type=dataType)
+            self.assertEqual(dataset.limits(), limits, dataType)
+            x, y = dataset.data_bounds()
+            self.assertEqual((min(x), min(y), max(x), max(y)), limits,
+                             dataType)
+
+    def test_lists(self):
+        self.check(False)
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_arrays(self):
+        self.check(True)
+
+    def test_smallest_positive(self):
+        dataset = self.graph.add_dataset([(-1, 2, 1.5), (0.25, -3, 0.5)],
+                                         type='xydy')
+        self.assertEqual(dataset.smallest_positive(), (0.25, 0.5))
+        dataset.data = [(-1, -2, 0)]
+        self.assertEqual(dataset.smallest_positive(), (None, None))
+
+    def test_hidden_and_empty_sets(self):
+        dataset = self.graph.add_dataset([(1, 2)], hidden='true')
+        self.assertEqual(dataset.limits(), (None, None, None, None))
+        self.assertEqual(dataset.limits(only_visible=False), (1, 2, 1, 2))
+        self.assertEqual(self.graph.add_dataset([]).data_bounds(), ([], []))
+
+if __name__ == '__main__':
+    unittest.main()
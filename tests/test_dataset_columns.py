@@ -0,0 +1,43 @@
+"""The shape of array data must fit the type of a DataSet, whenever either
+of them is set."""
+import unittest
+
+from PyGrace.grace import Grace
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class ColumnsTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = Grace().add_graph()
+
+    def test_array_too_narrow_for_type(self):
+        self.assertRaises(ValueError, self.graph.add_dataset,
+                          numpy.zeros((4, 2)), type='xydy')
+
+    def test_data_replaced_later(self):
+        dataset = self.graph.add_dataset(numpy.zeros((4, 3)), type='xydy')
+        self.assertRaises(ValueError, setattr, dataset, 'data',
+                          numpy.zeros((4, 2)))
+        self.assertRaises(ValueError, setattr, dataset, 'data',
+                          numpy.zeros(4))
+        dataset.data = numpy.ones((5, 3))
+        self.assertEqual(dataset.limits(), (1.0, 0.0, 1.0, 2.0))
+
+    def test_type_changed_later(self):
+        dataset = self.graph.add_dataset(numpy.zeros((4, 2)))
+        self.assertRaises(ValueError, setattr, dataset, 'type', 'xydxdy')
+        self.assertEqual(dataset.type, 'xy')
+        dataset.data = numpy.zeros((4, 4))
+        dataset.type = 'xydxdy'
+
+    def test_lists_and_empty_arrays_are_not_checked(self):
+        dataset = self.graph.add_dataset([(1, 2)])
+        dataset.type = 'xydy'
+        dataset.data = numpy.zeros((0, 2))
+
+if __name__ == '__main__':
+    unittest.main()
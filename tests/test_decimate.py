@@ -0,0 +1,71 @@
+"""Decimating the rows of a set when it is written (decimate.py)."""
+import math
+import unittest
+
+from PyGrace.grace import Grace
+from PyGrace.decimate import minmax, lttb, decimate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _written_rows(dataset):
+    rows = []
+    for chunk in dataset._iter_data():
+        for line in chunk.split('\n'):
+            if line != '&':
+                rows.append(tuple(float(v) for v in line.split()))
+    return rows
+
+class DecimateTest(unittest.TestCase):
+    def setUp(self):
+        self.rows = [(i, math.sin(i * 0.01)) for i in range(5000)]
+        self.rows[1234] = (1234, 50.0)
+        self.rows[4321] = (4321, -50.0)
+
+    def test_minmax_keeps_spikes_and_ends(self):
+        kept = minmax(self.rows, 100)
+        self.assertTrue(len(kept) <= 100)
+        for row in (self.rows[0], self.rows[-1], self.rows[1234],
+                    self.rows[4321]):
+            self.assertTrue(row in kept)
+        self.assertEqual(kept, sorted(kept))
+
+    def test_short_data_is_not_decimated(self):
+        self.assertEqual(minmax(self.rows[:50], 100), self.rows[:50])
+        self.assertEqual(lttb(self.rows[:50], 100), self.rows[:50])
+
+    def test_lttb_keeps_budget_rows(self):
+        kept = lttb(self.rows, 200)
+        self.assertEqual(len(kept), 200)
+        self.assertEqual((kept[0], kept[-1]), (self.rows[0], self.rows[-1]))
+        self.assertTrue(self.rows[1234] in kept)
+
+    def test_unknown_method(self):
+        self.assertRaises(ValueError, decimate, self.rows, 'every', 10)
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_arrays_keep_the_same_rows(self):
+        array = numpy.array(self.rows)
+        for method in (minmax, lttb):
+            for budget in (7, 100, 333):
+                self.assertEqual(method(array, budget).tolist(),
+                                 [list(row) for row in
+                                  method(self.rows, budget)])
+
+    def test_dataset_takes_the_method_of_its_graph(self):
+        graph = Grace().add_graph()
+        graph.view.xmax = graph.view.xmin + 0.1
+        dataset = graph.add_dataset(self.rows)
+        self.assertEqual(len(_written_rows(dataset)), 5000)
+        graph.decimate = 'minmax'
+        written = _written_rows(dataset)
+        self.assertTrue(len(written) < 5000)
+        self.assertTrue((1234, 50.0) in written)
+        dataset.decimate = False
+        self.assertEqual(len(_written_rows(dataset)), 5000)
+        self.assertRaises(ValueError, setattr, dataset, 'decimate', 'every')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Writing data that several sets share only once (data_mode 'dedup',
+see dedup.py)."""
+import os
+import shutil
+import tempfile
+import unittest
+
+import PyGrace.dedup
+from PyGrace.grace import Grace
+from PyGrace.dedup import DEDUP_MIN_ROWS
+
+def _lines(grace):
+    return [line for line in str(grace).split('\n')
+            if 'timestamp def' not in line]
+
+class DedupTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'shared.agr')
+        self.grace = Grace()
+        self.shared = [(i, i * 0.125) for i in range(20 * DEDUP_MIN_ROWS)]
+        left = self.grace.add_graph()
+        right = self.grace.add_graph()
+        left.add_dataset(self.shared, legend='left')
+        right.add_dataset(self.shared, legend='right')
+        right.add_dataset(list(self.shared), comment='equal copy')
+        left.add_dataset(self.shared[:10])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_counts(self):
+        dedup = self.grace.write_agr(self.filename, data_mode='dedup')
+        self.assertEqual((dedup.blocks, dedup.copies), (1, 2))
+        self.assertEqual((dedup.identical, dedup.equal), (1, 1))
+        self.assertEqual(dedup.rows_saved, 2 * len(self.shared))
+        self.assertTrue(dedup.bytes_saved > 0)
+
+    def test_copies_are_read_back(self):
+        self.grace.write_agr(self.filename, data_mode='dedup')
+        text = open(self.filename).read()
+        self.assertTrue('@copy G0.S0 to G1.S0' in text)
+        self.assertTrue('@copy G0.S0 to G1.S1' in text)
+        read = Grace.read_agr(self.filename, array=False)
+        right = read.graphs[1]
+        self.assertEqual(right.datasets[0].data, self.shared)
+        self.assertEqual(right.datasets[1].data, self.shared)
+        self.assertEqual(right.datasets[0].legend, 'right')
+        self.assertEqual(right.datasets[1].comment, 'equal copy')
+        self.assertEqual(_lines(read), _lines(self.grace))
+
+    def test_other_precision_is_not_copied(self):
+        self.grace.graphs[1].datasets[1].precision = 2
+        dedup = self.grace.write_agr(self.filename, data_mode='dedup')
+        self.assertEqual((dedup.blocks, dedup.copies), (2, 1))
+
+    def test_small_sets_are_written(self):
+        self.grace.graphs[0].add_dataset(self.shared[:DEDUP_MIN_ROWS - 1])
+        self.grace.graphs[1].add_dataset(self.shared[:DEDUP_MIN_ROWS - 1])
+        dedup = self.grace.write_agr(self.filename, data_mode='dedup')
+        self.assertEqual(dedup.copies, 2)
+
+    def test_data_spooled_to_a_file_is_written(self):
+        spoolBytes = PyGrace.dedup.DEDUP_SPOOL_BYTES
+        PyGrace.dedup.DEDUP_SPOOL_BYTES = 100
+        try:
+            self.grace.write_agr(self.filename, data_mode='dedup')
+        finally:
+            PyGrace.dedup.DEDUP_SPOOL_BYTES = spoolBytes
+        read = Grace.read_agr(self.filename, array=False)
+        self.assertEqual(read.graphs[0].datasets[0].data, self.shared)
+        self.assertEqual(_lines(read), _lines(self.grace))
+
+if __name__ == '__main__':
+    unittest.main()
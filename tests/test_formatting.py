@@ -0,0 +1,75 @@
+"""Formatting of data blocks with the precision of a set."""
+import unittest
+
+from PyGrace.formatting import field_format, DataFormatter, \
+     BLOCK_TEMPLATES_KEPT
+from PyGrace.grace import Grace
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ROWS = [(0.5, 1.0 / 3), (2, -7.25e-9), (1e20, 3)]
+
+class FieldFormatTest(unittest.TestCase):
+    def test_precisions(self):
+        self.assertEqual(field_format(None), '%s')
+        self.assertEqual(field_format('repr'), '%r')
+        self.assertEqual(field_format(4), '%.4g')
+        self.assertEqual(field_format(4L), '%.4g')
+        for fmt in ('%.4f', '%e', '%10.3E', '%-+8g', '% G', '%#.2F'):
+            self.assertEqual(field_format(fmt), fmt)
+
+    def test_formats_of_other_than_one_number(self):
+        for fmt in ('%f %f', '%%', '%s', '%5', '%d', '%.4f\n', '.4f',
+                    '%(x)f', '%*f'):
+            self.assertRaises(ValueError, field_format, fmt)
+
+    def test_bad_values(self):
+        for precision in (0, -2, True, 2.5, u'%f'):
+            self.assertRaises(ValueError, field_format, precision)
+
+    def test_precision_of_a_set_is_checked(self):
+        graph = Grace().add_graph()
+        self.assertRaises(ValueError, graph.add_dataset, ROWS,
+                          precision='%f %f')
+        dataset = graph.add_dataset(ROWS)
+        self.assertRaises(ValueError, setattr, dataset, 'precision', '%%')
+
+class FormatBlockTest(unittest.TestCase):
+    def test_default_is_str(self):
+        text = DataFormatter().format_block(ROWS)
+        self.assertEqual(text.split('\n'),
+                         [' '.join(map(str, row)) for row in ROWS])
+
+    def test_repr_round_trips(self):
+        text = DataFormatter('repr').format_block(ROWS)
+        values = [tuple(map(float, line.split()))
+                  for line in text.split('\n')]
+        self.assertEqual(values, [tuple(map(float, row)) for row in ROWS])
+
+    def test_fixed_format(self):
+        text = DataFormatter('%.2f').format_block(ROWS[:2])
+        self.assertEqual(text, '0.50 0.33\n2.00 -0.00')
+
+    def test_only_a_few_block_templates_are_kept(self):
+        formatter = DataFormatter()
+        full = [(1, 2)] * 50
+        for nRows in range(1, 20):
+            formatter.format_block(full)
+            self.assertEqual(formatter.format_block(full[:nRows]),
+                             '\n'.join(['1 2'] * nRows))
+        self.assertEqual(len(formatter._blockTemplates),
+                         BLOCK_TEMPLATES_KEPT)
+        self.assertTrue((50, 2) in formatter._blockTemplates)
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_array_as_list(self):
+        array = numpy.array(ROWS)
+        formatter = DataFormatter(6)
+        self.assertEqual(formatter.format_block(array),
+                         formatter.format_block(array.tolist()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Putting the datasets of a graph in order, and adding and removing them
+(Graph.reorder, insert_dataset, remove_datasets and the move methods)."""
+import unittest
+
+from PyGrace.grace import Grace
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class GraphDatasetsTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = Grace().add_graph()
+        self.a, self.b, self.c, self.d = [
+            self.graph.add_dataset([(i, i)], legend=name)
+            for i, name in enumerate('abcd')]
+
+    def legends(self):
+        return ''.join(dataset.legend for dataset in self.graph.datasets)
+
+    def indices(self):
+        # the indices are given when the graph is written
+        str(self.graph)
+        return [dataset.index for dataset in self.graph.datasets]
+
+    def test_reorder_by_dataset_and_by_place(self):
+        self.graph.reorder([self.c, self.a, self.d, self.b])
+        self.assertEqual(self.legends(), 'cadb')
+        self.assertEqual(self.indices(), [0, 1, 2, 3])
+        self.assertEqual(self.c.index, 0)
+        self.graph.reorder([3, 2, 1, 0])
+        self.assertEqual(self.legends(), 'bdac')
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_reorder_by_sorted_places(self):
+        # such as the places that sort the sets by the mean of their data
+        means = numpy.array([2.5, 0.5, 3.5, 1.5])
+        self.graph.reorder(numpy.argsort(means))
+        self.assertEqual(self.legends(), 'bdac')
+        self.graph.reorder(numpy.array([3, 2, 1, 0], dtype=numpy.int32))
+        self.assertEqual(self.legends(), 'cadb')
+
+    def test_reorder_needs_each_dataset_once(self):
+        self.assertRaises(ValueError, self.graph.reorder,
+                          [self.a, self.a, self.b, self.c])
+        self.assertRaises(ValueError, self.graph.reorder, [0, 1, 2])
+        self.assertEqual(self.legends(), 'abcd')
+
+    def test_set_dataset_order_ends_with_the_first_in_front(self):
+        self.graph.set_dataset_order([self.b, self.d, self.a, self.c])
+        self.assertEqual(self.legends(), 'cadb')
+
+    def test_moves(self):
+        self.graph.move_dataset_to_front(self.a)
+        self.assertEqual(self.legends(), 'bcda')
+        self.graph.move_dataset_to_back(self.d)
+        self.assertEqual(self.legends(), 'dbca')
+        self.graph.move_dataset_forward(self.d)
+        self.graph.move_dataset_backward(self.a)
+        self.assertEqual(self.legends(), 'bdac')
+        self.assertEqual(self.indices(), [0, 1, 2, 3])
+        self.assertEqual(self.a.index, 2)
+
+    def test_insert_dataset(self):
+        e = self.graph.insert_dataset(1, [(9, 9)], legend='e')
+        self.assertEqual(self.legends(), 'aebcd')
+        self.assertEqual(self.indices(), [0, 1, 2, 3, 4])
+        self.assertEqual(e.index, 1)
+        self.assertEqual(self.graph.add_dataset([(0, 0)]).index, 5)
+
+    def test_remove_datasets(self):
+        self.graph.remove_datasets([self.d, self.b])
+        self.assertEqual(self.legends(), 'ac')
+        self.assertEqual(self.indices(), [0, 1])
+        self.assertEqual(self.graph.add_dataset([(0, 0)], legend='f').index,
+                         2)
+        self.assertRaises(ValueError, self.graph.remove_dataset, self.b)
+
+    def test_written_in_order(self):
+        self.graph.reorder([self.d, self.c, self.b, self.a])
+        text = str(self.graph)
+        self.assertTrue('@    s0 legend "d"' in text)
+        self.assertTrue('@    s3 legend "a"' in text)
+
+if __name__ == '__main__':
+    unittest.main()
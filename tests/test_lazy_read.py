@@ -0,0 +1,63 @@
+"""Reading projects lazily (read_agr with lazy=True) and writing them back
+over the file they were read from."""
+import os
+import stat
+import shutil
+import tempfile
+import unittest
+
+from PyGrace.grace import Grace
+
+def _lines(text):
+    # the timestamp is written with the time it was made
+    return [line for line in text.split('\n') if 'timestamp def' not in line]
+
+class LazyReadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'lazy.agr')
+        grace = Grace()
+        graph = grace.add_graph()
+        self.rows = [(i, i * 0.5) for i in range(200)]
+        graph.add_dataset(self.rows, comment='first')
+        graph.add_dataset([(1, 2, 0.5), (2, 3, 0.25)], type='xydy')
+        grace.write_agr(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self):
+        return Grace.read_agr(self.filename, array=False, lazy=True)
+
+    def test_unused_data_is_copied_as_it_is(self):
+        before = open(self.filename).read()
+        self.read().write_agr(self.filename)
+        self.assertEqual(_lines(open(self.filename).read()),
+                         _lines(before))
+
+    def test_data_is_read_when_used(self):
+        grace = self.read()
+        first, second = grace.graphs[0].datasets
+        self.assertEqual([tuple(row) for row in first.data],
+                         [tuple(map(float, row)) for row in self.rows])
+        self.assertEqual(second.type, 'xydy')
+        self.assertEqual(second.limits(), (1.0, 1.5, 2.0, 3.25))
+
+    def test_changed_data_is_written_back(self):
+        grace = self.read()
+        grace.graphs[0].datasets[0].data = [(0, -1), (1, -2)]
+        grace.write_agr(self.filename)
+        again = Grace.read_agr(self.filename, array=False)
+        self.assertEqual([tuple(row) for row in
+                          again.graphs[0].datasets[0].data],
+                         [(0.0, -1.0), (1.0, -2.0)])
+        self.assertEqual(len(again.graphs[0].datasets[1].data), 2)
+
+    def test_mode_is_kept(self):
+        os.chmod(self.filename, 0640)
+        self.read().write_agr(self.filename)
+        self.assertEqual(stat.S_IMODE(os.stat(self.filename).st_mode), 0640)
+        self.assertEqual(os.listdir(self.directory), ['lazy.agr'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+"""The style children of a DataSet (symbol, line, ...), which are only
+made when they are first used."""
+import unittest
+
+from PyGrace.grace import Grace
+
+class LazyStyleTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = Grace().add_graph()
+
+    def test_styles_are_made_on_first_use(self):
+        dataset = self.graph.add_dataset([(0, 1)])
+        self.assertFalse('symbol' in dataset.__dict__)
+        plain = str(self.graph)
+        dataset.symbol
+        dataset.errorbar
+        self.assertTrue('symbol' in dataset.__dict__)
+        self.assertEqual(str(self.graph), plain)
+
+    def test_default_lines_of_each_set(self):
+        first = self.graph.add_dataset([(0, 1)])
+        second = self.graph.add_dataset([(1, 2)])
+        first.symbol.size = 2
+        lines = str(self.graph).split('\n')
+        self.assertTrue('@    s0 symbol size 2' in lines)
+        self.assertTrue('@    s1 symbol size 0.5' in lines)
+        self.assertFalse('symbol' in second.__dict__)
+
+    def test_children_makes_all_styles(self):
+        dataset = self.graph.add_dataset([(0, 1)])
+        self.assertEqual(len(dataset.children()), 6)
+        dataset.set_linewidths(3.5)
+        self.assertEqual(dataset.line.linewidth, 3.5)
+        self.assertEqual(dataset.errorbar.linewidth, 3.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Live updates of a running xmgrace (live.py), recorded with a
+RecordingPipe instead of the pipe of xmgrace."""
+import unittest
+
+from PyGrace.grace import Grace
+from PyGrace.live import LiveSession, RecordingPipe
+from PyGrace.drawing_objects import DrawText
+
+class Clock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+class LiveSessionTest(unittest.TestCase):
+    def setUp(self):
+        self.grace = Grace()
+        self.graph = self.grace.add_graph()
+        self.trace = self.graph.add_dataset([(0, 0), (1, 1)])
+        self.pipe = RecordingPipe()
+        self.clock = Clock()
+        self.session = LiveSession(self.grace, self.pipe, interval=1.0,
+                                   clock=self.clock)
+        self.pipe.clear()
+
+    def changes(self):
+        self.session.flush()
+        lines = self.pipe.lines()
+        self.pipe.clear()
+        return lines
+
+    def test_project_is_sent_first(self):
+        pipe = RecordingPipe()
+        LiveSession(self.grace, pipe)
+        self.assertEqual(pipe.lines()[:-1], str(self.grace).split('\n'))
+        self.assertEqual(pipe.lines()[-1], 'redraw')
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.changes(), [])
+        self.assertEqual(self.session.updates, 1)
+
+    def test_appended_rows_are_sent_as_points(self):
+        self.trace.data.extend([(2, 4.5), (3, 9)])
+        self.assertEqual(self.changes(),
+                         ['g0.s0 point 2, 4.5', 'g0.s0 point 3, 9',
+                          'redraw'])
+
+    def test_replaced_data_is_sent_whole(self):
+        self.trace.data = [(5, 5)]
+        lines = self.changes()
+        self.assertEqual(lines[:3], ['kill g0.s0 saveall', '@target G0.S0',
+                                     '@type xy'])
+        self.assertEqual(lines[3:], ['5 5', '&', 'redraw'])
+
+    def test_changed_settings_and_removed_sets(self):
+        other = self.graph.add_dataset([(1, 2)])
+        self.changes()
+        self.graph.remove_dataset(other)
+        self.trace.symbol.size = 2
+        lines = self.changes()
+        self.assertTrue('@    s0 symbol size 2' in lines)
+        self.assertTrue('kill g0.s1' in lines)
+        self.assertEqual(lines[0], '@with g0')
+
+    def test_removed_graph(self):
+        self.grace.add_graph()
+        self.changes()
+        del self.grace.graphs[1]
+        self.assertEqual(self.changes(), ['kill g1', 'redraw'])
+
+    def test_new_drawing_object_sends_the_project(self):
+        self.grace.add_drawing_object(DrawText, text='new')
+        lines = self.changes()
+        self.assertEqual(lines[0], 'new')
+        self.assertTrue(len(lines) > 100)
+
+    def test_updates_within_the_interval_wait(self):
+        self.trace.data.append((2, 2))
+        self.clock.now += 0.5
+        self.assertFalse(self.session.update())
+        self.assertTrue(self.session.pending)
+        self.trace.data.append((3, 3))
+        self.clock.now += 0.6
+        self.assertTrue(self.session.update())
+        self.assertEqual(self.pipe.lines(),
+                         ['g0.s0 point 2, 2', 'g0.s0 point 3, 3', 'redraw'])
+
+    def test_resend(self):
+        self.trace.data[0] = (0, -1)
+        self.assertEqual(self.changes(), [])
+        self.session.resend(self.trace)
+        lines = self.changes()
+        self.assertEqual(lines[0], 'kill g0.s0 saveall')
+        self.assertTrue('0 -1' in lines)
+
+    def test_close(self):
+        self.trace.data.append((2, 2))
+        self.session.close()
+        self.assertTrue(self.pipe.closed)
+        self.assertEqual(self.pipe.lines(), ['g0.s0 point 2, 2', 'redraw'])
+
+if __name__ == '__main__':
+    unittest.main()
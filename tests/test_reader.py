@@ -0,0 +1,130 @@
+"""Reading project files back into a Grace (reader.py)."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from PyGrace.grace import Grace
+from PyGrace.reader import parse_agr
+from PyGrace.drawing_objects import DrawText, DrawBox
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _lines(grace):
+    # the timestamp is written with the time it was made
+    return [line for line in str(grace).split('\n')
+            if 'timestamp def' not in line]
+
+class ReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        grace = Grace()
+        grace.add_drawing_object(DrawBox, lowleft=(0.1, 0.1),
+                                 upright=(0.2, 0.3))
+        graph = grace.add_graph()
+        graph.title.text = 'Reading back'
+        graph.xaxis.label.text = 'time'
+        first = graph.add_dataset([(1, 2.5), (2, 3.25), (4, -1)],
+                                  legend='first')
+        first.symbol.shape = 3
+        first.line.linestyle = 2
+        graph.add_dataset([(1, 2, 0.5), (2, 1, 0.25)], type='xydy',
+                          comment='errors')
+        graph.add_drawing_object(DrawText, text='note', x=0.5, y=0.5)
+        logGraph = grace.add_graph()
+        logGraph.add_dataset([(1, 10), (2, 100)])
+        logGraph.yaxis.set_log()
+        self.grace = grace
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parsed_project_writes_the_same(self):
+        text = str(self.grace)
+        read = parse_agr(text.split('\n'), array=False, strict=True)
+        self.assertEqual(_lines(read), _lines(self.grace))
+
+    def test_settings_and_data_are_read(self):
+        read = parse_agr(str(self.grace).split('\n'), array=False)
+        graph, logGraph = read.graphs
+        self.assertEqual(graph.title.text, 'Reading back')
+        self.assertEqual([dataset.type for dataset in graph.datasets],
+                         ['xy', 'xydy'])
+        self.assertEqual(graph.datasets[0].data, [(1, 2.5), (2, 3.25),
+                                                  (4, -1)])
+        self.assertEqual(graph.datasets[0].symbol.shape, 3)
+        self.assertEqual(graph.datasets[1].comment, 'errors')
+        self.assertEqual(logGraph.yaxis.scale, 'Logarithmic')
+        self.assertEqual(len(read.drawing_objects), 1)
+        self.assertEqual(len(graph.drawing_objects), 1)
+
+    def test_read_graphs_take_new_indices_after_the_old(self):
+        read = parse_agr(str(self.grace).split('\n'))
+        self.assertEqual(read.add_graph().index, 2)
+        self.assertEqual(read.graphs[0].add_dataset([(0, 0)]).index, 2)
+
+    def test_unknown_lines_are_skipped_unless_strict(self):
+        lines = str(self.grace).split('\n')
+        lines.insert(5, '@not a setting of pygrace')
+        parse_agr(lines)
+        self.assertRaises(ValueError, parse_agr, lines, strict=True)
+
+    def test_read_agr_from_file(self):
+        filename = os.path.join(self.directory, 'project.agr')
+        self.grace.write_agr(filename)
+        read = Grace.read_agr(filename, array=False, strict=True)
+        self.assertEqual(_lines(read), _lines(self.grace))
+
+    def test_blocks_go_into_the_first_sets_without_data(self):
+        stream = open(os.path.join(self.directory, 'columns.dat'), 'w')
+        stream.write('1 2 3\n4 5 6\n')
+        stream.close()
+        lines = ['@with g0', '@    s3 legend "three"',
+                 '@read block "columns.dat"', '@block xy "1:2"',
+                 '@    s1 legend "one"', '@block xy "1:3"',
+                 '@block xy "2:3"', '@block xy "3:1"']
+        read = parse_agr(lines, array=False, directory=self.directory)
+        datasets = read.graphs[0].datasets
+        self.assertEqual([dataset.index for dataset in datasets],
+                         [1, 3, 4, 5])
+        self.assertEqual([dataset.data for dataset in datasets],
+                         [[(1, 3), (4, 6)], [(1, 2), (4, 5)],
+                          [(2, 3), (5, 6)], [(3, 1), (6, 4)]])
+
+    def test_many_sets_are_read_in_order(self):
+        grace = Grace()
+        graph = grace.add_graph()
+        for i in range(300):
+            graph.add_dataset([(i, 1)])
+        read = parse_agr(str(grace).split('\n'), array=False)
+        self.assertEqual([dataset.data for dataset in read.graphs[0].datasets],
+                         [[(i, 1)] for i in range(300)])
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_data_is_read_into_arrays(self):
+        read = parse_agr(str(self.grace).split('\n'), array=True)
+        data = read.graphs[0].datasets[1].data
+        self.assertTrue(isinstance(data, numpy.ndarray))
+        self.assertEqual(data.tolist(), [[1, 2, 0.5], [2, 1, 0.25]])
+
+    @unittest.skipIf(numpy is None, 'needs numpy')
+    def test_integers_are_written_back_as_integers(self):
+        grace = Grace()
+        graph = grace.add_graph()
+        graph.add_dataset([(0, 0), (1, -2), (3, +4)])
+        graph.add_dataset([(0, 0.5), (1, 2)])
+        graph.add_dataset([(0, 10 ** 20)])
+        read = parse_agr(str(grace).split('\n'), array=True)
+        integers, floats, large = read.graphs[0].datasets
+        self.assertEqual(integers.data.dtype.kind, 'i')
+        self.assertEqual(floats.data.dtype.kind, 'f')
+        self.assertEqual(large.data, [(0, 10 ** 20)])
+        lines = _lines(read)
+        start = lines.index('@target G0.S0') + 2
+        self.assertEqual(lines[start:start + 4], ['0 0', '1 -2', '3 4', '&'])
+
+if __name__ == '__main__':
+    unittest.main()
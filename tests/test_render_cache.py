@@ -0,0 +1,96 @@
+"""RenderCache, with a renderer that writes the project itself."""
+import os
+import stat
+import shutil
+import tempfile
+import unittest
+
+from PyGrace.grace import Grace
+from PyGrace.render import RenderCache
+
+FAKE_RENDERER = 'cat > "%(filename)s"'
+
+def _project(title):
+    grace = Grace()
+    graph = grace.add_graph()
+    graph.title.text = title
+    graph.add_dataset([(0, 1), (1, 3), (2, 2)])
+    return grace
+
+class RenderCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cacheDirectory = os.path.join(self.directory, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def cache(self, **kwargs):
+        return RenderCache(self.cacheDirectory, command=FAKE_RENDERER,
+                           version='test', **kwargs)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_hit_and_miss(self):
+        cache = self.cache()
+        grace = _project('one')
+        self.assertFalse(cache.write_file(grace, self.path('a.eps')))
+        self.assertTrue(cache.write_file(grace, self.path('b.eps')))
+        self.assertFalse(cache.write_file(_project('two'),
+                                          self.path('c.eps')))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        a, b = [open(self.path(name)).read() for name in ('a.eps', 'b.eps')]
+        self.assertEqual(a, b)
+        self.assertTrue('"one"' in a)
+
+    def test_copies_can_be_changed(self):
+        cache = self.cache()
+        grace = _project('one')
+        cache.write_file(grace, self.path('a.eps'))
+        expected = open(self.path('a.eps')).read()
+
+        # the written file is a writable copy, not the stored file
+        info = os.stat(self.path('a.eps'))
+        self.assertEqual(info.st_nlink, 1)
+        self.assertTrue(info.st_mode & stat.S_IWUSR)
+        outfile = open(self.path('a.eps'), 'w')
+        outfile.write('changed')
+        outfile.close()
+
+        cache.write_file(grace, self.path('b.eps'))
+        self.assertEqual(open(self.path('b.eps')).read(), expected)
+
+    def test_stored_files_are_read_only(self):
+        cache = self.cache()
+        cache.write_file(_project('one'), self.path('a.eps'))
+        names = os.listdir(self.cacheDirectory)
+        self.assertEqual(len(names), 1)
+        mode = os.stat(os.path.join(self.cacheDirectory, names[0])).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0444)
+
+    def test_links(self):
+        cache = self.cache(link=True)
+        grace = _project('one')
+        cache.write_file(grace, self.path('a.eps'))
+        cache.write_file(grace, self.path('b.eps'))
+        a, b = os.stat(self.path('a.eps')), os.stat(self.path('b.eps'))
+        self.assertEqual(a.st_ino, b.st_ino)
+        self.assertFalse(a.st_mode & stat.S_IWUSR)
+
+        # writing over a link replaces it rather than the stored file
+        cache.write_file(_project('two'), self.path('a.eps'))
+        self.assertNotEqual(os.stat(self.path('a.eps')).st_ino, b.st_ino)
+        self.assertTrue('"one"' in open(self.path('b.eps')).read())
+
+    def test_evict(self):
+        cache = self.cache()
+        for title in ('one', 'two', 'three'):
+            cache.write_file(_project(title), self.path(title + '.eps'))
+        self.assertEqual(len(os.listdir(self.cacheDirectory)), 3)
+        cache.evict(0)
+        self.assertEqual(os.listdir(self.cacheDirectory), [])
+        self.assertTrue(os.path.exists(self.path('one.eps')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Rendering projects concurrently with a RenderPool, using shell commands
+in place of gracebat."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from PyGrace.grace import Grace
+from PyGrace.render import RenderPool
+
+# renderers that copy the project, fail with a message, and hang
+COPY = 'cat > "%(filename)s"'
+FAIL = 'cat > /dev/null; echo "no %(filetype)s today" >&2; exit 3'
+HANG = 'sleep 30'
+
+def _lines(text):
+    # the timestamp is written with the time it was made
+    return [line for line in text.split('\n') if 'timestamp def' not in line]
+
+class BrokenProject(object):
+    """A project that fails half way through being written."""
+    def __init__(self, grace):
+        self.grace = grace
+
+    def write_to(self, stream):
+        stream.write(str(self.grace)[:1000])
+        raise RuntimeError('project went away')
+
+class RenderPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.projects = []
+        for n in range(1, 5):
+            grace = Grace()
+            grace.add_graph().add_dataset([(i, i * n) for i in range(10)])
+            self.projects.append(grace)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_render_many_keeps_the_order(self):
+        jobs = [(grace, self.path('p%i.png' % i))
+                for i, grace in enumerate(self.projects)]
+        with RenderPool(workers=2, command=COPY) as pool:
+            results = pool.render_many(jobs)
+        self.assertEqual([r.filename for r in results],
+                         [filename for grace, filename in jobs])
+        for (grace, filename), result in zip(jobs, results):
+            self.assertTrue(result)
+            self.assertEqual(result.filetype, 'PNG')
+            self.assertEqual(result.returncode, 0)
+            self.assertEqual(_lines(open(filename).read()),
+                             _lines(str(grace)))
+
+    def test_serialized_project(self):
+        text = str(self.projects[0])
+        pool = RenderPool(workers=1, command=COPY)
+        result = pool.render(text, self.path('text.eps'))
+        pool.close()
+        self.assertTrue(result)
+        self.assertEqual(open(self.path('text.eps')).read(), text)
+
+    def test_failure_keeps_the_output_of_the_renderer(self):
+        with RenderPool(workers=1, command=FAIL) as pool:
+            result = pool.render(self.projects[0], self.path('bad.ps'))
+        self.assertFalse(result)
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.error, 'no PostScript today')
+
+    def test_timeout(self):
+        with RenderPool(workers=1, command=HANG, timeout=0.2) as pool:
+            result = pool.render(self.projects[0], self.path('slow.png'))
+        self.assertFalse(result)
+        self.assertTrue('timed out' in result.error)
+        self.assertTrue(result.seconds < 10)
+
+    def test_project_that_fails_is_not_rendered(self):
+        filename = self.path('broken.png')
+        with RenderPool(workers=1, command=COPY) as pool:
+            result = pool.render(BrokenProject(self.projects[0]), filename)
+        self.assertFalse(result)
+        self.assertTrue('project went away' in result.error)
+        self.assertFalse(os.path.exists(filename))
+
+    def test_unknown_type_fails_only_its_own_job(self):
+        jobs = [(self.projects[0], self.path('a.png')),
+                (self.projects[1], self.path('b.unknown')),
+                (self.projects[2], self.path('c.agr')),
+                (self.projects[3], self.path('d.eps'))]
+        with RenderPool(workers=2, command=COPY) as pool:
+            results = pool.render_many(jobs)
+        self.assertEqual(map(bool, results), [True, False, False, True])
+        self.assertEqual([r.filename for r in results],
+                         [filename for grace, filename in jobs])
+        self.assertTrue('TypeError' in results[1].error)
+        self.assertTrue('ValueError' in results[2].error)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['a.png', 'd.eps'])
+
+    def test_agr_and_workers_are_refused(self):
+        self.assertRaises(ValueError, RenderPool, workers=0)
+        pool = RenderPool(workers=1, command=COPY)
+        self.assertRaises(ValueError, pool.submit, self.projects[0],
+                          self.path('project.agr'))
+        pool.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Writing the data of sets to files next to the project (data_mode
+'sidecar') and reading it back."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from PyGrace.grace import Grace
+from PyGrace.reader import parse_agr
+
+class SidecarTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        self.grace = Grace()
+        graph = self.grace.add_graph()
+        self.curve = [(i, (i % 7) * 0.5) for i in range(50)]
+        graph.add_dataset(self.curve, comment='curve')
+        graph.add_dataset([(1, 2, 0.5), (2, 1, 0.25)], type='xydy',
+                          hidden='true')
+        graph.add_dataset(self.curve, comment='again')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def read_block_lines(self, filename):
+        return [line for line in open(filename).read().split('\n')
+                if line.startswith('@read block')]
+
+    def test_names_are_relative_to_the_project(self):
+        sidecar = self.grace.write_agr(self.path('plot.agr'), 'sidecar',
+                                       self.path('data'))
+        lines = self.read_block_lines(self.path('plot.agr'))
+        self.assertEqual(len(lines), 3)
+        for line in lines:
+            self.assertTrue(line.startswith('@read block "data/data_'))
+        self.assertEqual(len(os.listdir(self.path('data'))), 2)
+        self.assertEqual((sidecar.written, sidecar.reused), (2, 0))
+
+    def test_moved_project_is_read_from_anywhere(self):
+        os.mkdir(self.path('old'))
+        self.grace.write_agr(self.path('old', 'plot.agr'), 'sidecar')
+        shutil.move(self.path('old'), self.path('new'))
+        os.chdir(tempfile.gettempdir())
+
+        grace = Grace.read_agr(self.path('new', 'plot.agr'), array=False)
+        curve, errors, again = grace.graphs[0].datasets
+        self.assertEqual([tuple(row) for row in curve.data],
+                         [tuple(map(float, row)) for row in self.curve])
+        self.assertEqual(again.data, curve.data)
+        self.assertEqual(errors.type, 'xydy')
+        self.assertEqual(errors.hidden, 'true')
+        self.assertEqual(curve.comment, 'curve')
+        self.assertEqual(again.comment, 'again')
+
+    def test_files_are_reused(self):
+        self.grace.write_agr(self.path('a.agr'), 'sidecar')
+        sidecar = self.grace.write_agr(self.path('b.agr'), 'sidecar')
+        self.assertEqual((sidecar.written, sidecar.reused), (0, 2))
+        self.assertEqual(self.read_block_lines(self.path('a.agr')),
+                         self.read_block_lines(self.path('b.agr')))
+
+    def test_reader_finds_names_in_the_directory_given(self):
+        self.grace.write_agr(self.path('plot.agr'), 'sidecar')
+        lines = open(self.path('plot.agr')).read().split('\n')
+        grace = parse_agr(lines, array=False, directory=self.directory)
+        self.assertEqual(len(grace.graphs[0].datasets[1].data), 2)
+        os.chdir(tempfile.gettempdir())
+        self.assertRaises(IOError, parse_agr, lines)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""The strings that objects are written as are stored, and made again only
+when something they show changed."""
+import unittest
+
+from PyGrace import base
+from PyGrace.grace import Grace
+from PyGrace.drawing_objects import DrawBox, DrawText, DrawLine, DrawEllipse
+
+class StoredStringsTest(unittest.TestCase):
+    def setUp(self):
+        self.grace = Grace()
+        self.graph = self.grace.add_graph()
+        self.graph.add_dataset([(0, 1), (1, 2)])
+        self.box = self.graph.add_drawing_object(DrawBox)
+        self.text = self.grace.add_drawing_object(DrawText, text='hello')
+        self.graph.add_drawing_object(DrawLine)
+        self.graph.add_drawing_object(DrawEllipse)
+        str(self.grace)
+        str(self.grace)
+
+    def stats_of_next_write(self):
+        base.reset_render_stats()
+        text = str(self.grace)
+        return text, base.render_stats()
+
+    def test_unchanged_project_is_reused(self):
+        text, stats = self.stats_of_next_write()
+        for name in ('Graph', 'DataSet', 'DrawBox', 'DrawText', 'DrawLine',
+                     'DrawEllipse'):
+            self.assertEqual(stats[name][1], 0, name)
+
+    def test_changed_drawing_object(self):
+        self.box.color = 2
+        text, stats = self.stats_of_next_write()
+        self.assertTrue('@    box color 2' in text)
+        self.assertEqual(stats['DrawBox'], (0, 1))
+        self.assertEqual(stats['DrawLine'], (1, 0))
+
+        # writing the box again does not throw away the string of the graph
+        text, stats = self.stats_of_next_write()
+        self.assertEqual(stats['DrawBox'], (1, 0))
+        self.assertEqual(stats['Graph'], (1, 0))
+
+    def test_new_drawing_object(self):
+        self.graph.add_drawing_object(DrawBox, color=3)
+        self.stats_of_next_write()
+        text, stats = self.stats_of_next_write()
+        self.assertEqual(stats['Graph'], (1, 0))
+        self.assertEqual(text.count('@with box'), 2)
+        self.assertTrue('@    box g0' in text)
+
+    def test_changed_list_in_place(self):
+        self.graph.xaxis.tick.spec_ticks = [0, 1]
+        self.graph.xaxis.tick.spec_type = 'ticks'
+        self.assertTrue('@    xaxis tick spec 2\n' in str(self.grace))
+        self.graph.xaxis.tick.spec_ticks.append(2)
+        self.assertTrue('@    xaxis tick spec 3\n' in str(self.grace))
+
+if __name__ == '__main__':
+    unittest.main()
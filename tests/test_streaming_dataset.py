@@ -0,0 +1,80 @@
+"""Sets that rows are appended to, with running limits and sliding windows
+(Extensions/streaming.py)."""
+import unittest
+
+from PyGrace.grace import Grace
+from PyGrace.live import LiveSession, RecordingPipe
+from PyGrace.Extensions.streaming import StreamingDataSet
+
+class StreamingDataSetTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = Grace().add_graph()
+
+    def add(self, rows, **kwargs):
+        return self.graph.add_dataset(rows, StreamingDataSet, **kwargs)
+
+    def test_limits_follow_the_rows(self):
+        stream = self.add([(1, -2), (2, 5)])
+        self.assertEqual(stream.limits(), (1, -2, 2, 5))
+        stream.append((0.5, 7))
+        stream.extend([(3, -4), (4, 0)])
+        self.assertEqual(stream.limits(), (0.5, -4, 4, 7))
+        self.assertEqual(stream.smallest_positive(), (0.5, 5))
+        self.assertEqual(stream.appended, 5)
+
+    def test_error_bars_count(self):
+        stream = self.add([(1, 2, 0.5)], type='xydy')
+        stream.append((2, 1, 3))
+        self.assertEqual(stream.limits(), (1, -2, 2, 4))
+
+    def test_window_forgets_old_rows(self):
+        stream = self.add([(0, 100), (1, -100)], capacity=3)
+        self.assertEqual(stream.limits(), (0, -100, 1, 100))
+        stream.extend([(2, 1), (3, 2)])
+        self.assertEqual(list(stream.data), [(1, -100), (2, 1), (3, 2)])
+        self.assertEqual(stream.limits(), (1, -100, 3, 2))
+        stream.append((4, 0))
+        self.assertEqual(stream.limits(), (2, 0, 4, 2))
+        self.assertEqual(stream.appended, 5)
+        self.assertTrue(str(self.graph.root).endswith('2 1\n3 2\n4 0\n&'))
+
+    def test_replaced_data_is_gone_through_again(self):
+        stream = self.add([(0, 0), (1, 1)])
+        stream.data = [(5, -5), (6, 8)]
+        self.assertEqual(stream.limits(), (5, -5, 6, 8))
+        stream.append((7, 9))
+        self.assertEqual(stream.limits(), (5, -5, 7, 9))
+
+    def test_hidden_set_has_no_limits(self):
+        stream = self.add([(1, 1)], hidden='true')
+        self.assertEqual(stream.limits(), (None, None, None, None))
+        self.assertEqual(stream.limits(only_visible=False), (1, 1, 1, 1))
+
+    def test_autoscale_uses_the_running_limits(self):
+        stream = self.add([(0, 0)])
+        stream.extend([(x, x * 0.5) for x in range(1, 101)])
+        self.graph.autoscale()
+        world = self.graph.get_world()
+        self.assertTrue(world[0] <= 0 and world[2] >= 100)
+        self.assertTrue(world[1] <= 0 and world[3] >= 50)
+
+    def test_live_session_sends_a_window_again(self):
+        self.graph.add_dataset([(0, 0)])
+        window = self.add([(0, 1), (1, 2)], capacity=3)
+        pipe = RecordingPipe()
+        session = LiveSession(self.graph.root, pipe)
+        pipe.clear()
+        window.append((2, 3))
+        session.flush()
+        self.assertEqual(pipe.lines(), ['g0.s1 point 2, 3', 'redraw'])
+        pipe.clear()
+
+        # the oldest row falls out of the window
+        window.append((3, 4))
+        session.flush()
+        lines = pipe.lines()
+        self.assertEqual(lines[:2], ['kill g0.s1 saveall', '@target G0.S1'])
+        self.assertEqual(lines[3:-1], ['1 2', '2 3', '3 4', '&'])
+
+if __name__ == '__main__':
+    unittest.main()
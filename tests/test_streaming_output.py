@@ -0,0 +1,60 @@
+"""Writing projects one chunk at a time (Grace.iter_lines and write_to)."""
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from PyGrace.grace import Grace
+from PyGrace.dataset import DATA_CHUNK_SIZE
+
+def _lines(text):
+    # the timestamp is written with the time it was made
+    return [line for line in text.split('\n') if 'timestamp def' not in line]
+
+class CountingStream(object):
+    def __init__(self):
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(len(text))
+
+class StreamingOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.grace = Grace()
+        graph = self.grace.add_graph()
+        self.nRows = 2 * DATA_CHUNK_SIZE + 17
+        graph.add_dataset([(i, i ** 2) for i in range(self.nRows)])
+        graph.add_dataset([(0, 1, 2)], type='xydy')
+
+    def test_write_to_writes_str(self):
+        stream = StringIO()
+        self.grace.write_to(stream)
+        self.assertEqual(_lines(stream.getvalue()), _lines(str(self.grace)))
+
+    def test_chunks_are_whole_lines(self):
+        chunks = list(self.grace.iter_lines())
+        self.assertTrue(len(chunks) > 3)
+        for chunk in chunks:
+            self.assertFalse(chunk.endswith('\n'))
+
+    def test_data_is_written_in_blocks(self):
+        blocks = [chunk for chunk in self.grace.iter_lines()
+                  if chunk[:1].isdigit()]
+        self.assertEqual([block.count('\n') + 1 for block in blocks],
+                         [DATA_CHUNK_SIZE, DATA_CHUNK_SIZE, 17, 1])
+        stream = CountingStream()
+        self.grace.write_to(stream)
+        self.assertEqual(max(stream.writes), max(map(len, blocks)))
+
+    def test_write_agr(self):
+        directory = tempfile.mkdtemp()
+        try:
+            self.grace.write_agr(os.path.join(directory, 'squares'))
+            written = open(os.path.join(directory, 'squares.agr')).read()
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(_lines(written), _lines(str(self.grace)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""Setting and scaling the attributes with a suffix (set_suffixes and
+scale_suffixes)."""
+import unittest
+
+from PyGrace.grace import Grace
+
+def _lines(grace):
+    # the timestamp is written with the time it was made
+    return [line for line in str(grace).split('\n')
+            if 'timestamp def' not in line]
+
+class SuffixTest(unittest.TestCase):
+    def setUp(self):
+        self.grace = Grace()
+        graph = self.grace.add_graph()
+        graph.add_dataset([(0, 0), (1, 1)])
+
+    def test_set_suffixes_is_set_suffix_in_turn(self):
+        other = Grace()
+        other.add_graph().add_dataset([(0, 0), (1, 1)])
+        updates = [(2.5, 'linewidth'), (0.75, 'size'), (1.5, 'linewidth')]
+        self.grace.set_suffixes(updates)
+        for value, suffix in updates:
+            other.set_suffix(value, suffix)
+        self.assertEqual(_lines(self.grace), _lines(other))
+        graph = self.grace.graphs[0]
+        self.assertEqual(graph.frame.linewidth, 1.5)
+        self.assertEqual(graph.datasets[0].symbol.size, 0.75)
+
+    def test_scale_suffixes(self):
+        graph = self.grace.graphs[0]
+        size = graph.xaxis.label.char_size
+        width = graph.datasets[0].line.linewidth
+        self.grace.scale_suffixes([(2, 'char_size'), (3, 'linewidth')])
+        self.assertEqual(graph.xaxis.label.char_size, 2 * size)
+        self.assertEqual(graph.datasets[0].line.linewidth, 3 * width)
+
+    def test_not_below_unless_all(self):
+        graph = self.grace.graphs[0]
+        graph.set_suffixes([(4.0, 'linewidth')], all=False)
+        self.assertNotEqual(graph.frame.linewidth, 4.0)
+
+if __name__ == '__main__':
+    unittest.main()
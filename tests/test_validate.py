@@ -0,0 +1,30 @@
+"""Attribute checks, and skipping them below an object made with
+validate=False."""
+import unittest
+
+from PyGrace.grace import Grace
+
+class ValidateTest(unittest.TestCase):
+    def test_checks_are_skipped_below_the_object(self):
+        graph = Grace(validate=False).add_graph()
+        dataset = graph.add_dataset([(0, 0)])
+        dataset.symbol.size = 'huge'
+        self.assertEqual(dataset.symbol.size, 'huge')
+        graph.xaxis.label.char_size = -1
+
+    def test_checks_are_made_by_default(self):
+        dataset = Grace().add_graph().add_dataset([(0, 0)])
+        self.assertRaises(TypeError, setattr, dataset.symbol, 'size',
+                          'huge')
+        self.assertRaises(ValueError, setattr, dataset, 'type', 'xyzzy')
+
+    def test_one_graph_without_checks(self):
+        grace = Grace()
+        fast = grace.add_graph(validate=False)
+        fast.add_dataset([(0, 0)]).line.linewidth = 'thick'
+        checked = grace.add_graph().add_dataset([(0, 0)])
+        self.assertRaises(TypeError, setattr, checked.line, 'linewidth',
+                          'thick')
+
+if __name__ == '__main__':
+    unittest.main()
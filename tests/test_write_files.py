@@ -0,0 +1,77 @@
+"""Grace.write_files, with a renderer that writes the project itself."""
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+
+from PyGrace import grace as grace_module
+from PyGrace.grace import Grace
+from PyGrace.render import RenderPool
+
+FAKE_RENDERER = 'cat > "%(filename)s"'
+
+class WriteFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.grace = Grace()
+        graph = self.grace.add_graph()
+        graph.add_dataset([(0, 0), (1, 1), (2, 4)])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def written(self, name):
+        return open(self.path(name)).read()
+
+    def test_all_files_from_one_string(self):
+        names = ['fig.eps', 'fig.png', 'fig.agr', 'fig.agr.gz',
+                 ('fig.out', 'svg')]
+        pool = RenderPool(workers=2, command=FAKE_RENDERER)
+        try:
+            results = self.grace.write_files(
+                [self.path(name) if isinstance(name, str) else
+                 (self.path(name[0]), name[1]) for name in names], pool)
+        finally:
+            pool.close()
+        self.assertTrue(all(results), results)
+        self.assertEqual([result.filetype for result in results],
+                         ['EPS', 'PNG', 'agr', 'agr', 'svg'])
+        # (the same string, timestamp included, goes to every file)
+        expected = self.written('fig.agr')
+        for name in ('fig.eps', 'fig.png', 'fig.out'):
+            self.assertEqual(self.written(name), expected)
+        self.assertEqual(gzip.open(self.path('fig.agr.gz')).read(), expected)
+
+    def test_unknown_type_fails_only_its_own_file(self):
+        results = self.grace.write_files([self.path('a.agr'),
+                                          self.path('b.weird'),
+                                          self.path('c.agr')])
+        self.assertEqual([bool(result) for result in results],
+                         [True, False, True])
+        self.assertTrue('TypeError' in results[1].error)
+        self.assertTrue(os.path.exists(self.path('a.agr')))
+        self.assertTrue(os.path.exists(self.path('c.agr')))
+        self.assertFalse(os.path.exists(self.path('b.weird')))
+
+    def test_own_pool_has_a_worker_per_rendered_file(self):
+        made = []
+        class Pool(RenderPool):
+            def __init__(self, workers=None, timeout=None):
+                made.append(workers)
+                RenderPool.__init__(self, workers, FAKE_RENDERER, timeout)
+        grace_module.RenderPool, original = Pool, grace_module.RenderPool
+        try:
+            self.grace.write_files([self.path('a.agr')])
+            self.grace.write_files([self.path(name) for name in
+                                    ('a.eps', 'a.agr', 'a.x', 'a.png')])
+        finally:
+            grace_module.RenderPool = original
+        self.assertEqual(made, [2])
+        self.assertTrue(os.path.exists(self.path('a.png')))
+
+if __name__ == '__main__':
+    unittest.main()